@@ -27,6 +27,9 @@ def token_required(f):
                     401,
                 )
 
+        if not token and getattr(f, "allow_query_token", False):
+            token = request.args.get("access_token")
+
         if not token:
             return jsonify({"status": "error", "message": "Token is missing"}), 401
 
@@ -45,6 +48,17 @@ def token_required(f):
     return decorated
 
 
+def allow_query_token(f):
+    """
+    Let token_required also read the JWT from ``?access_token=``
+
+    Only for streaming endpoints: browsers' EventSource cannot send an
+    Authorization header. Apply it below token_required and role_required.
+    """
+    f.allow_query_token = True
+    return f
+
+
 def role_required(required_role):
     """Decorator to require specific role"""
 
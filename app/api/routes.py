@@ -1,11 +1,27 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.controllers.data_controller import DataController, MachineController
 from app.controllers.auth_controller import AuthController
-from app.api.auth import token_required, role_required
+from app.controllers.stream_controller import StreamController
+from app.api.auth import allow_query_token, token_required, role_required
+from app.utils.columnar import BINARY_MIMETYPE
+from app.utils.metrics import metrics
 
 api_bp = Blueprint("api", __name__)
 
 
+def _stream_response(result, mimetype):
+    """Wrap a controller's (generator, status) result in a streamed response"""
+    response, status_code = result
+    if status_code != 200:
+        return jsonify(response), status_code
+
+    return Response(
+        stream_with_context(response),
+        mimetype=mimetype,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ============ Health Check ============
 @api_bp.route("/health", methods=["GET"])
 def health_check():
@@ -13,6 +29,14 @@ def health_check():
     return jsonify({"status": "healthy dong", "service": "gonsters-backend"}), 200
 
 
+@api_bp.route("/metrics", methods=["GET"])
+@token_required
+@role_required("Management")
+def get_metrics():
+    """Runtime metrics of the serving worker process (Management only)"""
+    return jsonify({"status": "success", "metrics": metrics.snapshot()}), 200
+
+
 # ============ Authentication ============
 @api_bp.route("/auth/register", methods=["POST"])
 def register():
@@ -45,6 +69,31 @@ def ingest_data():
     return jsonify(response), status_code
 
 
+@api_bp.route("/data/ingest/stream", methods=["POST"])
+@token_required
+@role_required("Operator")
+def ingest_data_stream():
+    """Endpoint for streaming NDJSON sensor data ingestion (Operator+)"""
+    response, status_code = DataController.ingest_sensor_stream(
+        request.stream, request.args.get("gateway_id")
+    )
+    return jsonify(response), status_code
+
+
+@api_bp.route("/data/ingest/line-protocol", methods=["POST"])
+@token_required
+@role_required("Operator")
+def ingest_line_protocol():
+    """Endpoint for InfluxDB line protocol ingestion (Operator+)"""
+    response, status_code = DataController.ingest_line_protocol(
+        request.stream,
+        request.headers.get("Content-Encoding"),
+        request.args.get("precision", "ns"),
+        request.current_user.get("role"),
+    )
+    return jsonify(response), status_code
+
+
 @api_bp.route("/data/machine/<int:machine_id>", methods=["GET"])
 @token_required
 @role_required("Operator")
@@ -53,13 +102,74 @@ def get_machine_data(machine_id):
     start_time = request.args.get("start_time")
     end_time = request.args.get("end_time")
     interval = request.args.get("interval", "1h")
+    cursor = request.args.get("cursor")
+
+    if request.args.get("format") == "ndjson":
+        return _stream_response(
+            DataController.stream_machine_data(
+                machine_id, start_time, end_time, interval
+            ),
+            "application/x-ndjson",
+        )
 
     response, status_code = DataController.get_machine_data(
-        machine_id, start_time, end_time, interval
+        machine_id,
+        start_time,
+        end_time,
+        interval,
+        cursor,
+        request.args.get("format", "json"),
+        request.args.get("time_format", "iso"),
+        request.args.get("max_points"),
+        request.args.get("downsample", "lttb"),
+        request.args.get("aggregates"),
+    )
+    if isinstance(response, bytes):
+        return Response(response, status=status_code, mimetype=BINARY_MIMETYPE)
+    return jsonify(response), status_code
+
+
+@api_bp.route("/data/machines", methods=["GET"])
+@token_required
+@role_required("Operator")
+def get_machines_data():
+    """Endpoint for retrieving historical data of several machines (Operator+)"""
+    response, status_code = DataController.get_machines_data(
+        request.args.get("machine_ids"),
+        request.args.get("location"),
+        request.args.get("sensor_type"),
+        request.args.get("start_time"),
+        request.args.get("end_time"),
+        request.args.get("interval", "1h"),
     )
     return jsonify(response), status_code
 
 
+# ============ Live Telemetry Streams ============
+
+
+@api_bp.route("/stream/machine/<int:machine_id>", methods=["GET"])
+@token_required
+@role_required("Operator")
+@allow_query_token
+def stream_machine(machine_id):
+    """Server-Sent Events stream of live data for one machine (Operator+)"""
+    return _stream_response(
+        StreamController.stream_machine(machine_id), "text/event-stream"
+    )
+
+
+@api_bp.route("/stream/factory/<factory_id>", methods=["GET"])
+@token_required
+@role_required("Operator")
+@allow_query_token
+def stream_factory(factory_id):
+    """Server-Sent Events stream of live data for one factory (Operator+)"""
+    return _stream_response(
+        StreamController.stream_factory(factory_id), "text/event-stream"
+    )
+
+
 # ============ Machine Metadata Management ============
 @api_bp.route("/machines", methods=["GET"])
 @token_required
@@ -10,17 +10,118 @@ class Config:
     POSTGRES_USER = os.getenv("POSTGRES_USER", "admin")
     POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password123")
     POSTGRES_DB = os.getenv("POSTGRES_DB", "gonsters_metadata")
+    POSTGRES_POOL_MIN_SIZE = int(os.getenv("POSTGRES_POOL_MIN_SIZE", 1))
+    POSTGRES_POOL_MAX_SIZE = int(os.getenv("POSTGRES_POOL_MAX_SIZE", 10))
+    POSTGRES_POOL_TIMEOUT = float(os.getenv("POSTGRES_POOL_TIMEOUT", 5))
+    POSTGRES_POOL_HEALTH_CHECK_INTERVAL = float(
+        os.getenv("POSTGRES_POOL_HEALTH_CHECK_INTERVAL", 30)
+    )
 
     INFLUXDB_URL = os.getenv("INFLUXDB_URL", "http://influxdb:8086")
     INFLUXDB_TOKEN = os.getenv("INFLUXDB_TOKEN", "my-super-secret-token")
     INFLUXDB_ORG = os.getenv("INFLUXDB_ORG", "myorg")
     INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET", "sensors")
+    INFLUXDB_WRITE_BATCH_SIZE = int(os.getenv("INFLUXDB_WRITE_BATCH_SIZE", 1000))
+    INFLUXDB_WRITE_FLUSH_INTERVAL_MS = int(
+        os.getenv("INFLUXDB_WRITE_FLUSH_INTERVAL_MS", 1000)
+    )
+    INFLUXDB_WRITE_JITTER_MS = int(os.getenv("INFLUXDB_WRITE_JITTER_MS", 0))
+    INFLUXDB_WRITE_RETRY_INTERVAL_MS = int(
+        os.getenv("INFLUXDB_WRITE_RETRY_INTERVAL_MS", 5000)
+    )
+    INFLUXDB_WRITE_MAX_RETRIES = int(os.getenv("INFLUXDB_WRITE_MAX_RETRIES", 5))
+    INFLUXDB_WRITE_MAX_RETRY_DELAY_MS = int(
+        os.getenv("INFLUXDB_WRITE_MAX_RETRY_DELAY_MS", 125000)
+    )
+    INFLUXDB_WRITE_EXPONENTIAL_BASE = int(
+        os.getenv("INFLUXDB_WRITE_EXPONENTIAL_BASE", 2)
+    )
+    INFLUXDB_WRITE_MAX_BUFFER_POINTS = int(
+        os.getenv("INFLUXDB_WRITE_MAX_BUFFER_POINTS", 100000)
+    )
+    INFLUXDB_WRITE_MAX_CLOSE_WAIT_MS = int(
+        os.getenv("INFLUXDB_WRITE_MAX_CLOSE_WAIT_MS", 25000)
+    )
 
     REDIS_HOST = os.getenv("REDIS_HOST", "redis")
     REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+
+    CACHE_L1_ENABLED = os.getenv("CACHE_L1_ENABLED", "true").lower() == "true"
+    CACHE_L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", 1024))
+    CACHE_L1_TTL = float(os.getenv("CACHE_L1_TTL", 5))
+    CACHE_INVALIDATION_CHANNEL = os.getenv(
+        "CACHE_INVALIDATION_CHANNEL", "cache:invalidate"
+    )
+    CACHE_TAG_TTL = int(os.getenv("CACHE_TAG_TTL", 86400))
+    CACHE_CODEC = os.getenv("CACHE_CODEC", "msgpack")
+    CACHE_LOCK_TIMEOUT_MS = int(os.getenv("CACHE_LOCK_TIMEOUT_MS", 10000))
+    CACHE_LOCK_WAIT_TIMEOUT = float(os.getenv("CACHE_LOCK_WAIT_TIMEOUT", 5))
+    CACHE_EARLY_REFRESH_BETA = float(os.getenv("CACHE_EARLY_REFRESH_BETA", 1.0))
+    CACHE_NEGATIVE_TTL = int(os.getenv("CACHE_NEGATIVE_TTL", 30))
+
+    SENSOR_QUERY_CACHE_ENABLED = (
+        os.getenv("SENSOR_QUERY_CACHE_ENABLED", "true").lower() == "true"
+    )
+    SENSOR_QUERY_CACHE_TTL = int(os.getenv("SENSOR_QUERY_CACHE_TTL", 86400))
+    SENSOR_QUERY_CHUNK_BUCKETS = int(os.getenv("SENSOR_QUERY_CHUNK_BUCKETS", 60))
+    SENSOR_QUERY_MAX_CHUNKS = int(os.getenv("SENSOR_QUERY_MAX_CHUNKS", 1000))
+    SENSOR_QUERY_CLOSED_GRACE = int(os.getenv("SENSOR_QUERY_CLOSED_GRACE", 60))
+    SENSOR_QUERY_RECENT_WINDOW = int(os.getenv("SENSOR_QUERY_RECENT_WINDOW", 86400))
+    SENSOR_QUERY_RECENT_TTL = int(os.getenv("SENSOR_QUERY_RECENT_TTL", 300))
+    DATA_BATCH_MAX_MACHINES = int(os.getenv("DATA_BATCH_MAX_MACHINES", 100))
+    INGEST_STREAM_CHUNK_SIZE = int(os.getenv("INGEST_STREAM_CHUNK_SIZE", 5000))
+    INGEST_STREAM_MAX_LINE_BYTES = int(os.getenv("INGEST_STREAM_MAX_LINE_BYTES", 4096))
+    INGEST_STREAM_MAX_ERRORS = int(os.getenv("INGEST_STREAM_MAX_ERRORS", 100))
+    LINE_PROTOCOL_MAX_BYTES = int(
+        os.getenv("LINE_PROTOCOL_MAX_BYTES", 32 * 1024 * 1024)
+    )
+    LINE_PROTOCOL_CHUNK_BYTES = int(os.getenv("LINE_PROTOCOL_CHUNK_BYTES", 1024 * 1024))
+    LINE_PROTOCOL_ROLE_LIMITS = os.getenv(
+        "LINE_PROTOCOL_ROLE_LIMITS",
+        "Operator:10000,Supervisor:100000,Management:1000000",
+    )
+    QUERY_PARALLELISM = int(os.getenv("QUERY_PARALLELISM", 4))
+    QUERY_PARALLEL_MIN_SPAN = os.getenv("QUERY_PARALLEL_MIN_SPAN", "1d")
+    INFLUXDB_QUERY_DECODER = os.getenv("INFLUXDB_QUERY_DECODER", "csv")
+
+    ROLLUP_ENABLED = os.getenv("ROLLUP_ENABLED", "false").lower() == "true"
+    ROLLUP_TIERS = os.getenv("ROLLUP_TIERS", "1m:30d,1h:730d,1d:inf")
+    ROLLUP_LAG_SECONDS = int(os.getenv("ROLLUP_LAG_SECONDS", 300))
+    ROLLUP_TASK_LOOKBACK_WINDOWS = int(os.getenv("ROLLUP_TASK_LOOKBACK_WINDOWS", 3))
+    ROLLUP_START = os.getenv("ROLLUP_START", "")
 
     MQTT_BROKER = os.getenv("MQTT_BROKER", "mosquitto")
     MQTT_PORT = int(os.getenv("MQTT_PORT", 1883))
+    MQTT_TOPIC = os.getenv("MQTT_TOPIC", "factory/+/machine/+/telemetry")
+    MQTT_PROTOCOL = os.getenv("MQTT_PROTOCOL", "5")
+    MQTT_CLIENT_ID = os.getenv("MQTT_CLIENT_ID", "")
+    MQTT_SHARED_GROUP = os.getenv("MQTT_SHARED_GROUP", "")
+    MQTT_QUEUE_SIZE = int(os.getenv("MQTT_QUEUE_SIZE", 10000))
+    MQTT_WORKERS = int(os.getenv("MQTT_WORKERS", 2))
+    MQTT_BATCH_SIZE = int(os.getenv("MQTT_BATCH_SIZE", 500))
+    MQTT_BATCH_INTERVAL_MS = int(os.getenv("MQTT_BATCH_INTERVAL_MS", 500))
+    MQTT_BACKPRESSURE_POLICY = os.getenv("MQTT_BACKPRESSURE_POLICY", "block")
+    MQTT_BLOCK_TIMEOUT = float(os.getenv("MQTT_BLOCK_TIMEOUT", 5))
+    MQTT_SPILL_DIR = os.getenv("MQTT_SPILL_DIR", "/tmp/gonsters/mqtt-spill")
+    MQTT_SPILL_MAX_BYTES = int(os.getenv("MQTT_SPILL_MAX_BYTES", 1024 * 1024 * 1024))
+    INGEST_METRICS_LOG_INTERVAL = float(os.getenv("INGEST_METRICS_LOG_INTERVAL", 60))
+
+    WRITE_SPOOL_ENABLED = os.getenv("WRITE_SPOOL_ENABLED", "true").lower() == "true"
+    WRITE_SPOOL_DIR = os.getenv("WRITE_SPOOL_DIR", "/tmp/gonsters/write-spool")
+    WRITE_SPOOL_SEGMENT_BYTES = int(
+        os.getenv("WRITE_SPOOL_SEGMENT_BYTES", 64 * 1024 * 1024)
+    )
+    WRITE_SPOOL_MAX_BYTES = int(os.getenv("WRITE_SPOOL_MAX_BYTES", 1024 * 1024 * 1024))
+    WRITE_SPOOL_REPLAY_RATE = int(os.getenv("WRITE_SPOOL_REPLAY_RATE", 20000))
+    WRITE_SPOOL_RETRY_SECONDS = float(os.getenv("WRITE_SPOOL_RETRY_SECONDS", 10))
+    WRITE_SPOOL_FSYNC = os.getenv("WRITE_SPOOL_FSYNC", "false").lower() == "true"
+
+    TELEMETRY_CHANNEL = os.getenv("TELEMETRY_CHANNEL", "telemetry:live")
+    TELEMETRY_QUEUE_SIZE = int(os.getenv("TELEMETRY_QUEUE_SIZE", 256))
+    TELEMETRY_MAX_SUBSCRIBERS = int(os.getenv("TELEMETRY_MAX_SUBSCRIBERS", 24))
+    TELEMETRY_HEARTBEAT_SECONDS = float(os.getenv("TELEMETRY_HEARTBEAT_SECONDS", 15))
+    TELEMETRY_STREAM_MAX_SECONDS = int(os.getenv("TELEMETRY_STREAM_MAX_SECONDS", 600))
 
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change-this-secret-key")
     JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
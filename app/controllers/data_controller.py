@@ -1,7 +1,26 @@
+import json
+from datetime import timedelta
 from marshmallow import ValidationError
-from app.models.schemas import SensorDataIngestSchema, MachineMetadataSchema
+from app.config import config
+from app.models.schemas import MachineMetadataSchema
+from app.models.validators import sensor_data_validator
 from app.repositories.machine_repository import MachineRepository, SensorDataRepository
+from app.services.influx_writer_service import WriteBufferFullError
+from app.utils.columnar import pack_series, to_columnar
+from app.utils.cursor import InvalidCursorError, decode_cursor, encode_cursor
+from app.utils.downsampling import DOWNSAMPLING_METHODS, downsample_rows
+from app.utils import line_protocol
 from app.utils.logger import logger
+from app.utils.time_utils import (
+    floor_time,
+    parse_duration,
+    parse_time,
+    to_rfc3339,
+    utcnow,
+)
+
+NDJSON_CHUNK_ROWS = 500
+RESPONSE_FORMATS = ("json", "columnar", "binary")
 
 
 class DataController:
@@ -15,8 +34,7 @@ class DataController:
         """
         try:
 
-            schema = SensorDataIngestSchema()
-            validated_data = schema.load(request_data)
+            validated_data = sensor_data_validator.validate_ingest(request_data)
 
             logger.info(
                 "Data ingestion request received",
@@ -51,11 +69,242 @@ class DataController:
             return {"status": "error", "message": "Internal server error"}, 500
 
     @staticmethod
-    def get_machine_data(machine_id, start_time, end_time, interval="1h"):
+    def ingest_sensor_stream(stream, gateway_id):
         """
-        Retrieve historical machine data
+        Handle NDJSON sensor data ingestion, one data point per line
+
+        The body is read line by line and each line validated on its own;
+        valid points are written in chunks of INGEST_STREAM_CHUNK_SIZE, so
+        memory stays bounded for any upload size. Invalid lines are reported
+        by line number without rejecting the rest of the upload.
+
+        Args:
+            stream: Binary file-like object with readline(), e.g. request.stream
+            gateway_id: ID of the sending gateway
         Returns: (response_dict, status_code)
         """
+        if not gateway_id:
+            return {"status": "error", "message": "gateway_id is required"}, 400
+
+        max_line = config.INGEST_STREAM_MAX_LINE_BYTES
+        chunk = []
+        errors = []
+        accepted = rejected = line_number = written_line = 0
+
+        def reject(number, messages):
+            nonlocal rejected
+            rejected += 1
+            if len(errors) < config.INGEST_STREAM_MAX_ERRORS:
+                errors.append({"line": number, "errors": messages})
+
+        try:
+            while True:
+                line = stream.readline(max_line + 1)
+                if not line:
+                    break
+                line_number += 1
+
+                if len(line) > max_line and not line.endswith(b"\n"):
+                    # Skip the rest of the oversized line
+                    while line and not line.endswith(b"\n"):
+                        line = stream.readline(max_line + 1)
+                    reject(line_number, [f"Line exceeds {max_line} bytes"])
+                    continue
+                if not line.strip():
+                    continue
+
+                try:
+                    chunk.append(sensor_data_validator.validate_point(json.loads(line)))
+                except ValidationError as e:
+                    reject(line_number, e.messages)
+                    continue
+                except ValueError:
+                    reject(line_number, ["Invalid JSON"])
+                    continue
+
+                if len(chunk) >= config.INGEST_STREAM_CHUNK_SIZE:
+                    SensorDataRepository.write_sensor_data(chunk)
+                    accepted += len(chunk)
+                    written_line = line_number
+                    chunk = []
+
+            if chunk:
+                SensorDataRepository.write_sensor_data(chunk)
+                accepted += len(chunk)
+
+        except WriteBufferFullError as e:
+            # Lines up to the last written chunk are queued; the gateway
+            # resends from resume_line onward
+            logger.warning(
+                f"Streaming ingestion stopped: {e}",
+                extra={"extra_data": {"gateway_id": gateway_id, "accepted": accepted}},
+            )
+            return {
+                "status": "error",
+                "message": "Write buffer full, retry later",
+                "gateway_id": gateway_id,
+                "accepted": accepted,
+                "resume_line": written_line + 1,
+            }, 503
+
+        except Exception as e:
+            logger.error(
+                f"Error ingesting data stream: {e}",
+                extra={"extra_data": {"error_type": type(e).__name__}},
+            )
+            return {"status": "error", "message": "Internal server error"}, 500
+
+        logger.info(
+            "Streaming data ingestion completed",
+            extra={
+                "extra_data": {
+                    "gateway_id": gateway_id,
+                    "accepted": accepted,
+                    "rejected": rejected,
+                }
+            },
+        )
+
+        if not accepted:
+            return {
+                "status": "error",
+                "message": "No valid data points",
+                "gateway_id": gateway_id,
+                "rejected": rejected,
+                "errors": errors,
+            }, 400
+
+        return {
+            "status": "partial" if rejected else "success",
+            "message": f"Ingested {accepted} data points",
+            "gateway_id": gateway_id,
+            "accepted": accepted,
+            "rejected": rejected,
+            "errors": errors,
+            "errors_truncated": rejected > len(errors),
+        }, 201
+
+    @staticmethod
+    def ingest_line_protocol(stream, content_encoding, precision, role):
+        """
+        Handle InfluxDB line protocol ingestion, passed through as bytes
+
+        The body (optionally gzip-compressed) must contain only sensor_data
+        points with the machine_id, sensor_type and unit tags and a float
+        value field. It is checked in one regex pass, limited to the role's
+        LINE_PROTOCOL_ROLE_LIMITS point count and handed to the writer in
+        line-aligned chunks of LINE_PROTOCOL_CHUNK_BYTES.
+
+        Args:
+            stream: Binary file-like request body
+            content_encoding: Content-Encoding header ("gzip" or none)
+            precision: Timestamp precision (ns, us, ms or s)
+            role: Role of the authenticated user
+        Returns: (response_dict, status_code)
+        """
+        max_bytes = config.LINE_PROTOCOL_MAX_BYTES
+        accepted = 0
+        try:
+            if precision not in line_protocol.WRITE_PRECISIONS:
+                return {
+                    "status": "error",
+                    "message": f"precision must be one of: {', '.join(line_protocol.WRITE_PRECISIONS)}",
+                }, 400
+            if content_encoding not in (None, "", "identity", "gzip"):
+                return {
+                    "status": "error",
+                    "message": "Content-Encoding must be gzip or identity",
+                }, 415
+
+            body = stream.read(max_bytes + 1)
+            if len(body) > max_bytes:
+                return {
+                    "status": "error",
+                    "message": f"Body exceeds {max_bytes} bytes",
+                }, 413
+            if content_encoding == "gzip":
+                body = line_protocol.decompress(body, max_bytes)
+
+            count = line_protocol.validate(body, precision)
+            limit = line_protocol.parse_role_limits(
+                config.LINE_PROTOCOL_ROLE_LIMITS
+            ).get(role, 0)
+            if count > limit:
+                return {
+                    "status": "error",
+                    "message": f"{count} points exceed the limit of {limit} for role {role}",
+                }, 413
+
+            for chunk, lines in line_protocol.split_chunks(
+                body, config.LINE_PROTOCOL_CHUNK_BYTES
+            ):
+                SensorDataRepository.write_line_protocol(chunk, lines, precision)
+                accepted += lines
+
+            return {
+                "status": "success",
+                "message": f"Ingested {accepted} data points",
+                "accepted": accepted,
+            }, 201
+
+        except line_protocol.LineProtocolError as e:
+            response = {"status": "error", "message": str(e)}
+            if e.errors:
+                response["errors"] = e.errors
+            return response, e.status_code
+
+        except WriteBufferFullError as e:
+            logger.warning(
+                f"Line protocol ingestion stopped: {e}",
+                extra={"extra_data": {"accepted": accepted}},
+            )
+            return {
+                "status": "error",
+                "message": "Write buffer full, retry later",
+                "accepted": accepted,
+                "resume_line": accepted + 1,
+            }, 503
+
+        except Exception as e:
+            logger.error(
+                f"Error ingesting line protocol: {e}",
+                extra={"extra_data": {"error_type": type(e).__name__}},
+            )
+            return {"status": "error", "message": "Internal server error"}, 500
+
+    @staticmethod
+    def get_machine_data(
+        machine_id,
+        start_time,
+        end_time,
+        interval="1h",
+        cursor=None,
+        response_format="json",
+        time_format="iso",
+        max_points=None,
+        downsample="lttb",
+        aggregates=None,
+    ):
+        """
+        Retrieve historical machine data
+
+        With ``cursor`` (the ``next_cursor`` of a previous response) only
+        buckets from the cursor's boundary onward are returned; the client
+        replaces its buckets after ``since`` with the new ones.
+
+        ``response_format`` "columnar" returns ``series`` (metadata once,
+        parallel time/value arrays; ``time_format`` "epoch_ms" for integer
+        times) instead of ``data``; "binary" returns the same packed with
+        pack_series as bytes.
+
+        ``max_points`` caps every series at that many points, selected with
+        ``downsample`` ("lttb" or the "minmax" envelope).
+
+        ``aggregates`` (e.g. "min,max,mean,p95") computes several aggregates
+        in one query; each row, or each columnar series, carries one value
+        per aggregate instead of ``value``.
+        Returns: (response_dict | bytes, status_code)
+        """
         try:
 
             if not start_time or not end_time:
@@ -64,6 +313,49 @@ class DataController:
                     "message": "start_time and end_time are required",
                 }, 400
 
+            if response_format not in RESPONSE_FORMATS:
+                return {
+                    "status": "error",
+                    "message": f"format must be one of: {', '.join(RESPONSE_FORMATS)}",
+                }, 400
+            if time_format not in ("iso", "epoch_ms"):
+                return {
+                    "status": "error",
+                    "message": "time_format must be iso or epoch_ms",
+                }, 400
+
+            if max_points is not None:
+                try:
+                    max_points = int(max_points)
+                except (TypeError, ValueError):
+                    max_points = 0
+                if max_points < 3:
+                    return {
+                        "status": "error",
+                        "message": "max_points must be an integer of at least 3",
+                    }, 400
+                if downsample not in DOWNSAMPLING_METHODS:
+                    return {
+                        "status": "error",
+                        "message": f"downsample must be one of: {', '.join(DOWNSAMPLING_METHODS)}",
+                    }, 400
+                if downsample == "minmax" and max_points < 4:
+                    return {
+                        "status": "error",
+                        "message": "max_points must be at least 4 for minmax",
+                    }, 400
+
+            if aggregates is not None:
+                try:
+                    aggregates = SensorDataRepository.parse_aggregates(aggregates)
+                except ValueError as e:
+                    return {"status": "error", "message": str(e)}, 400
+                if max_points is not None or response_format == "binary":
+                    return {
+                        "status": "error",
+                        "message": "aggregates cannot be combined with max_points or binary format",
+                    }, 400
+
             machine = MachineRepository.get_machine_by_id(machine_id)
             if not machine:
                 return {
@@ -82,20 +374,79 @@ class DataController:
                 },
             )
 
-            data = SensorDataRepository.query_sensor_data(
-                machine_id, start_time, end_time, interval
-            )
-
-            return {
+            now = utcnow()
+            try:
+                start = parse_time(start_time, now)
+                stop = parse_time(end_time, now)
+                every = parse_duration(interval)
+            except ValueError:
+                start = stop = every = None
+
+            since = None
+            if cursor:
+                try:
+                    since = decode_cursor(cursor, machine_id, interval)
+                except InvalidCursorError as e:
+                    return {"status": "error", "message": str(e)}, 400
+                if start is None or since <= start:
+                    since = None
+
+            query_start = to_rfc3339(since) if since else start_time
+            if since is not None and since >= stop:
+                # Nothing after the cursor within the range; Flux rejects
+                # a range whose start is after its stop
+                data = []
+            elif aggregates is not None:
+                data = SensorDataRepository.query_sensor_aggregates(
+                    machine_id, query_start, end_time, interval, aggregates
+                )
+            else:
+                data = SensorDataRepository.query_sensor_data(
+                    machine_id, query_start, end_time, interval
+                )
+
+            next_cursor = None
+            if start is not None:
+                # Buckets within the closed-bucket grace period may still
+                # change, so the next poll starts from the oldest of those
+                grace = timedelta(seconds=config.SENSOR_QUERY_CLOSED_GRACE)
+                boundary = floor_time(min(stop, now) - grace, every)
+                next_cursor = encode_cursor(machine_id, interval, max(boundary, start))
+
+            source_points = len(data)
+            if max_points is not None:
+                data = downsample_rows(data, max_points, downsample)
+
+            response = {
                 "status": "success",
                 "machine_id": machine_id,
                 "machine_name": machine["name"],
                 "start_time": start_time,
                 "end_time": end_time,
                 "interval": interval,
+                "since": to_rfc3339(since) if since else None,
+                "next_cursor": next_cursor,
                 "data_points": len(data),
-                "data": data,
-            }, 200
+            }
+            if aggregates is not None:
+                response["aggregates"] = aggregates
+            if max_points is not None:
+                response["downsampling"] = {
+                    "method": downsample,
+                    "max_points": max_points,
+                    "source_points": source_points,
+                }
+            if response_format == "binary":
+                return pack_series(response, data), 200
+            if response_format == "columnar":
+                response["series"] = to_columnar(
+                    data,
+                    epoch_ms=time_format == "epoch_ms",
+                    columns=aggregates or ("value",),
+                )
+            else:
+                response["data"] = data
+            return response, 200
 
         except Exception as e:
             logger.error(
@@ -104,6 +455,167 @@ class DataController:
             )
             return {"status": "error", "message": "Internal server error"}, 500
 
+    @staticmethod
+    def stream_machine_data(machine_id, start_time, end_time, interval="1h"):
+        """
+        Retrieve historical machine data as NDJSON, one row per line
+
+        Rows are written as InfluxDB returns them, a few hundred lines per
+        chunk, so memory does not grow with the size of the range.
+        Returns: (line_generator | response_dict, status_code)
+        """
+        try:
+            if not start_time or not end_time:
+                return {
+                    "status": "error",
+                    "message": "start_time and end_time are required",
+                }, 400
+
+            machine = MachineRepository.get_machine_by_id(machine_id)
+            if not machine:
+                return {
+                    "status": "error",
+                    "message": f"Machine with ID {machine_id} not found",
+                }, 404
+
+        except Exception as e:
+            logger.error(f"Error retrieving machine data: {e}")
+            return {"status": "error", "message": "Internal server error"}, 500
+
+        logger.info(
+            f"Streaming data retrieval request for machine {machine_id}",
+            extra={
+                "extra_data": {
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "interval": interval,
+                }
+            },
+        )
+
+        def lines():
+            chunk = []
+            try:
+                for row in SensorDataRepository.stream_sensor_data(
+                    machine_id, start_time, end_time, interval
+                ):
+                    chunk.append(json.dumps(row))
+                    if len(chunk) >= NDJSON_CHUNK_ROWS:
+                        yield "\n".join(chunk) + "\n"
+                        chunk = []
+            except Exception as e:
+                # Headers are already sent, so report the failure in-band
+                logger.error(
+                    f"Error streaming machine data: {e}",
+                    extra={"extra_data": {"error_type": type(e).__name__}},
+                )
+                chunk.append(
+                    json.dumps({"status": "error", "message": "Internal server error"})
+                )
+            if chunk:
+                yield "\n".join(chunk) + "\n"
+
+        return lines(), 200
+
+    @staticmethod
+    def get_machines_data(
+        machine_ids, location, sensor_type, start_time, end_time, interval="1h"
+    ):
+        """
+        Retrieve historical data for several machines at once
+
+        Machines are selected by a comma-separated ID list and/or by
+        location and sensor type. Metadata is read in one query and sensor
+        data in one Flux query, keyed by machine ID in the response.
+        Returns: (response_dict, status_code)
+        """
+        try:
+            if not start_time or not end_time:
+                return {
+                    "status": "error",
+                    "message": "start_time and end_time are required",
+                }, 400
+
+            if not (machine_ids or location or sensor_type):
+                return {
+                    "status": "error",
+                    "message": "machine_ids, location or sensor_type is required",
+                }, 400
+
+            ids = None
+            if machine_ids:
+                try:
+                    ids = [int(value) for value in machine_ids.split(",") if value]
+                except ValueError:
+                    return {
+                        "status": "error",
+                        "message": "machine_ids must be comma-separated integers",
+                    }, 400
+
+            max_machines = config.DATA_BATCH_MAX_MACHINES
+            if ids is not None and len(set(ids)) > max_machines:
+                return {
+                    "status": "error",
+                    "message": f"At most {max_machines} machines per request",
+                }, 400
+
+            machines = MachineRepository.find_machines(
+                machine_ids=ids,
+                location=location,
+                sensor_type=sensor_type,
+                limit=max_machines + 1,
+            )
+            if len(machines) > max_machines:
+                return {
+                    "status": "error",
+                    "message": f"Selector matches more than {max_machines} machines",
+                }, 400
+
+            logger.info(
+                f"Batch data retrieval request for {len(machines)} machines",
+                extra={
+                    "extra_data": {
+                        "machine_ids": machine_ids,
+                        "location": location,
+                        "sensor_type": sensor_type,
+                        "start_time": start_time,
+                        "end_time": end_time,
+                        "interval": interval,
+                    }
+                },
+            )
+
+            data = SensorDataRepository.query_sensor_data_batch(
+                [machine["id"] for machine in machines], start_time, end_time, interval
+            )
+
+            found_ids = {machine["id"] for machine in machines}
+            return {
+                "status": "success",
+                "start_time": start_time,
+                "end_time": end_time,
+                "interval": interval,
+                "machine_count": len(machines),
+                "missing_machine_ids": sorted(set(ids or []) - found_ids),
+                "machines": {
+                    str(machine["id"]): {
+                        "machine_name": machine["name"],
+                        "location": machine["location"],
+                        "sensor_type": machine["sensor_type"],
+                        "data_points": len(data.get(str(machine["id"]), [])),
+                        "data": data.get(str(machine["id"]), []),
+                    }
+                    for machine in machines
+                },
+            }, 200
+
+        except Exception as e:
+            logger.error(
+                f"Error retrieving batch machine data: {e}",
+                extra={"extra_data": {"error_type": type(e).__name__}},
+            )
+            return {"status": "error", "message": "Internal server error"}, 500
+
 
 class MachineController:
     """Controller for machine metadata operations"""
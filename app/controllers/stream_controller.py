@@ -0,0 +1,85 @@
+import json
+import re
+import time
+from app.config import config
+from app.repositories.machine_repository import MachineRepository
+from app.services.telemetry_hub import EVICTED, telemetry_hub
+from app.utils.logger import logger
+
+FACTORY_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+class StreamController:
+    """Controller for live telemetry streams (Server-Sent Events)"""
+
+    @staticmethod
+    def stream_machine(machine_id):
+        """
+        Open a live stream for one machine
+        Returns: (event_generator | response_dict, status_code)
+        """
+        try:
+            machine = MachineRepository.get_machine_by_id(machine_id)
+            if not machine:
+                return {
+                    "status": "error",
+                    "message": f"Machine with ID {machine_id} not found",
+                }, 404
+        except Exception as e:
+            logger.error(f"Error opening machine stream: {e}")
+            return {"status": "error", "message": "Internal server error"}, 500
+
+        return StreamController._open(machine_id=machine_id)
+
+    @staticmethod
+    def stream_factory(factory_id):
+        """
+        Open a live stream for every machine of one factory
+        Returns: (event_generator | response_dict, status_code)
+        """
+        if not FACTORY_ID_PATTERN.match(factory_id):
+            return {"status": "error", "message": "Invalid factory ID"}, 400
+
+        return StreamController._open(factory_id=factory_id)
+
+    @staticmethod
+    def _open(machine_id=None, factory_id=None):
+        try:
+            subscription = telemetry_hub.subscribe(
+                machine_id=machine_id, factory_id=factory_id
+            )
+        except OverflowError as e:
+            return {"status": "error", "message": str(e)}, 503
+        except Exception as e:
+            logger.error(f"Error subscribing to live telemetry: {e}")
+            return {"status": "error", "message": "Internal server error"}, 500
+
+        logger.info(
+            "Live telemetry stream opened",
+            extra={"extra_data": {"machine_id": machine_id, "factory_id": factory_id}},
+        )
+        return StreamController._events(subscription), 200
+
+    @staticmethod
+    def _events(subscription):
+        """
+        Yield SSE frames until the stream's lifetime ends or it is evicted
+
+        Streams are closed after TELEMETRY_STREAM_MAX_SECONDS so worker
+        threads are recycled; EventSource reconnects on its own.
+        """
+        deadline = time.monotonic() + config.TELEMETRY_STREAM_MAX_SECONDS
+        try:
+            yield "retry: 3000\n\n"
+            while time.monotonic() < deadline:
+                item = subscription.get(timeout=config.TELEMETRY_HEARTBEAT_SECONDS)
+                if item is None:
+                    # Comment frame, also detects disconnected clients
+                    yield ": keepalive\n\n"
+                elif item is EVICTED:
+                    yield 'event: evicted\ndata: {"reason": "slow consumer"}\n\n'
+                    return
+                else:
+                    yield f"event: telemetry\ndata: {json.dumps(item)}\n\n"
+        finally:
+            telemetry_hub.unsubscribe(subscription)
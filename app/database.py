@@ -1,8 +1,15 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 from psycopg2.extras import RealDictCursor
 from influxdb_client import InfluxDBClient
 import redis
 from app.config import config
+from app.utils.logger import logger
+from app.utils.metrics import metrics
 
 
 def get_postgres_connection():
@@ -22,6 +29,240 @@ def get_postgres_connection():
         raise
 
 
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class PostgresConnectionPool:
+    """
+    Thread-safe, fork-aware PostgreSQL connection pool
+
+    Connections are created lazily up to ``max_size``. Checkouts block for up
+    to ``timeout`` seconds when the pool is exhausted. Connections idle for
+    longer than ``health_check_interval`` seconds are verified with
+    ``SELECT 1`` before being handed out.
+    """
+
+    def __init__(self, min_size=1, max_size=10, timeout=5.0, health_check_interval=30):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size configuration")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._reset_state()
+        os.register_at_fork(after_in_child=self._reset_state)
+
+    def _reset_state(self):
+        """
+        Start from an empty pool
+
+        Called again in forked children: inherited connections share their
+        socket with the parent, so they are dropped without being closed.
+        """
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._reset_state()
+
+    def _is_healthy(self, conn, last_used):
+        """Check that an idle connection is still usable"""
+        if conn.closed:
+            return False
+
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            metrics.increment("postgres.pool.health_check_failures")
+            return False
+
+    def getconn(self, timeout=None):
+        """
+        Check out a connection
+
+        Args:
+            timeout: Seconds to wait for a free connection (default: pool timeout)
+
+        Raises:
+            PoolTimeoutError: If the pool stays exhausted for the whole timeout
+        """
+        self._check_pid()
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.increment("postgres.pool.checkout_timeouts")
+                    raise PoolTimeoutError(
+                        f"No PostgreSQL connection available after {timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+        if conn is not None and not self._is_healthy(conn, last_used):
+            self._close_quietly(conn)
+            conn = None
+
+        if conn is None:
+            try:
+                conn = get_postgres_connection()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        metrics.observe(
+            "postgres.pool.checkout_wait_seconds", time.monotonic() - started
+        )
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, closing it if it is no longer usable"""
+        if self._pid != os.getpid():
+            # Checked out before a fork; it belongs to the parent's pool.
+            return
+
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        with self._cond:
+            if discard or conn.closed:
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Context manager yielding a pooled connection
+
+        Usage:
+            with pool.connection() as conn:
+                ...
+
+        Uncommitted work is rolled back when the block exits. Connections that
+        raised an operational error are discarded instead of being reused.
+        """
+        conn = self.getconn(timeout)
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def warm(self):
+        """Open connections until ``min_size`` are idle"""
+        self._check_pid()
+        conns = []
+        try:
+            while self.stats()["size"] < self.min_size:
+                conns.append(self.getconn())
+        finally:
+            for conn in conns:
+                self.putconn(conn)
+
+        logger.info(f"PostgreSQL pool warmed with {len(conns)} connections")
+
+    def closeall(self):
+        """Close every idle connection"""
+        with self._cond:
+            for conn, _ in self._idle:
+                self._close_quietly(conn)
+            self._size -= len(self._idle)
+            self._idle = []
+
+    def stats(self) -> dict:
+        """Return current pool size figures"""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "max_size": self.max_size,
+            }
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_postgres_pool = None
+_postgres_pool_lock = threading.Lock()
+
+
+def get_postgres_pool():
+    """Get the process-wide PostgreSQL connection pool"""
+    global _postgres_pool
+    if _postgres_pool is None:
+        with _postgres_pool_lock:
+            if _postgres_pool is None:
+                pool = PostgresConnectionPool(
+                    min_size=config.POSTGRES_POOL_MIN_SIZE,
+                    max_size=config.POSTGRES_POOL_MAX_SIZE,
+                    timeout=config.POSTGRES_POOL_TIMEOUT,
+                    health_check_interval=config.POSTGRES_POOL_HEALTH_CHECK_INTERVAL,
+                )
+                metrics.register_gauge(
+                    "postgres.pool.size", lambda: pool.stats()["size"]
+                )
+                metrics.register_gauge(
+                    "postgres.pool.in_use", lambda: pool.stats()["in_use"]
+                )
+                metrics.register_gauge(
+                    "postgres.pool.idle", lambda: pool.stats()["idle"]
+                )
+                _postgres_pool = pool
+    return _postgres_pool
+
+
+def postgres_connection(timeout=None):
+    """
+    Check out a pooled PostgreSQL connection
+
+    Usage:
+        with postgres_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(...)
+    """
+    return get_postgres_pool().connection(timeout)
+
+
 def get_influxdb_client():
     """Create InfluxDB client"""
     try:
@@ -36,11 +277,46 @@ def get_influxdb_client():
         raise
 
 
-def get_redis_client():
+_shared_influxdb_client = None
+_shared_influxdb_pid = None
+_shared_influxdb_lock = threading.Lock()
+
+
+def get_shared_influxdb_client():
+    """
+    Get the process-wide InfluxDB client
+
+    The client owns an HTTP connection pool, so it is created once per
+    process (and again after a fork) instead of per request. Callers must
+    not close it.
+    """
+    global _shared_influxdb_client, _shared_influxdb_pid
+    pid = os.getpid()
+    if _shared_influxdb_client is None or _shared_influxdb_pid != pid:
+        with _shared_influxdb_lock:
+            if _shared_influxdb_client is None or _shared_influxdb_pid != pid:
+                _shared_influxdb_client = get_influxdb_client()
+                _shared_influxdb_pid = pid
+    return _shared_influxdb_client
+
+
+def _reinit_locks():
+    global _postgres_pool_lock, _shared_influxdb_lock
+    _postgres_pool_lock = threading.Lock()
+    _shared_influxdb_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reinit_locks)
+
+
+def get_redis_client(decode_responses=True):
     """Create Redis client"""
     try:
         client = redis.Redis(
-            host=config.REDIS_HOST, port=config.REDIS_PORT, decode_responses=True
+            host=config.REDIS_HOST,
+            port=config.REDIS_PORT,
+            decode_responses=decode_responses,
+            max_connections=config.REDIS_MAX_CONNECTIONS,
         )
         client.ping()
         return client
@@ -0,0 +1,314 @@
+import math
+import re
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from marshmallow import RAISE, Schema, ValidationError, fields, validate
+from app.utils.time_utils import (
+    EPOCH,
+    EPOCH_NS_MAX,
+    EPOCH_NS_MIN,
+    datetime_to_epoch_ns,
+    epoch_to_ns,
+    iso_to_epoch_ns,
+)
+
+# Error messages are taken from marshmallow itself so both validators report
+# exactly the same text
+MESSAGES = {
+    "type": Schema._default_error_messages["type"],
+    "unknown": Schema._default_error_messages["unknown"],
+    "required": fields.Field.default_error_messages["required"],
+    "null": fields.Field.default_error_messages["null"],
+    "integer": fields.Integer.default_error_messages["invalid"],
+    "number": fields.Number.default_error_messages["invalid"],
+    "too_large": fields.Number.default_error_messages["too_large"],
+    "special": fields.Float.default_error_messages["special"],
+    "string": fields.String.default_error_messages["invalid"],
+    "invalid_utf8": fields.String.default_error_messages["invalid_utf8"],
+    "datetime": fields.DateTime.default_error_messages["invalid"].format(
+        obj_type="datetime"
+    ),
+    "list": fields.List.default_error_messages["invalid"],
+    "too_short": validate.Length.message_min.format(min=1),
+}
+
+# Same grammar as marshmallow's ISO 8601 parser
+ISO_DATETIME_PATTERN = re.compile(
+    r"(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})"
+    r"[T ](?P<hour>\d{1,2}):(?P<minute>\d{1,2})"
+    r"(?::(?P<second>\d{1,2})(?:\.(?P<microsecond>\d{1,6})\d{0,6})?)?"
+    r"(?P<tzinfo>Z|[+-]\d{2}(?::?\d{2})?)?$"
+)
+
+_MISSING = object()
+
+
+class _Invalid(Exception):
+    def __init__(self, key):
+        super().__init__(key)
+        self.message = MESSAGES[key]
+
+
+def _integer(value):
+    if value is True or value is False:
+        raise _Invalid("integer")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise _Invalid("integer")
+    except OverflowError:
+        raise _Invalid("too_large")
+
+
+def _number(value):
+    if value is True or value is False:
+        raise _Invalid("number")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise _Invalid("number")
+    except OverflowError:
+        raise _Invalid("too_large")
+
+
+def _string(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        try:
+            return value.decode("utf-8")
+        except UnicodeDecodeError:
+            raise _Invalid("invalid_utf8")
+    raise _Invalid("string")
+
+
+def _fixed_timezone(offset: str):
+    minutes = 60 * int(offset[1:3]) + (int(offset[-2:]) if len(offset) > 3 else 0)
+    return timezone(timedelta(minutes=-minutes if offset[0] == "-" else minutes))
+
+
+def parse_iso_datetime(value: str) -> datetime:
+    """
+    Parse an ISO 8601 string accepted by marshmallow's DateTime field
+
+    The precompiled pattern decides what is valid; datetime.fromisoformat
+    builds the result in C, with a group-by-group fallback for the forms it
+    does not read (single-digit fields, a trailing newline).
+
+    Raises:
+        ValueError: For strings marshmallow would reject
+    """
+    match = ISO_DATETIME_PATTERN.match(value)
+    if not match:
+        raise ValueError("Not a valid ISO8601-formatted datetime string")
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+
+    parts = match.groupdict()
+    tzinfo = parts.pop("tzinfo")
+    if parts["microsecond"]:
+        parts["microsecond"] = parts["microsecond"].ljust(6, "0")
+    result = datetime(**{key: int(part) for key, part in parts.items() if part})
+    if tzinfo == "Z":
+        return result.replace(tzinfo=timezone.utc)
+    if tzinfo:
+        return result.replace(tzinfo=_fixed_timezone(tzinfo))
+    return result
+
+
+def epoch_to_datetime(value) -> datetime:
+    """
+    Convert an epoch timestamp to an aware UTC datetime
+
+    The unit follows the magnitude: seconds below 1e11, milliseconds below
+    1e14, microseconds below 1e17, nanoseconds otherwise.
+    """
+    return EPOCH + timedelta(microseconds=epoch_to_ns(value) // 1000)
+
+
+def _timestamp(value):
+    # Falsy values ('', 0, []) are invalid, as in marshmallow
+    if not value or value is True:
+        raise _Invalid("datetime")
+    try:
+        if isinstance(value, str):
+            return parse_iso_datetime(value)
+        if isinstance(value, (int, float)):
+            return epoch_to_datetime(value)
+    except (ValueError, OverflowError):
+        pass
+    raise _Invalid("datetime")
+
+
+def _timestamp_ns(value):
+    # Accepts the same values as _timestamp, as integer epoch nanoseconds
+    if not value or value is True:
+        raise _Invalid("datetime")
+    try:
+        if isinstance(value, str):
+            epoch_ns = iso_to_epoch_ns(value)
+            if epoch_ns is None:
+                epoch_ns = datetime_to_epoch_ns(parse_iso_datetime(value))
+        elif isinstance(value, (int, float)):
+            epoch_ns = epoch_to_ns(value)
+        else:
+            raise _Invalid("datetime")
+        if EPOCH_NS_MIN <= epoch_ns <= EPOCH_NS_MAX:
+            return epoch_ns
+    except (ValueError, OverflowError):
+        pass
+    raise _Invalid("datetime")
+
+
+class SensorDataValidator:
+    """
+    Precompiled validator for sensor data points
+
+    Accepts what SensorDataPointSchema / SensorDataIngestSchema accept, with
+    the same error dictionaries and messages, plus epoch timestamps. Fields
+    are checked by plain functions over a fixed field table, and the
+    nan/infinity check of a batch is one vectorized pass over its values.
+    """
+
+    POINT_FIELDS = (
+        ("machine_id", _integer),
+        ("sensor_type", _string),
+        ("value", _number),
+        ("timestamp", _timestamp),
+        ("unit", _string),
+    )
+    POINT_FIELD_NAMES = frozenset(name for name, _ in POINT_FIELDS)
+    INGEST_FIELD_NAMES = frozenset(("gateway_id", "timestamp", "data"))
+
+    def __init__(self, epoch_ns: bool = False):
+        """
+        Args:
+            epoch_ns: Return point timestamps as integer epoch nanoseconds
+                      (the write path's format) instead of datetimes
+        """
+        self.point_fields = tuple(
+            (name, _timestamp_ns if epoch_ns and name == "timestamp" else convert)
+            for name, convert in self.POINT_FIELDS
+        )
+
+    @staticmethod
+    def _field(data, name, convert, result, errors):
+        value = data.get(name, _MISSING)
+        if value is _MISSING:
+            errors[name] = [MESSAGES["required"]]
+        elif value is None:
+            errors[name] = [MESSAGES["null"]]
+        else:
+            try:
+                result[name] = convert(value)
+            except _Invalid as e:
+                errors[name] = [e.message]
+
+    def _check_point(self, data, unknown=RAISE):
+        """Returns (converted fields, errors) without the nan/infinity check"""
+        if not isinstance(data, Mapping):
+            return {}, {"_schema": [MESSAGES["type"]]}
+
+        point = {}
+        errors = {}
+        for name, convert in self.point_fields:
+            self._field(data, name, convert, point, errors)
+        # A valid point has no unknown keys iff every key was converted;
+        # missing fields leave no key behind, so invalid points always check
+        if unknown == RAISE and (errors or len(data) > len(point)):
+            for name in data.keys() - self.POINT_FIELD_NAMES:
+                errors[name] = [MESSAGES["unknown"]]
+        return point, errors
+
+    def validate_point(self, data, unknown=RAISE) -> dict:
+        """
+        Validate one data point, like SensorDataPointSchema().load(data)
+
+        Args:
+            data: Decoded JSON object
+            unknown: marshmallow.RAISE to reject unknown fields, EXCLUDE to drop them
+
+        Raises:
+            ValidationError: With the schema's error dictionary
+        """
+        point, errors = self._check_point(data, unknown)
+        if "value" in point and not math.isfinite(point["value"]):
+            errors["value"] = [MESSAGES["special"]]
+        if errors:
+            raise ValidationError(errors)
+        return point
+
+    def validate_points(self, items, unknown=RAISE):
+        """
+        Validate a batch of data points
+
+        Returns:
+            (valid points in input order, {index: errors} of invalid ones)
+        """
+        points, indices, errors = [], [], {}
+        for index, item in enumerate(items):
+            point, point_errors = self._check_point(item, unknown)
+            if point_errors:
+                if "value" in point and not math.isfinite(point["value"]):
+                    point_errors["value"] = [MESSAGES["special"]]
+                errors[index] = point_errors
+            else:
+                points.append(point)
+                indices.append(index)
+
+        values = np.fromiter(
+            (point["value"] for point in points), dtype=np.float64, count=len(points)
+        )
+        special = np.flatnonzero(~np.isfinite(values))
+        if special.size:
+            for position in special.tolist():
+                errors[indices[position]] = {"value": [MESSAGES["special"]]}
+            keep = np.isfinite(values)
+            points = [point for point, ok in zip(points, keep.tolist()) if ok]
+
+        return points, dict(sorted(errors.items()))
+
+    def validate_ingest(self, payload) -> dict:
+        """
+        Validate an ingest request body, like SensorDataIngestSchema().load
+
+        Raises:
+            ValidationError: With the schema's error dictionary; point errors
+                             are nested under "data" by list index
+        """
+        if not isinstance(payload, Mapping):
+            raise ValidationError({"_schema": [MESSAGES["type"]]})
+
+        result = {}
+        errors = {}
+        self._field(payload, "gateway_id", _string, result, errors)
+        self._field(payload, "timestamp", _timestamp, result, errors)
+
+        data = payload.get("data", _MISSING)
+        if data is _MISSING:
+            errors["data"] = [MESSAGES["required"]]
+        elif data is None:
+            errors["data"] = [MESSAGES["null"]]
+        elif isinstance(data, (str, bytes, Mapping)) or not hasattr(data, "__iter__"):
+            errors["data"] = [MESSAGES["list"]]
+        else:
+            points, point_errors = self.validate_points(data)
+            if point_errors:
+                errors["data"] = point_errors
+            elif not points:
+                errors["data"] = [MESSAGES["too_short"]]
+            else:
+                result["data"] = points
+
+        for name in payload.keys() - self.INGEST_FIELD_NAMES:
+            errors[name] = [MESSAGES["unknown"]]
+        if errors:
+            raise ValidationError(errors)
+        return result
+
+
+# Singleton instance used by the ingest paths
+sensor_data_validator = SensorDataValidator(epoch_ns=True)
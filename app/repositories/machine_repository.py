@@ -1,10 +1,25 @@
-from app.database import get_postgres_connection, get_influxdb_client
-from influxdb_client import Point
-from influxdb_client.client.write_api import SYNCHRONOUS
+import hashlib
+import json
+import re
+from app.database import postgres_connection, get_shared_influxdb_client
+from influxdb_client import WritePrecision
 from app.config import config
+from app.utils.flux_csv import FLUX_CSV_DIALECT, parse_flux_csv
+from app.utils.line_protocol import format_sensor_line
 from app.utils.logger import logger
 from app.services.cache_service import cache_service
-from datetime import datetime
+from app.services.influx_writer_service import influx_writer
+from app.services.query_executor import query_executor
+from app.services.query_cache_service import row_order, sensor_query_cache
+from app.services.rollup_service import rollup_service
+from app.utils.time_utils import (
+    floor_time,
+    parse_duration,
+    parse_time,
+    to_epoch_ns,
+    to_rfc3339,
+    utcnow,
+)
 
 
 class MachineRepository:
@@ -13,67 +28,109 @@ class MachineRepository:
     @staticmethod
     def get_all_machines():
         """Get all machines from PostgreSQL with caching"""
-        cache_key = "machines:all"
 
-        cached_machines = cache_service.get(cache_key)
-        if cached_machines is not None:
-            logger.info("Retrieved machines from cache")
-            return cached_machines
+        def load_machines():
+            with postgres_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT * FROM machine_metadata ORDER BY id")
+                    machines = cursor.fetchall()
+            logger.info("Retrieved machines from database and cached")
+            return machines
 
-        conn = get_postgres_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM machine_metadata ORDER BY id")
-        machines = cursor.fetchall()
-        cursor.close()
-        conn.close()
-
-        cache_service.set(cache_key, machines, ttl=300)
-        logger.info("Retrieved machines from database and cached")
-
-        return machines
+        return cache_service.get_or_compute(
+            "machines:all", load_machines, ttl=300, tags=["machines"]
+        )
 
     @staticmethod
     def get_machine_by_id(machine_id):
         """Get machine by ID with caching"""
         cache_key = f"machine:{machine_id}"
 
-        cached_machine = cache_service.get(cache_key)
-        if cached_machine is not None:
-            logger.info(f"Retrieved machine {machine_id} from cache")
-            return cached_machine
+        def load_machine():
+            with postgres_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT * FROM machine_metadata WHERE id = %s", (machine_id,)
+                    )
+                    machine = cursor.fetchone()
+            if machine:
+                logger.info(f"Retrieved machine {machine_id} from database and cached")
+            return machine
+
+        return cache_service.get_or_compute(
+            cache_key,
+            load_machine,
+            ttl=300,
+            tags=["machines", cache_key],
+            negative_ttl=config.CACHE_NEGATIVE_TTL,
+        )
 
-        conn = get_postgres_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM machine_metadata WHERE id = %s", (machine_id,))
-        machine = cursor.fetchone()
-        cursor.close()
-        conn.close()
+    @staticmethod
+    def find_machines(machine_ids=None, location=None, sensor_type=None, limit=None):
+        """
+        Get machines by ID list and/or location/sensor type in one query
 
-        if machine:
-            cache_service.set(cache_key, machine, ttl=300)
-            logger.info(f"Retrieved machine {machine_id} from database and cached")
+        Args:
+            machine_ids: Optional list of machine IDs
+            location: Optional exact location
+            sensor_type: Optional exact sensor type
+            limit: Optional maximum number of machines
 
-        return machine
+        Returns:
+            List of machines ordered by ID
+        """
+        clauses = []
+        params = []
+        if machine_ids is not None:
+            clauses.append("id = ANY(%s)")
+            params.append(sorted(set(machine_ids)))
+        if location:
+            clauses.append("location = %s")
+            params.append(location)
+        if sensor_type:
+            clauses.append("sensor_type = %s")
+            params.append(sensor_type)
+
+        query = "SELECT * FROM machine_metadata"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id"
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+
+        selector = json.dumps(params, sort_keys=True)
+        cache_key = f"machines:select:{hashlib.sha1(selector.encode()).hexdigest()}"
+
+        def load_machines():
+            with postgres_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+                    machines = cursor.fetchall()
+            logger.info(f"Retrieved {len(machines)} machines for selector {selector}")
+            return machines
+
+        return cache_service.get_or_compute(
+            cache_key, load_machines, ttl=300, tags=["machines"]
+        )
 
     @staticmethod
     def create_machine(machine_data):
         """Create new machine and invalidate cache"""
-        conn = get_postgres_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO machine_metadata (name, location, sensor_type, status)
-            VALUES (%(name)s, %(location)s, %(sensor_type)s, %(status)s)
-            RETURNING *
-        """,
-            machine_data,
-        )
-        machine = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with postgres_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO machine_metadata (name, location, sensor_type, status)
+                    VALUES (%(name)s, %(location)s, %(sensor_type)s, %(status)s)
+                    RETURNING *
+                """,
+                    machine_data,
+                )
+                machine = cursor.fetchone()
+            conn.commit()
 
-        cache_service.invalidate_machine_cache()
+        cache_service.invalidate_machine_cache(machine["id"])
         logger.info(f"Created machine {machine['id']} and invalidated cache")
 
         return machine
@@ -81,9 +138,6 @@ class MachineRepository:
     @staticmethod
     def update_machine(machine_id, machine_data):
         """Update machine and invalidate cache"""
-        conn = get_postgres_connection()
-        cursor = conn.cursor()
-
         update_fields = []
         values = []
         for key, value in machine_data.items():
@@ -99,11 +153,11 @@ class MachineRepository:
             RETURNING *
         """
 
-        cursor.execute(query, values)
-        machine = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with postgres_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, values)
+                machine = cursor.fetchone()
+            conn.commit()
 
         cache_service.invalidate_machine_cache(machine_id)
         logger.info(f"Updated machine {machine_id} and invalidated cache")
@@ -113,22 +167,18 @@ class MachineRepository:
     @staticmethod
     def delete_machine(machine_id):
         """Delete machine and invalidate cache"""
-        conn = get_postgres_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            DELETE FROM machine_metadata
-            WHERE id = %s
-            RETURNING id
-        """,
-            (machine_id,),
-        )
-
-        deleted = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with postgres_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    DELETE FROM machine_metadata
+                    WHERE id = %s
+                    RETURNING id
+                """,
+                    (machine_id,),
+                )
+                deleted = cursor.fetchone()
+            conn.commit()
 
         if deleted:
             cache_service.invalidate_machine_cache(machine_id)
@@ -140,83 +190,459 @@ class MachineRepository:
 class SensorDataRepository:
     """Repository for sensor data operations with InfluxDB"""
 
+    AGGREGATES = ("mean", "median", "min", "max", "sum", "count", "first", "last")
+    PERCENTILE_PATTERN = re.compile(r"^p(\d{1,2}(?:\.\d+)?)$")
+
+    @staticmethod
+    def parse_aggregates(spec):
+        """
+        Parse an aggregate spec: one name or a comma-separated list
+
+        Besides AGGREGATES, percentiles are written pNN (p50, p95, p99.9).
+
+        Raises:
+            ValueError: For unknown aggregates or an empty spec
+        """
+        aggregates = [name.strip() for name in (spec or "").split(",") if name]
+        if not aggregates:
+            raise ValueError("At least one aggregate is required")
+
+        for name in aggregates:
+            match = SensorDataRepository.PERCENTILE_PATTERN.match(name)
+            if name in SensorDataRepository.AGGREGATES:
+                continue
+            if not match or not 0 < float(match.group(1)) < 100:
+                raise ValueError(f"Unsupported aggregate: {name}")
+
+        if len(set(aggregates)) != len(aggregates):
+            raise ValueError("Duplicate aggregates")
+        return aggregates
+
     @staticmethod
     def write_sensor_data(data_points):
-        """Write sensor data to InfluxDB"""
-        client = None
-        try:
-            client = get_influxdb_client()
-            write_api = client.write_api(write_options=SYNCHRONOUS)
+        """
+        Queue sensor data for batched writing to InfluxDB
 
-            points = []
+        Timestamps are normalized to integer epoch nanoseconds (the ingest
+        validator already returns them that way) and each point is formatted
+        straight to line protocol written with WritePrecision.NS, so no
+        datetime or Point object is built per point.
+        """
+        try:
+            lines = []
             for data_point in data_points:
-                timestamp = data_point["timestamp"]
-                if isinstance(timestamp, str):
-                    timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-
-                point = (
-                    Point("sensor_data")
-                    .tag("machine_id", str(data_point["machine_id"]))
-                    .tag("sensor_type", data_point["sensor_type"])
-                    .tag("unit", data_point["unit"])
-                    .field("value", float(data_point["value"]))
-                    .time(timestamp)
+                line = format_sensor_line(
+                    data_point["machine_id"],
+                    data_point["sensor_type"],
+                    data_point["unit"],
+                    float(data_point["value"]),
+                    to_epoch_ns(data_point["timestamp"]),
                 )
-                points.append(point)
+                if line:
+                    lines.append(line)
 
-            write_api.write(
-                bucket=config.INFLUXDB_BUCKET, org=config.INFLUXDB_ORG, record=points
-            )
+            influx_writer.write(lines, WritePrecision.NS)
 
-            logger.info(f"Successfully wrote {len(points)} data points to InfluxDB")
+            logger.info(f"Queued {len(lines)} data points for InfluxDB")
             return True
 
         except Exception as e:
             logger.error(f"Error writing to InfluxDB: {e}", exc_info=True)
             raise
-        finally:
-            if client:
-                client.close()
 
     @staticmethod
-    def query_sensor_data(machine_id, start_time, end_time, interval="1h"):
-        """Query sensor data from InfluxDB"""
-        client = None
+    def write_line_protocol(data, count, precision="ns"):
+        """
+        Queue already validated sensor_data line protocol for writing
+
+        The bytes go to the batching writer unchanged; no Point objects are
+        built.
+        """
+        influx_writer.write_lines(data, count, precision)
+        logger.info(f"Queued {count} line protocol points for InfluxDB")
+
+    @staticmethod
+    def query_sensor_data(
+        machine_id, start_time, end_time, interval="1h", aggregate="mean"
+    ):
+        """
+        Query aggregated sensor data from InfluxDB
+
+        Closed buckets are served from the sensor query cache when the range
+        and interval can be parsed; anything else runs as a single live query.
+        """
+        return SensorDataRepository._query(
+            [machine_id], start_time, end_time, interval, aggregate
+        )
+
+    @staticmethod
+    def query_sensor_aggregates(machine_id, start_time, end_time, interval, aggregates):
+        """
+        Query several aggregates (including percentiles) in one Flux query
+
+        Returns:
+            Rows with one column per aggregate instead of "value"/"field"
+        """
+        rows = SensorDataRepository._query(
+            [machine_id], start_time, end_time, interval, ",".join(aggregates)
+        )
+        if len(aggregates) == 1 and aggregates[0] in SensorDataRepository.AGGREGATES:
+            # A single plain aggregate runs as the (cached, rollup-aware)
+            # single-aggregate query; move its value into the named column
+            (name,) = aggregates
+            rows = [
+                {
+                    "time": row["time"],
+                    "machine_id": row.get("machine_id"),
+                    "sensor_type": row.get("sensor_type"),
+                    "unit": row.get("unit"),
+                    name: row.get("value"),
+                }
+                for row in rows
+            ]
+        return rows
+
+    @staticmethod
+    def query_sensor_data_batch(
+        machine_ids, start_time, end_time, interval="1h", aggregate="mean"
+    ):
+        """
+        Query aggregated sensor data for several machines with one Flux query
+
+        Returns:
+            Dict of machine ID (string, as tagged in InfluxDB) -> rows
+        """
+        machine_ids = sorted({str(machine_id) for machine_id in machine_ids})
+        grouped = {machine_id: [] for machine_id in machine_ids}
+        if not machine_ids:
+            return grouped
+
+        rows = SensorDataRepository._query(
+            machine_ids, start_time, end_time, interval, aggregate
+        )
+        for row in rows:
+            grouped.setdefault(row["machine_id"], []).append(row)
+        return grouped
+
+    @staticmethod
+    def _query(machine_ids, start_time, end_time, interval, aggregate):
+        SensorDataRepository.parse_aggregates(aggregate)
+
+        try:
+            now = utcnow()
+            start = parse_time(start_time, now)
+            stop = parse_time(end_time, now)
+            every = parse_duration(interval)
+        except (TypeError, ValueError):
+            return SensorDataRepository._run_query(
+                machine_ids, start_time, end_time, interval, aggregate
+            )
+
+        def fetch(range_start, range_stop):
+            return SensorDataRepository._fetch_range(
+                machine_ids, range_start, range_stop, every, interval, aggregate, now
+            )
+
+        if not config.SENSOR_QUERY_CACHE_ENABLED or start >= stop:
+            return fetch(start, stop)
+
+        return sensor_query_cache.query(
+            ",".join(str(machine_id) for machine_id in machine_ids),
+            start,
+            stop,
+            every,
+            aggregate,
+            fetch,
+            now=now,
+        )
+
+    @staticmethod
+    def stream_sensor_data(
+        machine_id, start_time, end_time, interval="1h", aggregate="mean"
+    ):
+        """
+        Yield aggregated rows as InfluxDB returns them
+
+        Unlike query_sensor_data nothing is collected in memory (and the
+        result cache is not used), so memory stays flat for any range size.
+        Rows are ordered by series within each rollup/raw segment.
+        """
+        SensorDataRepository.parse_aggregates(aggregate)
+
         try:
-            client = get_influxdb_client()
-            query_api = client.query_api()
+            now = utcnow()
+            segments = SensorDataRepository._plan_segments(
+                parse_time(start_time, now),
+                parse_time(end_time, now),
+                parse_duration(interval),
+                aggregate,
+                now,
+            )
+            segments = [
+                (to_rfc3339(start), to_rfc3339(stop), tier)
+                for start, stop, tier in segments
+            ]
+        except (TypeError, ValueError):
+            segments = [(start_time, end_time, None)]
+
+        count = 0
+        for start, stop, tier in segments:
+            query = SensorDataRepository._build_query(
+                [machine_id], start, stop, interval, aggregate, tier
+            )
+            logger.debug(f"Streaming InfluxDB query: {query}")
+            records = (
+                get_shared_influxdb_client()
+                .query_api()
+                .query_stream(query, org=config.INFLUXDB_ORG)
+            )
+            for record in records:
+                count += 1
+                yield SensorDataRepository._record_to_row(record, aggregate)
+
+        logger.info(f"Streamed {count} data points from InfluxDB")
+
+    @staticmethod
+    def _plan_segments(start, stop, every, aggregate, now):
+        """
+        Split [start, stop) into (start, stop, tier) segments
+
+        The coarsest usable rollup tier covers the range up to its
+        watermark (the newest window its rollup task has written); the rest
+        is read from raw points (tier None).
+        """
+        tier = None
+        if config.ROLLUP_ENABLED:
+            tier = rollup_service.select_tier(every, aggregate, start, now)
+
+        split = start
+        if tier is not None:
+            split = min(stop, floor_time(rollup_service.watermark(tier, now), every))
+
+        if split <= start:
+            return [(start, stop, None)]
+        if split < stop:
+            return [(start, split, tier), (split, stop, None)]
+        return [(start, stop, tier)]
+
+    @staticmethod
+    def _split_range(start, stop, every):
+        """
+        Cut [start, stop) into up to QUERY_PARALLELISM sub-ranges
+
+        Boundaries are floored to multiples of ``every`` so no aggregate
+        window straddles two sub-ranges, and every sub-range spans at least
+        QUERY_PARALLEL_MIN_SPAN.
+        """
+        min_span = max(parse_duration(config.QUERY_PARALLEL_MIN_SPAN), every)
+        parts = min(config.QUERY_PARALLELISM, (stop - start) // min_span)
+        if parts <= 1:
+            return [(start, stop)]
+
+        step = (stop - start) / parts
+        bounds = [start]
+        for index in range(1, parts):
+            bound = floor_time(start + step * index, every)
+            if bound > bounds[-1]:
+                bounds.append(bound)
+        bounds.append(stop)
+        return list(zip(bounds, bounds[1:]))
+
+    @staticmethod
+    def _fetch_range(machine_ids, start, stop, every, interval, aggregate, now):
+        """
+        Read [start, stop) from rollup tiers and raw data as planned
+
+        Long segments are split into window-aligned sub-ranges that run
+        concurrently on the shared query pool and are merged back into
+        series-then-time order.
+        """
+
+        def run(sub_start, sub_stop, tier):
+            return SensorDataRepository._run_query(
+                machine_ids,
+                to_rfc3339(sub_start),
+                to_rfc3339(sub_stop),
+                interval,
+                aggregate,
+                tier=tier,
+            )
+
+        calls = [
+            (sub_start, sub_stop, tier)
+            for segment_start, segment_stop, tier in (
+                SensorDataRepository._plan_segments(start, stop, every, aggregate, now)
+            )
+            for sub_start, sub_stop in SensorDataRepository._split_range(
+                segment_start, segment_stop, every
+            )
+        ]
+        results = query_executor.map(run, calls)
 
-            query = f"""
+        rows = [row for result in results for row in result]
+        if len(results) > 1:
+            rows.sort(key=row_order)
+        return rows
+
+    @staticmethod
+    def _machine_filter(machine_ids):
+        """
+        Flux predicate selecting the given machines
+
+        Several IDs use an anchored regex rather than contains(): InfluxDB
+        pushes regex tag filters down to the storage engine, contains() is
+        evaluated row by row after the read.
+        """
+        machine_ids = [str(machine_id) for machine_id in machine_ids]
+        if len(machine_ids) == 1:
+            return f'r["machine_id"] == "{machine_ids[0]}"'
+
+        if not all(machine_id.isdigit() for machine_id in machine_ids):
+            raise ValueError("Machine IDs must be numeric")
+        return f'r["machine_id"] =~ /^({"|".join(machine_ids)})$/'
+
+    @staticmethod
+    def _build_query(machine_ids, start_time, end_time, interval, aggregate, tier=None):
+        """Flux for one aggregateWindow query over raw data or a rollup tier"""
+        machine_filter = SensorDataRepository._machine_filter(machine_ids)
+        if tier is not None:
+            return rollup_service.build_query(
+                tier, machine_filter, start_time, end_time, interval, aggregate
+            )
+
+        source = f"""
                 from(bucket: "{config.INFLUXDB_BUCKET}")
                   |> range(start: {start_time}, stop: {end_time})
                   |> filter(fn: (r) => r["_measurement"] == "sensor_data")
-                  |> filter(fn: (r) => r["machine_id"] == "{machine_id}")
-                  |> filter(fn: (r) => r["_field"] == "value")
-                  |> aggregateWindow(every: {interval}, fn: mean, createEmpty: false)
-                  |> yield(name: "mean")
+                  |> filter(fn: (r) => {machine_filter})
+                  |> filter(fn: (r) => r["_field"] == "value")"""
+
+        if aggregate in SensorDataRepository.AGGREGATES:
+            return f"""{source}
+                  |> aggregateWindow(every: {interval}, fn: {aggregate}, createEmpty: false)
+                  |> yield(name: "{aggregate}")
             """
 
-            logger.debug(f"Executing InfluxDB query: {query}")
+        # Several aggregates: one branch per function over the same source,
+        # pivoted so each window is one record with a column per aggregate
+        branches = ",\n".join(
+            f"""                    data
+                      |> aggregateWindow(
+                          every: {interval},
+                          fn: {SensorDataRepository._flux_function(name)},
+                          createEmpty: false
+                      )
+                      |> toFloat()
+                      |> set(key: "_field", value: "{name}")"""
+            for name in SensorDataRepository.parse_aggregates(aggregate)
+        )
+        return f"""
+                data ={source}
+
+                union(tables: [
+{branches}
+                ])
+                  |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+                  |> yield(name: "aggregates")
+            """
+
+    @staticmethod
+    def _flux_function(name):
+        match = SensorDataRepository.PERCENTILE_PATTERN.match(name)
+        if not match:
+            return name
+        q = float(match.group(1)) / 100
+        return (
+            f"(column, tables=<-) => tables |> quantile(q: {q}, column: column, "
+            'method: "estimate_tdigest")'
+        )
+
+    @staticmethod
+    def _record_to_row(record, aggregate="mean"):
+        if aggregate in SensorDataRepository.AGGREGATES:
+            return {
+                "time": record.get_time().isoformat() if record.get_time() else None,
+                "machine_id": record.values.get("machine_id"),
+                "sensor_type": record.values.get("sensor_type"),
+                "unit": record.values.get("unit"),
+                "value": record.get_value(),
+                "field": record.get_field(),
+            }
+
+        row = {
+            "time": record.get_time().isoformat() if record.get_time() else None,
+            "machine_id": record.values.get("machine_id"),
+            "sensor_type": record.values.get("sensor_type"),
+            "unit": record.values.get("unit"),
+        }
+        for name in aggregate.split(","):
+            row[name] = record.values.get(name)
+        return row
+
+    @staticmethod
+    def _csv_to_rows(body, aggregate="mean"):
+        """
+        Build the same rows as _record_to_row from a raw Flux CSV response
 
-            result = query_api.query(query, org=config.INFLUXDB_ORG)
-
-            results = []
-            for table in result:
-                for record in table.records:
-                    results.append(
-                        {
-                            "time": (
-                                record.get_time().isoformat()
-                                if record.get_time()
-                                else None
-                            ),
-                            "machine_id": record.values.get("machine_id"),
-                            "sensor_type": record.values.get("sensor_type"),
-                            "unit": record.values.get("unit"),
-                            "value": record.get_value(),
-                            "field": record.get_field(),
-                        }
+        Columns are decoded once per block with parse_flux_csv, then zipped
+        into row dicts, skipping FluxTable/FluxRecord construction entirely.
+        """
+        tags = ("_time", "machine_id", "sensor_type", "unit")
+        rows = []
+        if aggregate in SensorDataRepository.AGGREGATES:
+            source = tags + ("_value", "_field")
+            for block in parse_flux_csv(body, source):
+                rows += [
+                    {
+                        "time": time,
+                        "machine_id": machine_id,
+                        "sensor_type": sensor_type,
+                        "unit": unit,
+                        "value": value,
+                        "field": field,
+                    }
+                    for time, machine_id, sensor_type, unit, value, field in zip(
+                        *(block[name] for name in source)
                     )
+                ]
+            return rows
+
+        names = tuple(aggregate.split(","))
+        keys = ("time", "machine_id", "sensor_type", "unit") + names
+        for block in parse_flux_csv(body, tags + names):
+            columns = [block[name] for name in tags + names]
+            rows += [dict(zip(keys, values)) for values in zip(*columns)]
+        return rows
+
+    @staticmethod
+    def _run_query(machine_ids, start_time, end_time, interval, aggregate, tier=None):
+        """Run one aggregateWindow query against InfluxDB (raw data or a tier)"""
+        try:
+            query_api = get_shared_influxdb_client().query_api()
+            query = SensorDataRepository._build_query(
+                machine_ids, start_time, end_time, interval, aggregate, tier
+            )
+
+            logger.debug(f"Executing InfluxDB query: {query}")
+
+            if config.INFLUXDB_QUERY_DECODER == "csv":
+                response = query_api.query_raw(
+                    query, org=config.INFLUXDB_ORG, dialect=FLUX_CSV_DIALECT
+                )
+                try:
+                    body = response.data
+                finally:
+                    response.release_conn()
+                results = SensorDataRepository._csv_to_rows(body, aggregate)
+            else:
+                result = query_api.query(query, org=config.INFLUXDB_ORG)
+
+                results = []
+                for table in result:
+                    for record in table.records:
+                        results.append(
+                            SensorDataRepository._record_to_row(record, aggregate)
+                        )
 
             logger.info(f"Retrieved {len(results)} data points from InfluxDB")
             return results
@@ -224,6 +650,3 @@ class SensorDataRepository:
         except Exception as e:
             logger.error(f"Error querying InfluxDB: {e}", exc_info=True)
             raise
-        finally:
-            if client:
-                client.close()
@@ -1,4 +1,4 @@
-from app.database import get_postgres_connection
+from app.database import postgres_connection
 from app.services.auth_service import AuthService
 from app.utils.logger import logger
 
@@ -9,103 +9,82 @@ class UserRepository:
     @staticmethod
     def create_user(username: str, password: str, role: str):
         """Create a new user"""
-        conn = get_postgres_connection()
-        cursor = conn.cursor()
-
-        try:
-            password_hash = AuthService.hash_password(password)
-
-            cursor.execute(
-                """
-                INSERT INTO users (username, password_hash, role)
-                VALUES (%s, %s, %s)
-                RETURNING id, username, role, created_at
-            """,
-                (username, password_hash, role),
-            )
-
-            user = cursor.fetchone()
-            conn.commit()
-
-            logger.info(f"User created: {username} with role {role}")
-            return user
-
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"Error creating user: {e}")
-            raise
-        finally:
-            cursor.close()
-            conn.close()
+        # bcrypt is slow on purpose; hash before taking a pooled connection
+        password_hash = AuthService.hash_password(password)
+
+        with postgres_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        INSERT INTO users (username, password_hash, role)
+                        VALUES (%s, %s, %s)
+                        RETURNING id, username, role, created_at
+                    """,
+                        (username, password_hash, role),
+                    )
+
+                    user = cursor.fetchone()
+                conn.commit()
+
+                logger.info(f"User created: {username} with role {role}")
+                return user
+
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Error creating user: {e}")
+                raise
 
     @staticmethod
     def get_user_by_username(username: str):
         """Get user by username"""
-        conn = get_postgres_connection()
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute(
-                """
-                SELECT id, username, password_hash, role, created_at
-                FROM users
-                WHERE username = %s
-            """,
-                (username,),
-            )
-
-            user = cursor.fetchone()
-            return user
-
-        finally:
-            cursor.close()
-            conn.close()
+        with postgres_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT id, username, password_hash, role, created_at
+                    FROM users
+                    WHERE username = %s
+                """,
+                    (username,),
+                )
+
+                user = cursor.fetchone()
+                return user
 
     @staticmethod
     def get_user_by_id(user_id: int):
         """Get user by ID"""
-        conn = get_postgres_connection()
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute(
-                """
-                SELECT id, username, role, created_at
-                FROM users
-                WHERE id = %s
-            """,
-                (user_id,),
-            )
-
-            user = cursor.fetchone()
-            return user
-
-        finally:
-            cursor.close()
-            conn.close()
+        with postgres_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT id, username, role, created_at
+                    FROM users
+                    WHERE id = %s
+                """,
+                    (user_id,),
+                )
+
+                user = cursor.fetchone()
+                return user
 
     @staticmethod
     def get_all_users():
         """Get all users"""
-        conn = get_postgres_connection()
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute(
+        with postgres_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT id as user_id, username, role, created_at
+                    FROM users
+                    ORDER BY created_at DESC
                 """
-                SELECT id as user_id, username, role, created_at
-                FROM users
-                ORDER BY created_at DESC
-            """
-            )
-
-            users = cursor.fetchall()
-            logger.info(f"Retrieved {len(users)} users from database")
-            return users
-
-        finally:
-            cursor.close()
-            conn.close()
+                )
+
+                users = cursor.fetchall()
+                logger.info(f"Retrieved {len(users)} users from database")
+                return users
 
     @staticmethod
     def authenticate_user(username: str, password: str):
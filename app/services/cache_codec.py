@@ -0,0 +1,174 @@
+import json
+import struct
+from datetime import date, datetime, timedelta, timezone
+from app.utils.logger import logger
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+class CacheCodecError(Exception):
+    """Raised when a cached value cannot be decoded"""
+
+
+class DateTimeEncoder(json.JSONEncoder):
+    """Custom JSON encoder for datetime objects"""
+
+    def default(self, obj):
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return super().default(obj)
+
+
+class JSONCodec:
+    """
+    JSON codec (fallback and legacy format)
+
+    Datetimes are written as ISO strings and restored for the known
+    timestamp keys on decode.
+    """
+
+    codec_id = b"J"
+    name = "json"
+    DATETIME_KEYS = ("created_at", "updated_at", "timestamp")
+
+    def encode(self, value) -> bytes:
+        return json.dumps(value, cls=DateTimeEncoder).encode("utf-8")
+
+    def decode(self, data):
+        return self._deserialize_datetimes(json.loads(data))
+
+    def _deserialize_datetimes(self, data):
+        """Convert ISO datetime strings back to datetime objects"""
+        if isinstance(data, dict):
+            result = {}
+            for key, value in data.items():
+                if key in self.DATETIME_KEYS and isinstance(value, str):
+                    try:
+                        result[key] = datetime.fromisoformat(value)
+                    except (ValueError, AttributeError):
+                        result[key] = value
+                elif isinstance(value, (dict, list)):
+                    result[key] = self._deserialize_datetimes(value)
+                else:
+                    result[key] = value
+            return result
+        elif isinstance(data, list):
+            return [self._deserialize_datetimes(item) for item in data]
+        return data
+
+
+class MsgpackCodec:
+    """
+    Typed binary codec on msgpack
+
+    datetime and date values are encoded as extension types, so they
+    round-trip without any post-decode walk over the data.
+    """
+
+    codec_id = b"M"
+    name = "msgpack"
+
+    EXT_DATETIME = 1
+    EXT_DATE = 2
+
+    # year, month, day, hour, minute, second, microsecond, UTC offset minutes
+    _DATETIME = struct.Struct(">HBBBBBIh")
+    _DATE = struct.Struct(">HBB")
+    _NAIVE = -32768
+
+    def _default(self, obj):
+        if isinstance(obj, datetime):
+            offset = obj.utcoffset()
+            minutes = self._NAIVE if offset is None else offset // timedelta(minutes=1)
+            return msgpack.ExtType(
+                self.EXT_DATETIME,
+                self._DATETIME.pack(
+                    obj.year,
+                    obj.month,
+                    obj.day,
+                    obj.hour,
+                    obj.minute,
+                    obj.second,
+                    obj.microsecond,
+                    minutes,
+                ),
+            )
+        if isinstance(obj, date):
+            return msgpack.ExtType(
+                self.EXT_DATE, self._DATE.pack(obj.year, obj.month, obj.day)
+            )
+        raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+    def _ext_hook(self, code, data):
+        if code == self.EXT_DATETIME:
+            *fields, minutes = self._DATETIME.unpack(data)
+            if minutes == self._NAIVE:
+                return datetime(*fields)
+            return datetime(*fields, tzinfo=timezone(timedelta(minutes=minutes)))
+        if code == self.EXT_DATE:
+            return date(*self._DATE.unpack(data))
+        return msgpack.ExtType(code, data)
+
+    def encode(self, value) -> bytes:
+        return msgpack.packb(value, default=self._default, use_bin_type=True)
+
+    def decode(self, data):
+        return msgpack.unpackb(
+            data, ext_hook=self._ext_hook, raw=False, strict_map_key=False
+        )
+
+
+class CacheCodecRegistry:
+    """
+    Encodes values with the preferred codec behind a versioned header
+
+    Stored format: ``b"GC"`` magic, one format-version byte, one codec id
+    byte, then the codec payload. Values without the header are legacy
+    JSON strings written before the header existed.
+    """
+
+    MAGIC = b"GC"
+    VERSION = 1
+    HEADER_SIZE = 4
+
+    def __init__(self, preferred: str = "msgpack"):
+        self.json_codec = JSONCodec()
+        self.codecs = {self.json_codec.codec_id: self.json_codec}
+
+        if msgpack is not None:
+            msgpack_codec = MsgpackCodec()
+            self.codecs[msgpack_codec.codec_id] = msgpack_codec
+
+        by_name = {codec.name: codec for codec in self.codecs.values()}
+        if preferred not in by_name:
+            logger.warning(f"Cache codec '{preferred}' unavailable, using json")
+            preferred = self.json_codec.name
+        self.preferred = by_name[preferred]
+        self._header = self.MAGIC + bytes([self.VERSION]) + self.preferred.codec_id
+
+    def encode(self, value) -> bytes:
+        return self._header + self.preferred.encode(value)
+
+    def decode(self, data):
+        """
+        Decode a stored value
+
+        Raises:
+            CacheCodecError: For unknown format versions or codecs
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        if not data.startswith(self.MAGIC):
+            return self.json_codec.decode(data)
+
+        version = data[2]
+        codec = self.codecs.get(data[3:4])
+        if version != self.VERSION or codec is None:
+            raise CacheCodecError(
+                f"Unsupported cache format (version {version}, codec {data[3:4]!r})"
+            )
+        return codec.decode(data[self.HEADER_SIZE :])
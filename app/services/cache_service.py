@@ -1,36 +1,132 @@
+import hashlib
+import inspect
 import json
+import math
+import os
+import random
+import threading
 import time
-from datetime import datetime
+import uuid
 from functools import wraps
+from app.config import config
 from app.database import get_redis_client
+from app.services.cache_codec import CacheCodecRegistry, DateTimeEncoder  # noqa: F401
+from app.utils.local_cache import LocalCache
 from app.utils.logger import logger
+from app.utils.metrics import metrics
 
+_MISSING = object()
 
-class DateTimeEncoder(json.JSONEncoder):
-    """Custom JSON encoder for datetime objects"""
+# Marks values written by get_or_compute, which carry refresh metadata
+ENTRY_MARKER = "__cache_entry__"
 
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
+# Deletes the lock only if it still holds our token
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class CacheInvalidationListener:
+    """
+    Drops local (L1) cache entries when any process publishes an invalidation
+
+    Every worker subscribes to the same Redis pub/sub channel, so a delete in
+    one gunicorn worker evicts the L1 copy in all of them.
+    """
+
+    def __init__(self, local_cache: LocalCache, channel: str):
+        self.local_cache = local_cache
+        self.channel = channel
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # The listener thread does not survive a fork, and invalidations may
+        # be missed until it is restarted, so start from an empty L1.
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.local_cache.clear()
+
+    def ensure_started(self, client):
+        """Start the pub/sub listener thread once per process"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._on_message})
+            self._thread = pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=self._on_error
+            )
+            self._pid = os.getpid()
+            logger.info(f"Listening for cache invalidations on {self.channel}")
+
+    def _on_message(self, message):
+        try:
+            data = json.loads(message["data"])
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed cache invalidation: {message}")
+            return
+
+        for key in data.get("keys", []):
+            self.local_cache.delete(key)
+        if data.get("pattern"):
+            self.local_cache.delete_matching(data["pattern"])
+        metrics.increment("cache.l1.invalidations_received")
+
+    def _on_error(self, error, pubsub, thread):
+        # Messages may have been lost while disconnected
+        logger.warning(f"Cache invalidation listener error: {error}")
+        self.local_cache.clear()
+        time.sleep(1)
+
+
+# Process-wide L1 cache shared by every CacheService instance
+local_cache = LocalCache(
+    max_entries=config.CACHE_L1_MAX_ENTRIES, ttl=config.CACHE_L1_TTL
+)
+invalidation_listener = CacheInvalidationListener(
+    local_cache, config.CACHE_INVALIDATION_CHANNEL
+)
+metrics.register_gauge("cache.l1", local_cache.stats)
+
+cache_codec = CacheCodecRegistry(config.CACHE_CODEC)
 
 
 class CacheService:
-    """Redis caching service with Cache-Aside Pattern"""
+    """
+    Redis caching service with Cache-Aside Pattern
+
+    When CACHE_L1_ENABLED is set, reads are served from a short-lived
+    in-process LRU (L1) in front of Redis. Deletes are broadcast over Redis
+    pub/sub so every process drops its L1 copy.
+    """
 
-    def __init__(self):
+    def __init__(self, use_local_cache: bool = None):
         self.redis_client = None
         self.max_retries = 3
         self.retry_delay = 1  # seconds
+        if use_local_cache is None:
+            use_local_cache = config.CACHE_L1_ENABLED
+        self.local_cache = local_cache if use_local_cache else None
 
     def _get_client(self):
         """Get Redis client with retry logic"""
         if self.redis_client is None:
             for attempt in range(1, self.max_retries + 1):
                 try:
-                    self.redis_client = get_redis_client()
+                    self.redis_client = get_redis_client(decode_responses=False)
                     logger.info("Redis connection established")
-                    return self.redis_client
+                    break
                 except Exception as e:
                     logger.warning(
                         f"Temporary Redis connection loss, self-healing retry is initiated (attempt {attempt}/{self.max_retries})",
@@ -50,8 +146,28 @@ class CacheService:
                             extra={"extra_data": {"error": str(e)}},
                         )
                         raise
+
+        if self.local_cache is not None:
+            try:
+                invalidation_listener.ensure_started(self.redis_client)
+            except Exception as e:
+                logger.warning(f"Failed to start cache invalidation listener: {e}")
         return self.redis_client
 
+    def _publish_invalidation(self, client, keys=None, pattern=None):
+        """Tell every process to drop the given keys from its L1 cache"""
+        if self.local_cache is None:
+            return
+
+        if keys:
+            for key in keys:
+                self.local_cache.delete(key)
+        if pattern:
+            self.local_cache.delete_matching(pattern)
+
+        message = {"keys": list(keys or []), "pattern": pattern}
+        client.publish(config.CACHE_INVALIDATION_CHANNEL, json.dumps(message))
+
     def get(self, key: str):
         """
         Get value from cache
@@ -60,17 +176,24 @@ class CacheService:
             key: Cache key
 
         Returns:
-            Cached value (deserialized from JSON) or None if not found
+            Cached value (decoded with the cache codec) or None if not found
         """
+        if self.local_cache is not None:
+            cached = self.local_cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                logger.debug(f"L1 cache hit for key: {key}")
+                return cached
+
         try:
             client = self._get_client()
             value = client.get(key)
 
             if value:
                 logger.debug(f"Cache hit for key: {key}")
-                data = json.loads(value)
-                # Convert ISO datetime strings back to datetime objects
-                return self._deserialize_datetimes(data)
+                data = cache_codec.decode(value)
+                if self.local_cache is not None:
+                    self.local_cache.set(key, data)
+                return data
 
             logger.debug(f"Cache miss for key: {key}")
             return None
@@ -79,72 +202,355 @@ class CacheService:
             logger.error(f"Error getting cache key {key}: {e}")
             return None
 
-    def _deserialize_datetimes(self, data):
-        """Convert ISO datetime strings back to datetime objects"""
-        if isinstance(data, dict):
-            result = {}
-            for key, value in data.items():
-                if key in ("created_at", "updated_at", "timestamp") and isinstance(
-                    value, str
-                ):
-                    try:
-                        result[key] = datetime.fromisoformat(value)
-                    except (ValueError, AttributeError):
-                        result[key] = value
-                elif isinstance(value, (dict, list)):
-                    result[key] = self._deserialize_datetimes(value)
-                else:
-                    result[key] = value
-            return result
-        elif isinstance(data, list):
-            return [self._deserialize_datetimes(item) for item in data]
-        return data
-
-    def set(self, key: str, value, ttl: int = 300):
+    def set(self, key: str, value, ttl: int = 300, tags=None):
         """
         Set value in cache
 
         Args:
             key: Cache key
-            value: Value to cache (will be serialized to JSON)
+            value: Value to cache (encoded with the cache codec)
             ttl: Time to live in seconds (default: 5 minutes)
+            tags: Optional tag names; the key is added to each tag's index so
+                  invalidate_tags() can drop it without scanning the keyspace
         """
         try:
             client = self._get_client()
-            serialized_value = json.dumps(value, cls=DateTimeEncoder)
-            client.setex(key, ttl, serialized_value)
+            serialized_value = cache_codec.encode(value)
+
+            if tags:
+                pipe = client.pipeline(transaction=False)
+                pipe.setex(key, ttl, serialized_value)
+                for tag in tags:
+                    tag_key = self._tag_key(tag)
+                    pipe.sadd(tag_key, key)
+                    pipe.expire(tag_key, max(ttl, config.CACHE_TAG_TTL))
+                pipe.execute()
+            else:
+                client.setex(key, ttl, serialized_value)
+
+            if self.local_cache is not None:
+                self.local_cache.set(key, value, ttl=ttl)
 
             logger.debug(f"Cache set for key: {key} with TTL: {ttl}s")
 
         except Exception as e:
             logger.error(f"Error setting cache key {key}: {e}")
 
-    def delete(self, key: str):
-        """Delete key from cache"""
+    def get_many(self, keys) -> dict:
+        """
+        Get several values in one round trip
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Dict of key -> value for the keys that were found
+        """
+        found = {}
+        remaining = []
+        for key in keys:
+            cached = (
+                self.local_cache.get(key, _MISSING)
+                if self.local_cache is not None
+                else _MISSING
+            )
+            if cached is _MISSING:
+                remaining.append(key)
+            else:
+                found[key] = cached
+
+        if not remaining:
+            return found
+
+        try:
+            client = self._get_client()
+            for key, value in zip(remaining, client.mget(remaining)):
+                if value is None:
+                    continue
+                data = cache_codec.decode(value)
+                found[key] = data
+                if self.local_cache is not None:
+                    self.local_cache.set(key, data)
+        except Exception as e:
+            logger.error(f"Error getting {len(remaining)} cache keys: {e}")
+
+        return found
+
+    def set_many(self, mapping: dict, ttl: int = 300):
+        """
+        Set several values in one pipelined round trip
+
+        Args:
+            mapping: Dict of key -> value
+            ttl: Time to live in seconds
+        """
+        if not mapping:
+            return
+
         try:
             client = self._get_client()
-            client.delete(key)
-            logger.debug(f"Cache deleted for key: {key}")
+            pipe = client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipe.setex(key, ttl, cache_codec.encode(value))
+            pipe.execute()
+
+            if self.local_cache is not None:
+                for key, value in mapping.items():
+                    self.local_cache.set(key, value, ttl=ttl)
 
         except Exception as e:
-            logger.error(f"Error deleting cache key {key}: {e}")
+            logger.error(f"Error setting {len(mapping)} cache keys: {e}")
 
-    def invalidate_pattern(self, pattern: str):
+    def delete(self, *keys: str):
+        """Delete one or more keys from cache"""
+        try:
+            client = self._get_client()
+            client.delete(*keys)
+            self._publish_invalidation(client, keys=keys)
+            logger.debug(f"Cache deleted for keys: {', '.join(keys)}")
+
+        except Exception as e:
+            logger.error(f"Error deleting cache keys {keys}: {e}")
+
+    def get_counter(self, key: str) -> int:
         """
-        Invalidate all keys matching pattern
+        Read an integer counter maintained with incr(), 0 if unset
+
+        Served from L1 when enabled; incr() invalidates every process's copy.
+        """
+        if self.local_cache is not None:
+            cached = self.local_cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                return cached
+
+        try:
+            client = self._get_client()
+            value = int(client.get(key) or 0)
+        except Exception as e:
+            logger.error(f"Error getting cache counter {key}: {e}")
+            return 0
+
+        if self.local_cache is not None:
+            self.local_cache.set(key, value)
+        return value
+
+    def incr(self, key: str) -> int:
+        """
+        Atomically increment a counter and drop it from every L1 cache
+
+        Returns:
+            The new value, or None if Redis is unavailable
+        """
+        try:
+            client = self._get_client()
+            value = client.incr(key)
+            self._publish_invalidation(client, keys=[key])
+            return value
+        except Exception as e:
+            logger.error(f"Error incrementing cache counter {key}: {e}")
+            return None
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"tag:{tag}"
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute,
+        ttl: int = 300,
+        tags=None,
+        negative_ttl: int = 0,
+        early_refresh_beta: float = None,
+    ):
+        """
+        Read-through cache with stampede protection
+
+        On a miss only one caller (across all processes) recomputes the value,
+        holding a short Redis lock; the others poll until the fresh value
+        appears or CACHE_LOCK_WAIT_TIMEOUT passes. Hot keys are refreshed
+        early with probabilistic XFetch: the closer an entry is to expiry, and
+        the longer it took to compute, the more likely a read rebuilds it
+        while the old value is still being served.
 
         Args:
-            pattern: Redis key pattern (e.g., "machine:*")
+            key: Cache key
+            compute: Callable returning the value on a miss
+            ttl: Time to live in seconds
+            tags: Optional tags, see set()
+            negative_ttl: Seconds to cache a None result (0 disables)
+            early_refresh_beta: XFetch aggressiveness (0 disables early refresh)
+
+        Returns:
+            Cached or freshly computed value
         """
+        value, _ = self._read_through(
+            key, compute, ttl, tags, negative_ttl, early_refresh_beta
+        )
+        return value
+
+    def _read_through(
+        self, key, compute, ttl, tags, negative_ttl=0, early_refresh_beta=None
+    ):
+        """get_or_compute() returning (value, served_from_cache)"""
+        if early_refresh_beta is None:
+            early_refresh_beta = config.CACHE_EARLY_REFRESH_BETA
+
+        entry = self._get_entry(key)
+        if entry is not None and not self._should_refresh_early(
+            entry, early_refresh_beta
+        ):
+            return entry["value"], True
+
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
         try:
             client = self._get_client()
-            keys = client.keys(pattern)
+            acquired = client.set(
+                lock_key, token, nx=True, px=config.CACHE_LOCK_TIMEOUT_MS
+            )
+        except Exception as e:
+            logger.error(f"Error acquiring cache lock {lock_key}: {e}")
+            return compute(), False
+
+        if acquired:
+            try:
+                value = self._compute_and_set(key, compute, ttl, tags, negative_ttl)
+                return value, False
+            finally:
+                try:
+                    client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.error(f"Error releasing cache lock {lock_key}: {e}")
+
+        if entry is not None:
+            # Another worker is refreshing early; keep serving the current value
+            return entry["value"], True
+
+        metrics.increment("cache.stampede.waits")
+        deadline = time.monotonic() + config.CACHE_LOCK_WAIT_TIMEOUT
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+            entry = self._get_entry(key)
+            if entry is not None:
+                return entry["value"], True
+            if not self._lock_held(client, lock_key):
+                # The holder finished without caching (error or uncached None)
+                break
+        else:
+            metrics.increment("cache.stampede.wait_timeouts")
+            logger.warning(f"Timed out waiting for cache key {key}, computing locally")
+
+        return self._compute_and_set(key, compute, ttl, tags, negative_ttl), False
+
+    def _compute_and_set(self, key, compute, ttl, tags, negative_ttl=0):
+        started = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - started
+
+        if value is None:
+            if not negative_ttl:
+                return None
+            ttl = negative_ttl
+
+        entry = {
+            ENTRY_MARKER: 1,
+            "value": value,
+            "delta": delta,
+            "expires_at": time.time() + ttl,
+        }
+        self.set(key, entry, ttl, tags=tags)
+        return value
+
+    @staticmethod
+    def _lock_held(client, lock_key):
+        try:
+            return bool(client.exists(lock_key))
+        except Exception:
+            return False
+
+    def _get_entry(self, key):
+        entry = self.get(key)
+        if isinstance(entry, dict) and ENTRY_MARKER in entry:
+            return entry
+        return None
+
+    @staticmethod
+    def _should_refresh_early(entry, beta):
+        """XFetch: refresh if now - delta * beta * ln(rand) >= expiry"""
+        if beta <= 0:
+            return False
+        jitter = -entry["delta"] * beta * math.log(1.0 - random.random())
+        if time.time() + jitter >= entry["expires_at"]:
+            metrics.increment("cache.stampede.early_refreshes")
+            return True
+        return False
+
+    def invalidate_tags(self, *tags: str):
+        """
+        Invalidate every key stored with any of the given tags
+
+        Costs O(members) instead of a keyspace scan. Each tag index is read
+        and removed atomically, so keys tagged concurrently land in a fresh
+        index rather than being lost.
+
+        Args:
+            tags: Tag names passed to set(..., tags=...)
+        """
+        try:
+            client = self._get_client()
+            pipe = client.pipeline(transaction=True)
+            for tag in tags:
+                pipe.smembers(self._tag_key(tag))
+                pipe.delete(self._tag_key(tag))
+            results = pipe.execute()
+
+            keys = set()
+            for members in results[::2]:
+                keys.update(
+                    member.decode("utf-8") if isinstance(member, bytes) else member
+                    for member in members
+                )
 
             if keys:
+                keys = sorted(keys)
                 client.delete(*keys)
+                self._publish_invalidation(client, keys=keys)
+
+            logger.info(f"Invalidated {len(keys)} cache keys tagged: {', '.join(tags)}")
+
+        except Exception as e:
+            logger.error(f"Error invalidating cache tags {tags}: {e}")
+
+    def invalidate_pattern(self, pattern: str):
+        """
+        Invalidate all keys matching pattern
+
+        Uses incremental SCAN rather than KEYS so Redis is never blocked for
+        the whole keyspace; prefer invalidate_tags() where keys are tagged.
+
+        Args:
+            pattern: Redis key pattern (e.g., "machine:*")
+        """
+        try:
+            client = self._get_client()
+            deleted = 0
+            batch = []
+            for key in client.scan_iter(match=pattern, count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    deleted += client.delete(*batch)
+                    batch = []
+            if batch:
+                deleted += client.delete(*batch)
+
+            if deleted:
                 logger.info(
-                    f"Invalidated {len(keys)} cache keys matching pattern: {pattern}"
+                    f"Invalidated {deleted} cache keys matching pattern: {pattern}"
                 )
+            self._publish_invalidation(client, pattern=pattern)
 
         except Exception as e:
             logger.error(f"Error invalidating cache pattern {pattern}: {e}")
@@ -153,65 +559,132 @@ class CacheService:
         """
         Invalidate machine-related cache entries
 
+        Every change also drops the "machines" tag: machine lists and
+        selector results (location, sensor type) can gain or lose any machine.
+
         Args:
             machine_id: Specific machine ID to invalidate, or None for all machines
         """
         try:
-            if machine_id:
-                # Invalidate specific machine cache
-                self.delete(f"machine:{machine_id}")
+            if machine_id is not None:
+                # Invalidate the machine entry, anything tagged with it and
+                # every cached machine set
+                self.invalidate_tags("machines", f"machine:{machine_id}")
+                self.delete(f"machine:{machine_id}", "machines:all")
                 logger.debug(f"Invalidated cache for machine {machine_id}")
             else:
                 # Invalidate all machine caches
-                self.invalidate_pattern("machine:*")
-
-            # Always invalidate the machines list cache
-            self.delete("machines:all")
-            logger.debug("Invalidated machines list cache")
+                self.invalidate_tags("machines")
+                self.delete("machines:all")
+                logger.debug("Invalidated all machine caches")
 
         except Exception as e:
             logger.error(f"Error invalidating machine cache: {e}")
 
 
-def cache_aside(key_prefix: str, ttl: int = 300):
+def _cache_key(key_prefix: str, signature, args, kwargs) -> str:
+    """
+    Build a stable cache key from a call's arguments
+
+    Arguments are bound to the function signature (defaults applied), so
+    f(1), f(x=1) and f(1, y=<default>) share a key. Simple scalar arguments
+    give a readable key such as ``machine:1``; anything else is hashed.
+    """
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    values = list(bound.arguments.values())
+
+    if all(
+        value is None
+        or isinstance(value, (int, float, bool))
+        or (isinstance(value, str) and ":" not in value)
+        for value in values
+    ):
+        return f"{key_prefix}:{':'.join(map(str, values))}"
+
+    encoded = json.dumps(bound.arguments, sort_keys=True, default=str)
+    digest = hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+    return f"{key_prefix}:h:{digest}"
+
+
+def cache_aside(
+    key_prefix: str,
+    ttl: int = 300,
+    tags=None,
+    negative_ttl: int = None,
+    bypass=None,
+):
     """
     Decorator implementing Cache-Aside Pattern
 
     Usage:
-        @cache_aside(key_prefix="machine", ttl=600)
+        @cache_aside(key_prefix="machine", ttl=600, tags=["machines", "machine:{0}"])
         def get_machine_by_id(machine_id):
             # Database query here
             return machine_data
 
+    Uses the shared ``cache_service`` client, single-flight recomputation and
+    records per-function hit/miss/bypass counters and latency under
+    ``cache_aside.<function>``. The wrapper exposes ``cache_key(*args,
+    **kwargs)`` and ``invalidate(*args, **kwargs)``.
+
     Args:
         key_prefix: Prefix for cache key
         ttl: Time to live in seconds
+        tags: Tags for the cached entry. Either a list of strings, formatted
+              with the call's args/kwargs (``"machine:{0}"``), or a callable
+              taking the same arguments and returning the tag list
+        negative_ttl: Seconds to cache a None result (default:
+                      CACHE_NEGATIVE_TTL, 0 disables)
+        bypass: Optional callable taking the call's arguments; when it returns
+                True the cache is skipped and the function is called directly
     """
+    if negative_ttl is None:
+        negative_ttl = config.CACHE_NEGATIVE_TTL
 
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            cache = CacheService()
-
-            # Generate cache key from function arguments
-            cache_key = f"{key_prefix}:{':'.join(map(str, args))}"
-
-            # Try to get from cache
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                logger.debug(f"Returning cached value for {func.__name__}")
-                return cached_value
-
-            # Cache miss - execute function
-            logger.debug(f"Cache miss - executing {func.__name__}")
-            result = func(*args, **kwargs)
+    def resolve_tags(args, kwargs):
+        if tags is None:
+            return None
+        if callable(tags):
+            return tags(*args, **kwargs)
+        return [tag.format(*args, **kwargs) for tag in tags]
 
-            # Store in cache
-            if result is not None:
-                cache.set(cache_key, result, ttl)
+    def decorator(func):
+        signature = inspect.signature(func)
+        metric_prefix = f"cache_aside.{func.__qualname__}"
 
-            return result
+        def cache_key(*args, **kwargs):
+            return _cache_key(key_prefix, signature, args, kwargs)
 
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+
+            if bypass is not None and bypass(*args, **kwargs):
+                metrics.increment(f"{metric_prefix}.bypasses")
+                return func(*args, **kwargs)
+
+            value, hit = cache_service._read_through(
+                cache_key(*args, **kwargs),
+                lambda: func(*args, **kwargs),
+                ttl,
+                tags=resolve_tags(args, kwargs),
+                negative_ttl=negative_ttl,
+            )
+
+            metrics.increment(f"{metric_prefix}.{'hits' if hit else 'misses'}")
+            metrics.observe(
+                f"{metric_prefix}.latency_seconds", time.perf_counter() - started
+            )
+            if not hit:
+                logger.debug(f"Cache miss - executed {func.__name__}")
+            return value
+
+        def invalidate(*args, **kwargs):
+            cache_service.delete(cache_key(*args, **kwargs))
+
+        wrapper.cache_key = cache_key
+        wrapper.invalidate = invalidate
         return wrapper
 
     return decorator
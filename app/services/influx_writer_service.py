@@ -0,0 +1,313 @@
+import atexit
+import os
+import threading
+import time
+from influxdb_client.client.write_api import WriteOptions
+from reactivex.scheduler import ThreadPoolScheduler
+from app.config import config
+from app.database import get_shared_influxdb_client
+from app.services.query_cache_service import sensor_query_cache
+from app.services.write_spool import WriteSpool
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+
+class WriteBufferFullError(Exception):
+    """Raised when the in-memory write buffer cannot accept more points"""
+
+
+class InfluxWriterService:
+    """
+    Process-scoped batching writer for InfluxDB
+
+    Points are handed to the influxdb-client batching ``write_api``, which
+    flushes them in the background by batch size or flush interval and
+    retries failed batches with exponential backoff. The number of points
+    accepted but not yet written is bounded by ``max_buffer_points``.
+
+    With the write spool enabled, points that do not fit the buffer, cannot
+    be queued, or fail after all retries go to an on-disk WriteSpool
+    instead of being rejected or lost. They are replayed once InfluxDB has
+    been healthy for WRITE_SPOOL_RETRY_SECONDS and the buffer has room.
+    """
+
+    def __init__(self):
+        self.max_buffer_points = config.INFLUXDB_WRITE_MAX_BUFFER_POINTS
+        self._lock = threading.Lock()
+        self._write_api = None
+        self._pid = None
+        self._pending = 0
+        self._last_error = None
+        self._queued_total = 0
+        self._settled_total = 0
+        self._invalidate_at = None
+        self.spool = None
+        if config.WRITE_SPOOL_ENABLED:
+            self.spool = WriteSpool(
+                config.WRITE_SPOOL_DIR,
+                name="influxdb.spool",
+                segment_bytes=config.WRITE_SPOOL_SEGMENT_BYTES,
+                max_bytes=config.WRITE_SPOOL_MAX_BYTES,
+                replay_rate=config.WRITE_SPOOL_REPLAY_RATE,
+                fsync=config.WRITE_SPOOL_FSYNC,
+            )
+
+        metrics.register_gauge("influxdb.write.buffered_points", lambda: self._pending)
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        """Forget the parent's write_api; its background threads do not survive a fork"""
+        self._lock = threading.Lock()
+        self._write_api = None
+        self._pid = None
+        self._pending = 0
+        self._last_error = None
+        self._queued_total = 0
+        self._settled_total = 0
+        self._invalidate_at = None
+
+    @staticmethod
+    def _write_options():
+        return WriteOptions(
+            batch_size=config.INFLUXDB_WRITE_BATCH_SIZE,
+            flush_interval=config.INFLUXDB_WRITE_FLUSH_INTERVAL_MS,
+            jitter_interval=config.INFLUXDB_WRITE_JITTER_MS,
+            retry_interval=config.INFLUXDB_WRITE_RETRY_INTERVAL_MS,
+            max_retries=config.INFLUXDB_WRITE_MAX_RETRIES,
+            max_retry_delay=config.INFLUXDB_WRITE_MAX_RETRY_DELAY_MS,
+            exponential_base=config.INFLUXDB_WRITE_EXPONENTIAL_BASE,
+            max_close_wait=config.INFLUXDB_WRITE_MAX_CLOSE_WAIT_MS,
+            write_scheduler=ThreadPoolScheduler(max_workers=1),
+        )
+
+    def _get_write_api(self):
+        """Get the batching write_api, creating it on first use in this process"""
+        with self._lock:
+            if self._write_api is None or self._pid != os.getpid():
+                client = get_shared_influxdb_client()
+                self._write_api = client.write_api(
+                    write_options=self._write_options(),
+                    success_callback=self._on_success,
+                    error_callback=self._on_error,
+                    retry_callback=self._on_retry,
+                )
+                self._pid = os.getpid()
+                if self.spool is not None:
+                    self.spool.start(
+                        self._write_spooled, self._ready_to_replay, self._on_drained
+                    )
+                logger.info(
+                    "InfluxDB batching writer started",
+                    extra={
+                        "extra_data": {
+                            "batch_size": config.INFLUXDB_WRITE_BATCH_SIZE,
+                            "flush_interval_ms": config.INFLUXDB_WRITE_FLUSH_INTERVAL_MS,
+                        }
+                    },
+                )
+            return self._write_api
+
+    def start(self):
+        """Create the write_api (and start spool replay) before the first write"""
+        self._get_write_api()
+
+    def write(self, records, precision: str = "ns"):
+        """
+        Queue records for batched writing
+
+        Args:
+            records: List of influxdb_client Points or line protocol strings
+            precision: Timestamp precision of records without their own
+
+        Raises:
+            WriteBufferFullError: If accepting the records would exceed the
+                                  buffer bound and they cannot be spooled
+        """
+        if records:
+            self._queue(records, len(records), precision)
+
+    def write_lines(self, data: bytes, count: int, precision: str = "ns"):
+        """
+        Queue a block of line protocol as-is, without parsing it into points
+
+        Args:
+            data: Newline-separated line protocol, no trailing newline
+            count: Number of lines in ``data``, for buffer accounting
+            precision: Timestamp precision of the lines (ns, us, ms or s)
+
+        Raises:
+            WriteBufferFullError: If accepting the lines would exceed the
+                                  buffer bound and they cannot be spooled
+        """
+        if count:
+            self._queue(data, count, precision)
+
+    def _queue(self, record, count, precision, spool=True):
+        try:
+            self._reserve(count)
+        except WriteBufferFullError:
+            if spool and self._spool(record, count, precision):
+                return
+            raise
+
+        try:
+            self._get_write_api().write(
+                bucket=config.INFLUXDB_BUCKET,
+                org=config.INFLUXDB_ORG,
+                record=record,
+                write_precision=precision,
+            )
+        except Exception as e:
+            self._release(count)
+            if spool and self._spool(record, count, precision):
+                logger.warning(f"Spooled {count} points after write error: {e}")
+                return
+            raise
+
+        with self._lock:
+            self._queued_total += count
+        metrics.increment("influxdb.write.queued_points", count)
+
+    def _write_spooled(self, data, count, precision):
+        """Queue a replayed spool record; raising leaves it in the spool"""
+        self._queue(data, count, precision, spool=False)
+
+    def _spool(self, record, count, precision) -> bool:
+        """Append a batch to the write spool; False if there is none or it is full"""
+        if self.spool is None:
+            return False
+
+        if isinstance(record, (list, tuple)):
+            record = "\n".join(
+                item if isinstance(item, str) else item.to_line_protocol()
+                for item in record
+            )
+        try:
+            return self.spool.append(record, count, precision)
+        except OSError as e:
+            logger.error(f"Failed to spool {count} points: {e}")
+            return False
+
+    def _ready_to_replay(self) -> bool:
+        """Replay once InfluxDB has been healthy for a while and the buffer has room"""
+        if (
+            self._last_error is not None
+            and time.monotonic() - self._last_error < config.WRITE_SPOOL_RETRY_SECONDS
+        ):
+            return False
+        return self._pending < self.max_buffer_points // 2
+
+    def _on_drained(self):
+        """Replayed points land in closed buckets; drop cached query chunks once written"""
+        with self._lock:
+            self._invalidate_at = self._queued_total
+        self._invalidate_if_flushed()
+
+    def _invalidate_if_flushed(self):
+        # Batches are written in queue order, so once as many points have
+        # settled as had been queued at the drain, the replay is written,
+        # however much newer ingest is still buffered
+        with self._lock:
+            due = (
+                self._invalidate_at is not None
+                and self._settled_total >= self._invalidate_at
+            )
+            if due:
+                self._invalidate_at = None
+        if due:
+            sensor_query_cache.invalidate_all()
+
+    def _reserve(self, count):
+        with self._lock:
+            if self._pending + count > self.max_buffer_points:
+                metrics.increment("influxdb.write.rejected_points", count)
+                raise WriteBufferFullError(
+                    f"InfluxDB write buffer full ({self._pending} points pending)"
+                )
+            self._pending += count
+
+    @staticmethod
+    def _count_lines(data):
+        if not data:
+            return 0
+        newline = b"\n" if isinstance(data, bytes) else "\n"
+        return data.count(newline) + 1
+
+    def _release(self, count, settled=False):
+        with self._lock:
+            self._pending = max(0, self._pending - count)
+            if settled:
+                self._settled_total += count
+
+    def _on_success(self, conf, data):
+        count = self._count_lines(data)
+        self._release(count, settled=True)
+        metrics.increment("influxdb.write.written_points", count)
+        metrics.increment("influxdb.write.batches")
+        self._invalidate_if_flushed()
+
+    @staticmethod
+    def _retryable(exception) -> bool:
+        """Connection errors, 429 and 5xx can succeed later; other 4xx never will"""
+        status = getattr(exception, "status", None)
+        return status is None or status == 429 or status >= 500
+
+    def _on_error(self, conf, data, exception):
+        count = self._count_lines(data)
+        self._release(count, settled=True)
+        # Rejected batches (parse errors, outside retention) are not spooled,
+        # or their replay would fail and re-spool them forever
+        if self._retryable(exception):
+            self._last_error = time.monotonic()
+            spooled = self._spool(data, count, conf[2])
+        else:
+            spooled = False
+        if spooled:
+            logger.warning(
+                f"Spooled batch of {count} points after failed write: {exception}",
+                extra={"extra_data": {"bucket": conf[0], "points": count}},
+            )
+            return
+
+        metrics.increment("influxdb.write.failed_points", count)
+        logger.error(
+            f"Failed to write batch of {count} points to InfluxDB: {exception}",
+            extra={"extra_data": {"bucket": conf[0], "points": count}},
+        )
+
+    def _on_retry(self, conf, data, exception):
+        metrics.increment("influxdb.write.retries")
+        logger.warning(
+            f"Retrying InfluxDB batch write: {exception}",
+            extra={"extra_data": {"bucket": conf[0]}},
+        )
+
+    def flush(self):
+        """
+        Write out everything buffered so far
+
+        The batching write_api has no working flush(), so the current instance
+        is closed (which drains it, bounded by max_close_wait) and a new one is
+        created on the next write.
+        """
+        with self._lock:
+            write_api = self._write_api if self._pid == os.getpid() else None
+            self._write_api = None
+
+        if write_api is not None:
+            write_api.close()
+            logger.info("InfluxDB write buffer flushed")
+
+    def close(self):
+        """Flush buffered points and stop spool replay; called on shutdown"""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing InfluxDB writer on shutdown: {e}")
+        if self.spool is not None:
+            self.spool.stop()
+
+
+# Singleton instance
+influx_writer = InfluxWriterService()
+atexit.register(influx_writer.close)
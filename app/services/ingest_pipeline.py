@@ -0,0 +1,317 @@
+import base64
+import json
+import os
+import queue
+import threading
+import time
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+
+class IngestPipeline:
+    """
+    Bounded, multi-worker pipeline between a message callback and storage
+
+    ``submit`` only enqueues raw messages. Worker threads decode them with
+    ``decode(topic, payload)`` (returning a data point or ``None`` to skip)
+    and hand accumulated points to ``sink(points)`` when a batch reaches
+    ``batch_size`` or has been open for ``flush_interval`` seconds.
+
+    Backpressure policies when the queue is full:
+        block        Wait up to ``block_timeout`` seconds, then drop the message
+        drop_oldest  Discard the oldest queued message to make room
+        spill        Append the message to a file in ``spill_dir``; it is fed
+                     back into the queue once the queue has drained. Once the
+                     spill holds ``spill_max_bytes``, messages are dropped
+    """
+
+    POLICIES = ("block", "drop_oldest", "spill")
+    SPILL_FILE = "spill.jsonl"
+
+    def __init__(
+        self,
+        decode,
+        sink,
+        name="ingest",
+        queue_size=10000,
+        workers=2,
+        batch_size=500,
+        flush_interval=0.5,
+        policy="block",
+        block_timeout=5.0,
+        spill_dir=None,
+        spill_max_bytes=1024 * 1024 * 1024,
+    ):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        if policy == "spill" and not spill_dir:
+            raise ValueError("spill_dir is required for the spill policy")
+
+        self.decode = decode
+        self.sink = sink
+        self.name = name
+        self.queue_size = queue_size
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._spill_lock = threading.Lock()
+        self._spill_bytes = 0
+        self._stop_event = threading.Event()
+        self._threads = []
+
+        metrics.register_gauge(f"{name}.queue_depth", self._queue.qsize)
+
+    @property
+    def running(self):
+        return bool(self._threads)
+
+    def start(self):
+        """Start worker threads (and the spill drainer when spilling)"""
+        if self.running:
+            return
+
+        self._stop_event.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                name=f"{self.name}-worker-{index}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        if self.policy == "spill":
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with self._spill_lock:
+                self._spill_bytes = self._spill_usage()
+            thread = threading.Thread(
+                target=self._spill_drain_loop, name=f"{self.name}-spill", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(
+            f"Ingest pipeline '{self.name}' started",
+            extra={
+                "extra_data": {
+                    "workers": self.workers,
+                    "queue_size": self.queue_size,
+                    "batch_size": self.batch_size,
+                    "policy": self.policy,
+                }
+            },
+        )
+
+    def stop(self, timeout=10.0):
+        """Stop workers after they flush what is already queued"""
+        if not self.running:
+            return
+
+        self._stop_event.set()
+        for _ in range(self.workers):
+            # Wake idle workers; a full queue means they are not waiting anyway
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+        logger.info(f"Ingest pipeline '{self.name}' stopped")
+
+    def submit(self, topic, payload) -> bool:
+        """
+        Enqueue a raw message
+
+        Returns:
+            True if the message was queued or spilled, False if it was dropped
+        """
+        item = (topic, payload, time.monotonic())
+        metrics.increment(f"{self.name}.received")
+
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+
+        if self.policy == "block":
+            try:
+                self._queue.put(item, timeout=self.block_timeout)
+                return True
+            except queue.Full:
+                metrics.increment(f"{self.name}.dropped")
+                logger.warning(f"Ingest queue '{self.name}' full, message dropped")
+                return False
+
+        if self.policy == "drop_oldest":
+            while True:
+                try:
+                    self._queue.get_nowait()
+                    metrics.increment(f"{self.name}.dropped")
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(item)
+                    return True
+                except queue.Full:
+                    continue
+
+        return self._spill(topic, payload)
+
+    def _worker_loop(self):
+        batch = []
+        batch_started = None
+
+        while True:
+            if batch:
+                wait = max(0.0, batch_started + self.flush_interval - time.monotonic())
+            else:
+                wait = self.flush_interval
+
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                item = None
+
+            if item is not None:
+                topic, payload, received_at = item
+                point = self._decode(topic, payload)
+                if point is not None:
+                    if not batch:
+                        batch_started = time.monotonic()
+                    batch.append((point, received_at))
+
+            if batch and (
+                len(batch) >= self.batch_size
+                or time.monotonic() - batch_started >= self.flush_interval
+            ):
+                self._flush(batch)
+                batch = []
+
+            if self._stop_event.is_set() and self._queue.empty():
+                if batch:
+                    self._flush(batch)
+                return
+
+    def _decode(self, topic, payload):
+        try:
+            point = self.decode(topic, payload)
+        except Exception as e:
+            logger.error(f"Error decoding message from {topic}: {e}", exc_info=True)
+            point = None
+
+        if point is None:
+            metrics.increment(f"{self.name}.invalid")
+        return point
+
+    def _flush(self, batch):
+        points = [point for point, _ in batch]
+        oldest_received = min(received_at for _, received_at in batch)
+
+        try:
+            self.sink(points)
+            metrics.increment(f"{self.name}.written", len(points))
+        except Exception as e:
+            metrics.increment(f"{self.name}.write_failures", len(points))
+            logger.error(
+                f"Failed to write batch of {len(points)} points: {e}", exc_info=True
+            )
+
+        metrics.observe(f"{self.name}.batch_size", len(points))
+        metrics.observe(f"{self.name}.lag_seconds", time.monotonic() - oldest_received)
+
+    def _spill_usage(self) -> int:
+        """Total bytes of the spill files on disk"""
+        with os.scandir(self.spill_dir) as entries:
+            return sum(entry.stat().st_size for entry in entries if entry.is_file())
+
+    def _spill(self, topic, payload) -> bool:
+        record = {
+            "topic": topic,
+            "payload": base64.b64encode(payload).decode("ascii"),
+        }
+        line = json.dumps(record) + "\n"
+        path = os.path.join(self.spill_dir, self.SPILL_FILE)
+
+        with self._spill_lock:
+            if self._spill_bytes + len(line) > self.spill_max_bytes:
+                metrics.increment(f"{self.name}.dropped")
+                logger.warning(f"Spill of '{self.name}' full, message dropped")
+                return False
+            with open(path, "a", encoding="utf-8") as spill_file:
+                spill_file.write(line)
+            self._spill_bytes += len(line)
+
+        metrics.increment(f"{self.name}.spilled")
+        return True
+
+    def _spill_drain_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            if self._queue.qsize() > self.queue_size // 2:
+                continue
+            for path in self._rotate_spill_files():
+                self._replay_spill_file(path)
+
+    def _rotate_spill_files(self):
+        """Move the active spill file aside and list every file awaiting replay"""
+        path = os.path.join(self.spill_dir, self.SPILL_FILE)
+
+        with self._spill_lock:
+            if os.path.exists(path):
+                os.replace(path, f"{path}.{time.time_ns()}.draining")
+
+        # Leftovers from a previous run are replayed as well
+        return sorted(
+            os.path.join(self.spill_dir, filename)
+            for filename in os.listdir(self.spill_dir)
+            if filename.endswith(".draining")
+        )
+
+    def _put_until_stopped(self, item) -> bool:
+        """Queue an item, waiting for room; False if the pipeline stopped first"""
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=self.flush_interval)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _replay_spill_file(self, path):
+        """
+        Feed a spill file back into the queue, then delete it
+
+        On stop the file is kept and replayed from the start by the next run,
+        so messages already queued from it may be written twice.
+        """
+        replayed = 0
+        with open(path, encoding="utf-8") as spill_file:
+            for line in spill_file:
+                record = json.loads(line)
+                payload = base64.b64decode(record["payload"])
+                if not self._put_until_stopped(
+                    (record["topic"], payload, time.monotonic())
+                ):
+                    logger.info(
+                        f"Spill replay of '{self.name}' stopped after "
+                        f"{replayed} messages"
+                    )
+                    return
+                replayed += 1
+
+        size = os.path.getsize(path)
+        os.remove(path)
+        with self._spill_lock:
+            self._spill_bytes = max(0, self._spill_bytes - size)
+        metrics.increment(f"{self.name}.unspilled", replayed)
+        logger.info(f"Replayed {replayed} spilled messages into '{self.name}'")
@@ -1,22 +1,55 @@
 import paho.mqtt.client as mqtt
 import json
-import threading
+from marshmallow import EXCLUDE, ValidationError
 from app.config import config
+from app.models.validators import sensor_data_validator
 from app.utils.logger import logger
 from app.repositories.machine_repository import SensorDataRepository
+from app.services.ingest_pipeline import IngestPipeline
+from app.services.telemetry_hub import telemetry_hub
 
 
 class MQTTService:
     """MQTT Service for subscribing to sensor data topics"""
 
     def __init__(self):
-        self.client = mqtt.Client()
+        if config.MQTT_PROTOCOL == "5":
+            self.client = mqtt.Client(
+                client_id=config.MQTT_CLIENT_ID, protocol=mqtt.MQTTv5
+            )
+        else:
+            self.client = mqtt.Client(client_id=config.MQTT_CLIENT_ID)
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
         self.client.on_disconnect = self.on_disconnect
         self.is_connected = False
-
-    def on_connect(self, client, userdata, flags, rc):
+        self.pipeline = IngestPipeline(
+            decode=self.parse_message,
+            sink=self.write_batch,
+            name="mqtt.ingest",
+            queue_size=config.MQTT_QUEUE_SIZE,
+            workers=config.MQTT_WORKERS,
+            batch_size=config.MQTT_BATCH_SIZE,
+            flush_interval=config.MQTT_BATCH_INTERVAL_MS / 1000,
+            policy=config.MQTT_BACKPRESSURE_POLICY,
+            block_timeout=config.MQTT_BLOCK_TIMEOUT,
+            spill_dir=config.MQTT_SPILL_DIR,
+            spill_max_bytes=config.MQTT_SPILL_MAX_BYTES,
+        )
+
+    @property
+    def topic(self):
+        """
+        Subscription topic
+
+        With MQTT_SHARED_GROUP set, the broker load-balances messages across
+        every subscriber in the group instead of delivering each to all.
+        """
+        if config.MQTT_SHARED_GROUP:
+            return f"$share/{config.MQTT_SHARED_GROUP}/{config.MQTT_TOPIC}"
+        return config.MQTT_TOPIC
+
+    def on_connect(self, client, userdata, flags, rc, properties=None):
         """Callback when connected to MQTT broker"""
         if rc == 0:
             self.is_connected = True
@@ -30,36 +63,49 @@ class MQTTService:
                 },
             )
 
-            topic = "factory/+/machine/+/telemetry"
-            client.subscribe(topic)
-            logger.info(f"Subscribed to topic: {topic}")
+            client.subscribe(self.topic)
+            logger.info(f"Subscribed to topic: {self.topic}")
 
         else:
             logger.error(f"Failed to connect to MQTT broker. Return code: {rc}")
 
-    def on_disconnect(self, client, userdata, rc):
+    def on_disconnect(self, client, userdata, rc, properties=None):
         """Callback when disconnected from MQTT broker"""
         self.is_connected = False
         if rc != 0:
             logger.warning(
                 "Unexpected MQTT disconnection. Attempting to reconnect...",
-                extra={"extra_data": {"return_code": rc}},
+                extra={"extra_data": {"return_code": getattr(rc, "value", rc)}},
             )
 
     def on_message(self, client, userdata, msg):
-        """Callback when message is received"""
+        """
+        Callback when message is received
+
+        Runs on the paho network thread, so it only enqueues the raw message;
+        decoding and writing happen on the ingest pipeline workers.
+        """
+        self.pipeline.submit(msg.topic, msg.payload)
+
+    def parse_message(self, topic, payload):
+        """
+        Decode and validate a raw MQTT message
+
+        Returns:
+            Data point dict, or None if the message is invalid
+        """
         try:
-            topic_parts = msg.topic.split("/")
+            topic_parts = topic.split("/")
             factory_id = topic_parts[1] if len(topic_parts) > 1 else "unknown"
             machine_id = topic_parts[3] if len(topic_parts) > 3 else "unknown"
 
-            payload = json.loads(msg.payload.decode("utf-8"))
+            payload = json.loads(payload.decode("utf-8"))
 
-            logger.info(
-                f"MQTT message received from {msg.topic}",
+            logger.debug(
+                f"MQTT message received from {topic}",
                 extra={
                     "extra_data": {
-                        "topic": msg.topic,
+                        "topic": topic,
                         "factory": factory_id,
                         "machine_id": machine_id,
                         "payload": payload,
@@ -67,39 +113,27 @@ class MQTTService:
                 },
             )
 
-            if not self._validate_payload(payload):
-                logger.warning(
-                    "Invalid payload structure",
-                    extra={"extra_data": {"payload": payload}},
-                )
-                return
-
-            data_point = {
-                "machine_id": int(payload.get("machine_id", machine_id)),
-                "sensor_type": payload["sensor_type"],
-                "value": float(payload["value"]),
-                "timestamp": payload["timestamp"],
-                "unit": payload["unit"],
-            }
+            if isinstance(payload, dict) and "machine_id" not in payload:
+                payload = {**payload, "machine_id": machine_id}
+            point = sensor_data_validator.validate_point(payload, unknown=EXCLUDE)
+            return {"factory_id": factory_id, **point}
 
-            SensorDataRepository.write_sensor_data([data_point])
-
-            logger.info(
-                f"Successfully ingested data from MQTT for machine {data_point['machine_id']}"
-            )
-
-        except json.JSONDecodeError as e:
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
             logger.error(
                 f"Failed to decode MQTT message: {e}",
-                extra={"extra_data": {"payload": msg.payload}},
+                extra={"extra_data": {"payload": repr(payload)}},
             )
-        except Exception as e:
-            logger.error(f"Error processing MQTT message: {e}", exc_info=True)
+        except ValidationError as e:
+            logger.warning(
+                "Invalid payload structure",
+                extra={"extra_data": {"payload": payload, "errors": e.messages}},
+            )
+        return None
 
-    def _validate_payload(self, payload):
-        """Validate MQTT payload structure"""
-        required_fields = ["sensor_type", "value", "timestamp", "unit"]
-        return all(field in payload for field in required_fields)
+    def write_batch(self, points):
+        """Write a decoded batch, then push it to live telemetry streams"""
+        SensorDataRepository.write_sensor_data(points)
+        telemetry_hub.publish(points)
 
     def connect(self):
         """Connect to MQTT broker"""
@@ -107,6 +141,7 @@ class MQTTService:
             logger.info(
                 f"Connecting to MQTT broker at {config.MQTT_BROKER}:{config.MQTT_PORT}"
             )
+            self.pipeline.start()
             self.client.connect(config.MQTT_BROKER, config.MQTT_PORT, keepalive=60)
 
             self.client.loop_start()
@@ -121,6 +156,7 @@ class MQTTService:
         """Disconnect from MQTT broker"""
         self.client.loop_stop()
         self.client.disconnect()
+        self.pipeline.stop()
         logger.info("Disconnected from MQTT broker")
 
 
@@ -0,0 +1,197 @@
+from datetime import datetime, timedelta
+from app.config import config
+from app.services.cache_service import cache_service
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+from app.utils.time_utils import ceil_time, floor_time, utcnow
+
+
+def row_order(row):
+    """Series-then-time sort key, matching InfluxDB's per-table output"""
+    return (
+        row.get("machine_id") or "",
+        row.get("sensor_type") or "",
+        row.get("unit") or "",
+        row.get("field") or "",
+        row["time"],
+    )
+
+
+class SensorQueryCache:
+    """
+    Result cache for aggregated sensor queries over closed buckets
+
+    The time axis is cut into epoch-aligned chunks of ``chunk_buckets``
+    windows. A chunk whose last window closed more than ``grace`` ago is
+    treated as final, so its rows are cached and shared by every query that
+    overlaps it. Only the partial leading bucket and the still-open tail of a
+    request are sent to InfluxDB live.
+
+    Points can still arrive later than ``grace`` (offline devices, the
+    write spool), and writes are not parsed per point to find them, so
+    cached chunks are only ever this stale: chunks that closed within
+    ``recent_window`` are cached for ``recent_ttl`` seconds, older ones for
+    ``ttl``. invalidate_all() drops everything after a known late write.
+
+    Chunk keys carry a generation number; invalidate_all() bumps it, so
+    dropping every chunk is one INCR instead of a keyspace scan and the old
+    generation's keys simply expire.
+    """
+
+    KEY_PREFIX = "sensorq"
+    GENERATION_KEY = f"{KEY_PREFIX}:generation"
+
+    def __init__(
+        self,
+        cache=None,
+        chunk_buckets: int = None,
+        ttl: int = None,
+        grace: int = None,
+        max_chunks: int = None,
+        recent_window: int = None,
+        recent_ttl: int = None,
+    ):
+        self.cache = cache or cache_service
+        self.chunk_buckets = chunk_buckets or config.SENSOR_QUERY_CHUNK_BUCKETS
+        self.ttl = ttl or config.SENSOR_QUERY_CACHE_TTL
+        self.grace = timedelta(
+            seconds=config.SENSOR_QUERY_CLOSED_GRACE if grace is None else grace
+        )
+        self.max_chunks = max_chunks or config.SENSOR_QUERY_MAX_CHUNKS
+        self.recent_window = timedelta(
+            seconds=recent_window or config.SENSOR_QUERY_RECENT_WINDOW
+        )
+        self.recent_ttl = min(recent_ttl or config.SENSOR_QUERY_RECENT_TTL, self.ttl)
+
+    def chunk_key(self, machine_id, aggregate, every, chunk_start, generation=0):
+        every_us = every // timedelta(microseconds=1)
+        start_s = int(chunk_start.timestamp())
+        return (
+            f"{self.KEY_PREFIX}:{generation}:{machine_id}:{aggregate}:"
+            f"{every_us}:{start_s}"
+        )
+
+    def query(self, machine_id, start, stop, every, aggregate, fetch, now=None):
+        """
+        Run an aggregated query, serving closed chunks from the cache
+
+        Args:
+            machine_id: Machine ID, or comma-joined IDs of a batch query
+            start: Range start (aware datetime)
+            stop: Range stop (aware datetime)
+            every: Aggregation window (timedelta)
+            aggregate: Aggregate function name, part of the cache key
+            fetch: Callable (start, stop) -> rows running the live query
+            now: Current time (defaults to utcnow)
+
+        Returns:
+            Rows in the same shape and order as a single live query
+        """
+        now = now or utcnow()
+        span = every * self.chunk_buckets
+        closed_until = floor_time(now - self.grace, span)
+
+        cached_from = ceil_time(start, every)
+        cached_to = min(floor_time(stop, every), closed_until)
+        first_chunk = floor_time(cached_from, span)
+
+        if cached_from >= cached_to or (
+            (cached_to - first_chunk) / span > self.max_chunks
+        ):
+            metrics.increment("sensor_query_cache.bypasses")
+            return fetch(start, stop)
+
+        rows = []
+        if start < cached_from:
+            rows.extend(fetch(start, cached_from))
+
+        chunk_starts = []
+        chunk_start = first_chunk
+        while chunk_start < cached_to:
+            chunk_starts.append(chunk_start)
+            chunk_start += span
+
+        chunks = self._load_chunks(
+            machine_id, aggregate, every, chunk_starts, span, fetch, now
+        )
+        lower = cached_from + every
+        for chunk_start in chunk_starts:
+            for row in chunks[chunk_start]:
+                row_time = datetime.fromisoformat(row["time"])
+                if lower <= row_time <= cached_to:
+                    rows.append(row)
+
+        if cached_to < stop:
+            rows.extend(fetch(cached_to, stop))
+
+        rows.sort(key=row_order)
+        return rows
+
+    def invalidate_all(self):
+        """
+        Drop every cached chunk
+
+        Closed chunks assume no more points arrive later than ``grace``;
+        call this after late points (e.g. a spool replay) were written.
+        """
+        self.cache.incr(self.GENERATION_KEY)
+        metrics.increment("sensor_query_cache.invalidations")
+
+    def _load_chunks(
+        self, machine_id, aggregate, every, chunk_starts, span, fetch, now
+    ):
+        """Read chunks from the cache, fetching missing runs in one query each"""
+        generation = self.cache.get_counter(self.GENERATION_KEY)
+        keys = {
+            chunk_start: self.chunk_key(
+                machine_id, aggregate, every, chunk_start, generation
+            )
+            for chunk_start in chunk_starts
+        }
+        cached = self.cache.get_many(list(keys.values()))
+
+        chunks = {}
+        missing_runs = []
+        for chunk_start in chunk_starts:
+            key = keys[chunk_start]
+            if key in cached:
+                chunks[chunk_start] = cached[key]
+            elif missing_runs and missing_runs[-1][-1] + span == chunk_start:
+                missing_runs[-1].append(chunk_start)
+            else:
+                missing_runs.append([chunk_start])
+
+        metrics.increment("sensor_query_cache.chunk_hits", len(chunks))
+        if not missing_runs:
+            return chunks
+
+        # Late points are likeliest in recently closed chunks
+        recent_from = now - self.recent_window
+        fresh = {}
+        recent = {}
+        for run in missing_runs:
+            run_rows = {chunk_start: [] for chunk_start in run}
+            for row in fetch(run[0], run[-1] + span):
+                window_start = datetime.fromisoformat(row["time"]) - every
+                chunk_rows = run_rows.get(floor_time(window_start, span))
+                if chunk_rows is not None:
+                    chunk_rows.append(row)
+
+            for chunk_start, chunk_rows in run_rows.items():
+                chunks[chunk_start] = chunk_rows
+                target = recent if chunk_start + span > recent_from else fresh
+                target[keys[chunk_start]] = chunk_rows
+
+        metrics.increment("sensor_query_cache.chunk_misses", len(fresh) + len(recent))
+        if fresh:
+            self.cache.set_many(fresh, ttl=self.ttl)
+        if recent:
+            self.cache.set_many(recent, ttl=self.recent_ttl)
+        logger.debug(
+            f"Cached {len(fresh) + len(recent)} sensor query chunks "
+            f"for machine {machine_id}"
+        )
+        return chunks
+
+
+sensor_query_cache = SensorQueryCache()
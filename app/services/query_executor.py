@@ -0,0 +1,94 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.config import config
+from app.utils.metrics import metrics
+
+
+class ParallelQueryExecutor:
+    """
+    Process-scoped bounded thread pool for InfluxDB sub-range queries
+
+    Every request thread shares the same ``max_workers`` threads, so the
+    number of concurrent queries a worker process sends to InfluxDB stays
+    bounded however many requests split their ranges at once.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = (
+            config.QUERY_PARALLELISM if max_workers is None else max_workers
+        )
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._local = threading.local()
+
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+        atexit.register(self.shutdown)
+
+    def _reset_after_fork(self):
+        """Forget the parent's pool; its threads do not survive a fork"""
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="influx-query"
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, args):
+        self._local.in_pool = True
+        try:
+            return fn(*args)
+        finally:
+            self._local.in_pool = False
+
+    def map(self, fn, calls) -> list:
+        """
+        Call ``fn(*args)`` for every args tuple in ``calls`` concurrently
+
+        Runs inline when parallelism is disabled, there is a single call, or
+        the caller is itself a pool thread (which could otherwise deadlock
+        waiting on its own pool).
+
+        Returns:
+            Results in the order of ``calls``
+
+        Raises:
+            The first exception raised by a call; calls not yet started are
+            cancelled
+        """
+        calls = list(calls)
+        if (
+            self.max_workers <= 1
+            or len(calls) <= 1
+            or getattr(self._local, "in_pool", False)
+        ):
+            return [fn(*args) for args in calls]
+
+        metrics.increment("influxdb.query.parallel_subranges", len(calls))
+        executor = self._get_executor()
+        futures = [executor.submit(self._run, fn, args) for args in calls]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def shutdown(self):
+        """Stop the pool threads of this process"""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._pid = None
+
+
+query_executor = ParallelQueryExecutor()
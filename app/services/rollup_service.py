@@ -0,0 +1,239 @@
+from collections import namedtuple
+from datetime import timedelta
+from influxdb_client import BucketRetentionRules, TaskCreateRequest, TaskUpdateRequest
+from app.config import config
+from app.database import get_shared_influxdb_client
+from app.utils.logger import logger
+from app.utils.time_utils import floor_time, parse_duration, parse_time, to_rfc3339
+
+RollupTier = namedtuple("RollupTier", ["name", "every", "bucket", "retention"])
+
+ROLLUP_MEASUREMENT = "sensor_rollup"
+ROLLUP_FIELDS = ("mean", "min", "max", "count", "sum")
+
+# aggregate -> (rollup field to read, function that re-aggregates it)
+_TIER_AGGREGATES = {
+    "min": ("min", "min"),
+    "max": ("max", "max"),
+    "sum": ("sum", "sum"),
+    "count": ("count", "sum"),
+}
+
+
+def parse_tiers(spec: str, base_bucket: str):
+    """
+    Parse ROLLUP_TIERS, e.g. "1m:30d,1h:730d,1d:inf"
+
+    Returns:
+        Tiers ordered from finest to coarsest
+    """
+    tiers = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, retention = item.partition(":")
+        tiers.append(
+            RollupTier(
+                name=name,
+                every=parse_duration(name),
+                bucket=f"{base_bucket}_{name}",
+                retention=(
+                    None if retention in ("", "inf") else parse_duration(retention)
+                ),
+            )
+        )
+    return sorted(tiers, key=lambda tier: tier.every)
+
+
+class RollupService:
+    """
+    Pre-aggregated downsampling tiers for sensor data
+
+    Each tier is an InfluxDB task that writes mean/min/max/count/sum of the
+    raw points per tier window into its own bucket, labelled with the window
+    start. Queries whose interval is a multiple of a tier's window read the
+    coarsest such tier and re-aggregate it instead of scanning raw points.
+    """
+
+    def __init__(self, tiers=None, lag: timedelta = None, start=None):
+        self.tiers = (
+            parse_tiers(config.ROLLUP_TIERS, config.INFLUXDB_BUCKET)
+            if tiers is None
+            else tiers
+        )
+        self.lag = timedelta(seconds=config.ROLLUP_LAG_SECONDS) if lag is None else lag
+        start = config.ROLLUP_START if start is None else start
+        self.start = parse_time(start) if start else None
+
+    def watermark(self, tier: RollupTier, now):
+        """End of the newest tier window the rollup task has surely written"""
+        return floor_time(now - self.lag, tier.every)
+
+    def select_tier(self, every: timedelta, aggregate: str, start, now):
+        """
+        Pick the coarsest tier able to answer a query
+
+        A tier qualifies when the query interval is a whole number of tier
+        windows, the range starts on a tier window boundary, and the range
+        start is still within the tier's retention and backfilled history.
+
+        Returns:
+            RollupTier, or None to read raw data
+        """
+        if aggregate != "mean" and aggregate not in _TIER_AGGREGATES:
+            return None
+        if self.start is not None and start < self.start:
+            return None
+
+        for tier in reversed(self.tiers):
+            if every % tier.every or floor_time(start, tier.every) != start:
+                continue
+            if tier.retention is not None and start < now - tier.retention:
+                continue
+            return tier
+        return None
+
+    def build_query(
+        self, tier, machine_filter, start_time, end_time, interval, aggregate
+    ):
+        """Flux reading a tier and re-aggregating it to the query interval"""
+        head = f"""
+                from(bucket: "{tier.bucket}")
+                  |> range(start: {start_time}, stop: {end_time})
+                  |> filter(fn: (r) => r["_measurement"] == "{ROLLUP_MEASUREMENT}")
+                  |> filter(fn: (r) => {machine_filter})"""
+
+        if aggregate == "mean":
+            # Weighted mean: total sum over total count of the tier windows
+            return f"""{head}
+                  |> filter(fn: (r) => r["_field"] == "sum" or r["_field"] == "count")
+                  |> toFloat()
+                  |> aggregateWindow(every: {interval}, fn: sum, createEmpty: false)
+                  |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+                  |> map(fn: (r) => ({{r with _value: r.sum / r.count, _field: "value"}}))
+                  |> drop(columns: ["sum", "count"])
+                  |> yield(name: "mean")
+            """
+
+        field, fn = _TIER_AGGREGATES[aggregate]
+        # Tiers store floats; raw count() returns integers
+        cast = "\n                  |> toInt()" if aggregate == "count" else ""
+        return f"""{head}
+                  |> filter(fn: (r) => r["_field"] == "{field}")
+                  |> aggregateWindow(every: {interval}, fn: {fn}, createEmpty: false){cast}
+                  |> set(key: "_field", value: "value")
+                  |> yield(name: "{aggregate}")
+            """
+
+    def build_task_flux(self, tier, start=None, stop=None) -> str:
+        """
+        Flux computing one tier from raw points
+
+        Without ``start``/``stop`` this is the scheduled task, which
+        recomputes the last few closed windows each run so late points are
+        picked up; rewriting a window overwrites the same series and time.
+        """
+        if start is None:
+            lookback = tier.every * config.ROLLUP_TASK_LOOKBACK_WINDOWS
+            offset = max(timedelta(seconds=30), self.lag - tier.every)
+            header = f"""import "date"
+
+option task = {{name: "{self.task_name(tier)}", every: {tier.name}, offset: {int(offset.total_seconds())}s}}
+
+stop = date.truncate(t: now(), unit: {tier.name})
+start = date.sub(from: stop, d: {int(lookback.total_seconds())}s)
+"""
+        else:
+            header = f"""start = {start}
+stop = {stop}
+"""
+
+        windows = "\n".join(
+            f"""    raw
+        |> aggregateWindow(every: {tier.name}, fn: {fn}, createEmpty: false, timeSrc: "_start")
+        |> toFloat()
+        |> set(key: "_field", value: "{fn}"),"""
+            for fn in ROLLUP_FIELDS
+        )
+        return f"""{header}
+raw = from(bucket: "{config.INFLUXDB_BUCKET}")
+    |> range(start: start, stop: stop)
+    |> filter(fn: (r) => r["_measurement"] == "sensor_data" and r["_field"] == "value")
+
+union(tables: [
+{windows}
+])
+    |> set(key: "_measurement", value: "{ROLLUP_MEASUREMENT}")
+    |> to(bucket: "{tier.bucket}", org: "{config.INFLUXDB_ORG}")
+"""
+
+    @staticmethod
+    def task_name(tier) -> str:
+        return f"gonsters_rollup_{tier.name}"
+
+    def ensure_tiers(self):
+        """Create or update the tier buckets and their rollup tasks"""
+        client = get_shared_influxdb_client()
+        buckets_api = client.buckets_api()
+        tasks_api = client.tasks_api()
+        org = client.organizations_api().find_organizations(org=config.INFLUXDB_ORG)[0]
+
+        for tier in self.tiers:
+            if buckets_api.find_bucket_by_name(tier.bucket) is None:
+                rules = []
+                if tier.retention is not None:
+                    rules.append(
+                        BucketRetentionRules(
+                            type="expire",
+                            every_seconds=int(tier.retention.total_seconds()),
+                        )
+                    )
+                buckets_api.create_bucket(
+                    bucket_name=tier.bucket, retention_rules=rules, org_id=org.id
+                )
+                logger.info(f"Created rollup bucket {tier.bucket}")
+
+            flux = self.build_task_flux(tier)
+            existing = tasks_api.find_tasks(name=self.task_name(tier))
+            if existing:
+                tasks_api.update_task_request(
+                    existing[0].id, TaskUpdateRequest(flux=flux, status="active")
+                )
+                logger.info(f"Updated rollup task {self.task_name(tier)}")
+            else:
+                tasks_api.create_task(
+                    task_create_request=TaskCreateRequest(
+                        flux=flux, org_id=org.id, status="active"
+                    )
+                )
+                logger.info(f"Created rollup task {self.task_name(tier)}")
+
+    def backfill(self, start, stop, chunk: timedelta = timedelta(days=1)):
+        """
+        Compute every tier for historical raw data in [start, stop)
+
+        Runs chunk by chunk (aligned to the coarsest tier) so one request
+        never has to aggregate the whole history at once.
+        """
+        query_api = get_shared_influxdb_client().query_api()
+        for tier in self.tiers:
+            step = max(chunk, tier.every)
+            cursor = floor_time(start, tier.every)
+            while cursor < stop:
+                chunk_stop = min(floor_time(cursor + step, tier.every), stop)
+                if chunk_stop <= cursor:
+                    chunk_stop = cursor + tier.every
+                query_api.query(
+                    self.build_task_flux(
+                        tier,
+                        start=to_rfc3339(cursor),
+                        stop=to_rfc3339(chunk_stop),
+                    ),
+                    org=config.INFLUXDB_ORG,
+                )
+                cursor = chunk_stop
+            logger.info(
+                f"Backfilled rollup tier {tier.name}",
+                extra={"extra_data": {"start": str(start), "stop": str(stop)}},
+            )
+
+
+rollup_service = RollupService()
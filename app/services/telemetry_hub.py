@@ -0,0 +1,180 @@
+import json
+import os
+import queue
+import threading
+import time
+from app.config import config
+from app.database import get_redis_client
+from app.services.cache_codec import DateTimeEncoder
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+# Queued to a subscription that was dropped for falling behind
+EVICTED = object()
+
+
+class TelemetrySubscription:
+    """Bounded per-client queue of live data point batches"""
+
+    def __init__(self, machine_id=None, factory_id=None, queue_size: int = 256):
+        self.machine_id = None if machine_id is None else str(machine_id)
+        self.factory_id = factory_id
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.evicted = False
+
+    def matches(self, point: dict) -> bool:
+        if self.machine_id is not None:
+            return str(point.get("machine_id")) == self.machine_id
+        if self.factory_id is not None:
+            return point.get("factory_id") == self.factory_id
+        return True
+
+    def get(self, timeout: float):
+        """Next batch of points, EVICTED, or None if nothing arrived in time"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class TelemetryHub:
+    """
+    Fans live data points out to streaming clients
+
+    The ingest worker publishes every written batch once to a Redis pub/sub
+    channel. Each web worker runs one listener thread that routes batches to
+    its local subscriptions, so no client ever reads from the database. A
+    client whose queue is full is evicted instead of slowing the others.
+    """
+
+    def __init__(
+        self,
+        channel: str = None,
+        queue_size: int = None,
+        max_subscribers: int = None,
+    ):
+        self.channel = channel or config.TELEMETRY_CHANNEL
+        self.queue_size = queue_size or config.TELEMETRY_QUEUE_SIZE
+        self.max_subscribers = max_subscribers or config.TELEMETRY_MAX_SUBSCRIBERS
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._publisher = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._publisher = None
+
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def publish(self, points):
+        """Publish a written batch to every web worker (ingest side)"""
+        if not points:
+            return
+
+        try:
+            if self._publisher is None:
+                self._publisher = get_redis_client()
+            self._publisher.publish(
+                self.channel, json.dumps(points, cls=DateTimeEncoder)
+            )
+            metrics.increment("telemetry_hub.published", len(points))
+        except Exception as e:
+            # Live streaming is best effort and must never fail ingestion
+            metrics.increment("telemetry_hub.publish_failures")
+            logger.warning(f"Failed to publish live telemetry: {e}")
+
+    def subscribe(self, machine_id=None, factory_id=None) -> TelemetrySubscription:
+        """
+        Register a streaming client
+
+        Raises:
+            OverflowError: If this worker already serves max_subscribers
+        """
+        self._ensure_listening()
+        subscription = TelemetrySubscription(
+            machine_id=machine_id, factory_id=factory_id, queue_size=self.queue_size
+        )
+        with self._lock:
+            if len(self._subscriptions) >= self.max_subscribers:
+                raise OverflowError("Too many live telemetry subscribers")
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: TelemetrySubscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, points):
+        """Route a batch of points to matching subscriptions"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            matching = [point for point in points if subscription.matches(point)]
+            if not matching:
+                continue
+            try:
+                subscription.queue.put_nowait(matching)
+            except queue.Full:
+                self._evict(subscription)
+
+    def _evict(self, subscription: TelemetrySubscription):
+        self.unsubscribe(subscription)
+        subscription.evicted = True
+        # Drop the backlog so the consumer sees the eviction right away
+        while True:
+            try:
+                subscription.queue.get_nowait()
+            except queue.Empty:
+                break
+        subscription.queue.put_nowait(EVICTED)
+        metrics.increment("telemetry_hub.evictions")
+        logger.warning(
+            "Evicted slow live telemetry subscriber",
+            extra={
+                "extra_data": {
+                    "machine_id": subscription.machine_id,
+                    "factory_id": subscription.factory_id,
+                }
+            },
+        )
+
+    def _ensure_listening(self):
+        """Start the pub/sub listener thread once per process"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+
+            pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._on_message})
+            self._thread = pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=self._on_error
+            )
+            self._pid = os.getpid()
+            logger.info(f"Listening for live telemetry on {self.channel}")
+
+    def _on_message(self, message):
+        try:
+            points = json.loads(message["data"])
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed live telemetry message")
+            return
+        self.dispatch(points)
+
+    def _on_error(self, error, pubsub, thread):
+        logger.warning(f"Live telemetry listener error: {error}")
+        time.sleep(1)
+
+
+telemetry_hub = TelemetryHub()
+metrics.register_gauge("telemetry_hub.subscribers", telemetry_hub.subscriber_count)
@@ -0,0 +1,324 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from app.utils.line_protocol import WRITE_PRECISIONS
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class WriteSpool:
+    """
+    Append-only on-disk spool for line protocol InfluxDB did not accept
+
+    Each process appends records to its own open segment with buffered
+    sequential writes. A segment is sealed once it reaches ``segment_bytes``
+    (or when the replayer wants it); sealed segments are immutable and are
+    replayed oldest first by a background thread at up to ``replay_rate``
+    points per second, then deleted. Records carry a CRC, so a torn tail
+    left by a crash ends its segment instead of being replayed.
+
+    The directory is capped at ``max_bytes``: once full, ``append`` refuses
+    records and the caller handles the failure as it would without a spool.
+    Replay is at least once; InfluxDB overwrites a point with the same
+    series and timestamp, so replaying a record twice is harmless.
+
+    Segment files are named ``<created_ns>-<pid>`` plus ``.open`` (being
+    written), ``.seg`` (sealed) or ``.<pid>.replaying`` (claimed by a
+    replayer). Processes sharing a directory must share a PID namespace,
+    i.e. use one directory per host or container.
+    """
+
+    # payload length, line count, crc32, index into WRITE_PRECISIONS
+    HEADER = struct.Struct("<IIIB")
+
+    def __init__(
+        self,
+        directory,
+        name="spool",
+        segment_bytes=64 * 1024 * 1024,
+        max_bytes=1024 * 1024 * 1024,
+        replay_rate=20000,
+        poll_interval=1.0,
+        fsync=False,
+    ):
+        self.directory = directory
+        self.name = name
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.replay_rate = replay_rate
+        self.poll_interval = poll_interval
+        self.fsync = fsync
+        self._reset_after_fork()
+
+        metrics.register_gauge(f"{name}.bytes", self.disk_usage)
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        """Forget the parent's open segment and replayer thread"""
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._file = None
+        self._path = None
+        self._size = 0
+        self._replaying = None
+
+    def _files(self, suffix):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in names
+            if name.endswith(suffix)
+        )
+
+    def disk_usage(self) -> int:
+        """Total bytes of every segment in the directory"""
+        try:
+            with os.scandir(self.directory) as entries:
+                return sum(entry.stat().st_size for entry in entries if entry.is_file())
+        except FileNotFoundError:
+            return 0
+
+    def pending_segments(self) -> int:
+        """Segments holding spooled records, including the open one"""
+        return sum(
+            len(self._files(suffix)) for suffix in (".open", ".seg", ".replaying")
+        )
+
+    def append(self, data, count: int, precision: str = "ns") -> bool:
+        """
+        Spool a block of line protocol
+
+        Args:
+            data: Newline-separated line protocol (bytes or str)
+            count: Number of lines in ``data``
+            precision: Timestamp precision of the lines
+
+        Returns:
+            True once the record is in the open segment, False if the
+            spool is full
+
+        Raises:
+            OSError: If the segment cannot be written
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        header = self.HEADER.pack(
+            len(data), count, zlib.crc32(data), WRITE_PRECISIONS.index(precision)
+        )
+
+        with self._lock:
+            if self.disk_usage() + len(header) + len(data) > self.max_bytes:
+                metrics.increment(f"{self.name}.rejected_points", count)
+                return False
+
+            if self._file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                stem = f"{time.time_ns():020d}-{os.getpid()}"
+                self._path = os.path.join(self.directory, f"{stem}.open")
+                self._file = open(self._path, "ab")
+                self._size = 0
+
+            self._file.write(header)
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._size += len(header) + len(data)
+
+            if self._size >= self.segment_bytes:
+                self._seal()
+
+        metrics.increment(f"{self.name}.spooled_points", count)
+        return True
+
+    def _seal(self):
+        """Close the open segment and make it replayable (lock held)"""
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(self._path, self._path[: -len(".open")] + ".seg")
+        self._file = None
+        self._path = None
+
+    def seal(self):
+        """Seal the open segment, e.g. on shutdown"""
+        with self._lock:
+            self._seal()
+
+    def _recover(self):
+        """Make segments left by dead processes (or this PID's previous run) replayable"""
+        pid = os.getpid()
+        for path in self._files(".open"):
+            owner = int(os.path.basename(path).split(".")[0].split("-")[1])
+            if path != self._path and (owner == pid or not _pid_alive(owner)):
+                os.replace(path, path[: -len(".open")] + ".seg")
+
+        current = self._replaying[0] if self._replaying else None
+        for path in self._files(".replaying"):
+            stem, claimer, _ = os.path.basename(path).rsplit(".", 2)
+            if path == current:
+                continue
+            if int(claimer) == pid or not _pid_alive(int(claimer)):
+                os.replace(path, os.path.join(self.directory, f"{stem}.seg"))
+
+    def _claim_next(self):
+        """Claim the oldest sealed segment, sealing our open one if none is left"""
+        for attempt in range(2):
+            for path in self._files(".seg"):
+                claimed = f"{path[: -len('.seg')]}.{os.getpid()}.replaying"
+                try:
+                    os.replace(path, claimed)
+                except FileNotFoundError:
+                    # Another process claimed it first
+                    continue
+                return [claimed, 0]
+            if attempt == 0:
+                self.seal()
+        return None
+
+    def start(self, write, ready, on_drained=None):
+        """
+        Start the replayer thread of this process
+
+        Args:
+            write: Callable (data, count, precision) that queues a record;
+                   raising leaves the record in the spool for a later round
+            ready: Callable -> bool; replay only runs while it is true
+            on_drained: Called after a round that emptied the spool
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            # Before the thread exists, so nothing can be claimed meanwhile
+            try:
+                self._recover()
+            except OSError as e:
+                logger.error(f"Error recovering spool segments: {e}")
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._replay_loop,
+                args=(write, ready, on_drained),
+                name=f"{self.name}-replay",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the replayer and seal the open segment"""
+        self._stop_event.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+        self.seal()
+
+    def _replay_loop(self, write, ready, on_drained):
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                replayed = self.replay(write, ready)
+                if replayed and on_drained is not None and not self.pending_segments():
+                    on_drained()
+            except Exception as e:
+                logger.error(f"Error replaying spool: {e}", exc_info=True)
+
+    def replay(self, write, ready) -> int:
+        """
+        Replay spooled records oldest first, paced to ``replay_rate``
+
+        Stops when the spool is empty, ``ready()`` turns false or a write
+        raises; the position is kept for the next round.
+
+        Returns:
+            Number of points replayed
+        """
+        replayed = 0
+        started = time.monotonic()
+
+        while not self._stop_event.is_set() and ready():
+            if self._replaying is None:
+                self._replaying = self._claim_next()
+                if self._replaying is None:
+                    break
+
+            path, offset = self._replaying
+            record = self._read_record(path, offset)
+            if record is None:
+                os.remove(path)
+                self._replaying = None
+                continue
+
+            data, count, precision, next_offset = record
+            # Pace by points replayed so far this round
+            delay = started + (replayed + count) / self.replay_rate - time.monotonic()
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+
+            try:
+                write(data, count, precision)
+            except Exception as e:
+                logger.debug(f"Spool replay paused: {e}")
+                break
+
+            self._replaying[1] = next_offset
+            replayed += count
+            metrics.increment(f"{self.name}.replayed_points", count)
+
+        if replayed:
+            elapsed = max(time.monotonic() - started, 1e-6)
+            metrics.observe(f"{self.name}.replay_points_per_second", replayed / elapsed)
+            logger.info(
+                f"Replayed {replayed} spooled points",
+                extra={
+                    "extra_data": {
+                        "points": replayed,
+                        "seconds": round(elapsed, 3),
+                        "points_per_second": round(replayed / elapsed),
+                    }
+                },
+            )
+        return replayed
+
+    def _read_record(self, path, offset):
+        """
+        Read the record at ``offset``
+
+        Returns:
+            (data, count, precision, next_offset), or None at the end of the
+            segment or at a torn or corrupt record
+        """
+        with open(path, "rb") as segment:
+            segment.seek(offset)
+            header = segment.read(self.HEADER.size)
+            if not header:
+                return None
+            if len(header) == self.HEADER.size:
+                length, count, crc, precision = self.HEADER.unpack(header)
+                data = segment.read(length)
+                if (
+                    len(data) == length
+                    and zlib.crc32(data) == crc
+                    and precision < len(WRITE_PRECISIONS)
+                ):
+                    return data, count, WRITE_PRECISIONS[precision], segment.tell()
+
+        metrics.increment(f"{self.name}.corrupt_segments")
+        logger.warning(
+            "Discarding torn spool segment tail",
+            extra={"extra_data": {"segment": path, "offset": offset}},
+        )
+        return None
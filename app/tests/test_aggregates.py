@@ -0,0 +1,128 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+import pytest
+from influxdb_client.client.flux_table import FluxRecord
+from app.controllers.data_controller import DataController
+from app.repositories.machine_repository import SensorDataRepository
+from app.utils.columnar import to_columnar
+
+ROWS = [
+    {
+        "time": "2024-12-09T10:01:00+00:00",
+        "machine_id": "1",
+        "sensor_type": "temperature",
+        "unit": "C",
+        "min": 20.0,
+        "max": 22.0,
+        "p95": 21.8,
+    },
+    {
+        "time": "2024-12-09T10:02:00+00:00",
+        "machine_id": "1",
+        "sensor_type": "temperature",
+        "unit": "C",
+        "min": 20.5,
+        "max": 23.0,
+        "p95": 22.9,
+    },
+]
+
+
+def test_parse_aggregates():
+    """Test aggregate specs are validated, including percentiles"""
+    assert SensorDataRepository.parse_aggregates("min, max,p99.9") == [
+        "min",
+        "max",
+        "p99.9",
+    ]
+    for spec in ("", "stddev", "p100", "p0", "min,min"):
+        with pytest.raises(ValueError):
+            SensorDataRepository.parse_aggregates(spec)
+
+
+def test_multi_aggregate_query_is_single_pass():
+    """Test several aggregates are computed by one pivoted Flux query"""
+    query = SensorDataRepository._build_query(
+        ["1"], "-1h", "now()", "1m", "mean,max,p95"
+    )
+
+    assert query.count("aggregateWindow") == 3
+    assert "union(" in query
+    assert "pivot(" in query
+    assert "quantile(q: 0.95" in query
+
+
+def test_record_to_row_multi_aggregate():
+    """Test pivoted records become one row with a column per aggregate"""
+    record = FluxRecord(
+        table=0,
+        values={
+            "_time": datetime(2024, 12, 9, 10, 1, tzinfo=timezone.utc),
+            "machine_id": "1",
+            "sensor_type": "temperature",
+            "unit": "C",
+            "min": 20.0,
+            "p95": 21.8,
+        },
+    )
+
+    row = SensorDataRepository._record_to_row(record, "min,p95")
+
+    assert row["min"] == 20.0 and row["p95"] == 21.8
+    assert "value" not in row
+
+
+@patch.object(SensorDataRepository, "_query")
+def test_single_aggregate_uses_named_column(query):
+    """Test aggregates=["mean"] returns a "mean" column, not value/field"""
+    query.return_value = [
+        {
+            "time": "2024-12-09T10:01:00+00:00",
+            "machine_id": "1",
+            "sensor_type": "temperature",
+            "unit": "C",
+            "value": 21.0,
+            "field": "value",
+        }
+    ]
+
+    rows = SensorDataRepository.query_sensor_aggregates(
+        1, "-1h", "now()", "1m", ["mean"]
+    )
+
+    assert rows == [
+        {
+            "time": "2024-12-09T10:01:00+00:00",
+            "machine_id": "1",
+            "sensor_type": "temperature",
+            "unit": "C",
+            "mean": 21.0,
+        }
+    ]
+    assert to_columnar(rows, columns=["mean"])[0]["mean"] == [21.0]
+
+
+@patch("app.controllers.data_controller.SensorDataRepository")
+@patch("app.controllers.data_controller.MachineRepository")
+def test_get_machine_data_aggregates(machine_repo, sensor_repo):
+    """Test the aggregates parameter returns one column per aggregate"""
+    machine_repo.get_machine_by_id.return_value = {"id": 1, "name": "Press"}
+    sensor_repo.parse_aggregates.side_effect = SensorDataRepository.parse_aggregates
+    sensor_repo.query_sensor_aggregates.return_value = ROWS
+
+    response, status = DataController.get_machine_data(
+        1, "-1h", "now()", "1m", response_format="columnar", aggregates="min,max,p95"
+    )
+    _, invalid_status = DataController.get_machine_data(
+        1, "-1h", "now()", "1m", aggregates="stddev"
+    )
+    _, combined_status = DataController.get_machine_data(
+        1, "-1h", "now()", "1m", max_points="10", aggregates="min,max"
+    )
+
+    assert status == 200
+    assert response["aggregates"] == ["min", "max", "p95"]
+    assert response["series"][0]["max"] == [22.0, 23.0]
+    assert "value" not in response["series"][0]
+    assert invalid_status == 400
+    assert combined_status == 400
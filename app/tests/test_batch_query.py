@@ -0,0 +1,71 @@
+from unittest.mock import patch
+import pytest
+from app.controllers.data_controller import DataController
+from app.repositories.machine_repository import SensorDataRepository
+
+MACHINES = [
+    {"id": 1, "name": "Press", "location": "Line A", "sensor_type": "temperature"},
+    {"id": 2, "name": "Lathe", "location": "Line A", "sensor_type": "temperature"},
+]
+
+
+def test_machine_filter_uses_regex_set_for_batches():
+    """Test batch queries select machines with one pushed-down regex"""
+    assert SensorDataRepository._machine_filter([7]) == 'r["machine_id"] == "7"'
+    assert (
+        SensorDataRepository._machine_filter(["1", "12"])
+        == 'r["machine_id"] =~ /^(1|12)$/'
+    )
+
+    with pytest.raises(ValueError):
+        SensorDataRepository._machine_filter(["1", ".*"])
+
+
+def test_batch_query_groups_rows_by_machine():
+    """Test one query result is split per machine"""
+    rows = [{"machine_id": "1", "value": 1.0}, {"machine_id": "2", "value": 2.0}]
+
+    with patch.object(SensorDataRepository, "_query", return_value=rows) as query:
+        grouped = SensorDataRepository.query_sensor_data_batch(
+            [2, 1, 3], "-1h", "now()", "5m"
+        )
+
+    query.assert_called_once_with(["1", "2", "3"], "-1h", "now()", "5m", "mean")
+    assert grouped == {"1": [rows[0]], "2": [rows[1]], "3": []}
+
+
+@patch("app.controllers.data_controller.SensorDataRepository")
+@patch("app.controllers.data_controller.MachineRepository")
+def test_get_machines_data_keyed_by_machine(machine_repo, sensor_repo):
+    """Test metadata and data are fetched once and keyed by machine"""
+    machine_repo.find_machines.return_value = MACHINES
+    sensor_repo.query_sensor_data_batch.return_value = {
+        "1": [{"value": 1.0}],
+        "2": [],
+    }
+
+    response, status = DataController.get_machines_data(
+        "1,2,9", None, None, "-1h", "now()", "5m"
+    )
+
+    assert status == 200
+    machine_repo.find_machines.assert_called_once()
+    sensor_repo.query_sensor_data_batch.assert_called_once_with(
+        [1, 2], "-1h", "now()", "5m"
+    )
+    assert response["missing_machine_ids"] == [9]
+    assert response["machines"]["1"]["data_points"] == 1
+    assert response["machines"]["2"]["machine_name"] == "Lathe"
+
+
+def test_get_machines_data_requires_selector():
+    """Test requests without IDs or selector are rejected"""
+    response, status = DataController.get_machines_data(
+        None, None, None, "-1h", "now()"
+    )
+    assert status == 400
+
+    response, status = DataController.get_machines_data(
+        "1,x", None, None, "-1h", "now()"
+    )
+    assert status == 400
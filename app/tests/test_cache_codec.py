@@ -0,0 +1,63 @@
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from app.services.cache_codec import (
+    CacheCodecError,
+    CacheCodecRegistry,
+    JSONCodec,
+)
+
+MACHINES = [
+    {
+        "id": 1,
+        "name": "CNC Machine A",
+        "location": "Factory A",
+        "sensor_type": "temperature",
+        "status": "active",
+        "created_at": datetime(2024, 12, 9, 10, 0, 0, 123456),
+        "updated_at": datetime(2024, 12, 9, 10, 0, tzinfo=timezone(timedelta(hours=7))),
+    }
+]
+
+
+def test_msgpack_round_trips_datetimes():
+    """Test naive and aware datetimes survive the binary codec unchanged"""
+    codec = CacheCodecRegistry("msgpack")
+    value = {"machines": MACHINES, "day": date(2024, 12, 9)}
+
+    encoded = codec.encode(value)
+
+    assert encoded[:4] == b"GC\x01M"
+    assert codec.decode(encoded) == value
+
+
+def test_json_codec_round_trips_timestamp_keys():
+    """Test the JSON fallback restores known datetime keys"""
+    codec = CacheCodecRegistry("json")
+
+    encoded = codec.encode(MACHINES)
+
+    assert encoded[:4] == b"GC\x01J"
+    assert codec.decode(encoded) == MACHINES
+
+
+def test_decode_legacy_json_without_header():
+    """Test values written before the header existed are still readable"""
+    codec = CacheCodecRegistry("msgpack")
+    legacy = '{"id": 1, "created_at": "2024-12-09T10:00:00"}'
+
+    assert codec.decode(legacy) == {"id": 1, "created_at": datetime(2024, 12, 9, 10)}
+
+
+def test_decode_rejects_unknown_version():
+    """Test unknown format versions are reported instead of misread"""
+    codec = CacheCodecRegistry("msgpack")
+
+    with pytest.raises(CacheCodecError):
+        codec.decode(b"GC\x09M\x80")
+
+
+def test_unknown_codec_falls_back_to_json():
+    """Test an unavailable preferred codec falls back to JSON"""
+    codec = CacheCodecRegistry("does-not-exist")
+
+    assert isinstance(codec.preferred, JSONCodec)
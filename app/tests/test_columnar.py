@@ -0,0 +1,81 @@
+from unittest.mock import patch
+from app.controllers.data_controller import DataController
+from app.utils.columnar import pack_series, to_columnar, unpack_series
+
+ROWS = [
+    {
+        "time": "2024-12-09T10:01:00+00:00",
+        "machine_id": "1",
+        "sensor_type": "temperature",
+        "unit": "C",
+        "field": "value",
+        "value": 20.5,
+    },
+    {
+        "time": "2024-12-09T10:02:00+00:00",
+        "machine_id": "1",
+        "sensor_type": "temperature",
+        "unit": "C",
+        "field": "value",
+        "value": 21.0,
+    },
+    {
+        "time": "2024-12-09T10:01:00+00:00",
+        "machine_id": "1",
+        "sensor_type": "pressure",
+        "unit": "bar",
+        "field": "value",
+        "value": 1.5,
+    },
+]
+
+
+def test_to_columnar_sends_metadata_once_per_series():
+    """Test rows are folded into per-series time/value arrays"""
+    series = to_columnar(ROWS)
+
+    assert len(series) == 2
+    assert series[0]["sensor_type"] == "temperature"
+    assert series[0]["time"] == [ROWS[0]["time"], ROWS[1]["time"]]
+    assert series[0]["value"] == [20.5, 21.0]
+
+
+def test_to_columnar_epoch_ms():
+    """Test optional integer epoch-millisecond times"""
+    series = to_columnar(ROWS, epoch_ms=True)
+
+    assert series[0]["time"] == [1733738460000, 1733738520000]
+
+
+def test_binary_series_round_trip():
+    """Test the packed float64 format decodes to the columnar shape"""
+    header = {"machine_id": 1, "interval": "1m"}
+
+    decoded_header, series = unpack_series(pack_series(header, ROWS))
+
+    assert decoded_header == header
+    assert series == to_columnar(ROWS, epoch_ms=True)
+
+
+@patch("app.controllers.data_controller.SensorDataRepository")
+@patch("app.controllers.data_controller.MachineRepository")
+def test_get_machine_data_formats(machine_repo, sensor_repo):
+    """Test columnar and binary response formats"""
+    machine_repo.get_machine_by_id.return_value = {"id": 1, "name": "Press"}
+    sensor_repo.query_sensor_data.return_value = ROWS
+
+    columnar, status = DataController.get_machine_data(
+        1, "-1h", "now()", "1m", response_format="columnar"
+    )
+    binary, _ = DataController.get_machine_data(
+        1, "-1h", "now()", "1m", response_format="binary"
+    )
+    invalid, invalid_status = DataController.get_machine_data(
+        1, "-1h", "now()", "1m", response_format="xml"
+    )
+
+    assert status == 200
+    assert "data" not in columnar
+    assert columnar["series"] == to_columnar(ROWS)
+    assert unpack_series(binary)[1] == to_columnar(ROWS, epoch_ms=True)
+    assert invalid_status == 400
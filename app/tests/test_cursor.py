@@ -0,0 +1,97 @@
+import base64
+from datetime import datetime, timezone
+from unittest.mock import patch
+import pytest
+from app.controllers.data_controller import DataController
+from app.utils.cursor import InvalidCursorError, decode_cursor, encode_cursor
+
+SINCE = datetime(2024, 12, 9, 10, 4, tzinfo=timezone.utc)
+
+
+def test_cursor_round_trip():
+    """Test a cursor decodes to the boundary it was issued for"""
+    token = encode_cursor(1, "2m", SINCE)
+
+    assert decode_cursor(token, 1, "2m") == SINCE
+
+
+def test_cursor_rejects_other_queries():
+    """Test cursors are bound to their machine and interval"""
+    token = encode_cursor(1, "2m", SINCE)
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, 2, "2m")
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, 1, "5m")
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor", 1, "2m")
+
+
+@pytest.mark.parametrize("since", ["1e999", "10" + "0" * 30, "-" + "9" * 20])
+def test_cursor_rejects_out_of_range_boundaries(since):
+    """Test crafted cursors with unrepresentable times are invalid, not errors"""
+    raw = f'{{"v":1,"m":1,"i":"2m","s":{since}}}'.encode()
+    token = base64.urlsafe_b64encode(raw).decode("ascii")
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, 1, "2m")
+
+
+@patch("app.controllers.data_controller.SensorDataRepository")
+@patch("app.controllers.data_controller.MachineRepository")
+def test_get_machine_data_with_cursor(machine_repo, sensor_repo):
+    """Test a cursor narrows the query and a new cursor is returned"""
+    machine_repo.get_machine_by_id.return_value = {"id": 1, "name": "Press"}
+    sensor_repo.query_sensor_data.return_value = []
+
+    response, status = DataController.get_machine_data(
+        1,
+        "2024-12-09T10:00:00Z",
+        "2024-12-09T10:20:00Z",
+        "2m",
+        encode_cursor(1, "2m", SINCE),
+    )
+
+    assert status == 200
+    assert response["since"] == "2024-12-09T10:04:00Z"
+    sensor_repo.query_sensor_data.assert_called_once_with(
+        1, "2024-12-09T10:04:00Z", "2024-12-09T10:20:00Z", "2m"
+    )
+    assert decode_cursor(response["next_cursor"], 1, "2m") == datetime(
+        2024, 12, 9, 10, 18, tzinfo=timezone.utc
+    )
+
+
+@patch("app.controllers.data_controller.SensorDataRepository")
+@patch("app.controllers.data_controller.MachineRepository")
+def test_get_machine_data_cursor_past_stop(machine_repo, sensor_repo):
+    """Test a cursor at or after the range stop returns an empty page"""
+    machine_repo.get_machine_by_id.return_value = {"id": 1, "name": "Press"}
+
+    response, status = DataController.get_machine_data(
+        1,
+        "2024-12-09T10:00:00Z",
+        "2024-12-09T10:04:00Z",
+        "2m",
+        encode_cursor(1, "2m", SINCE),
+    )
+
+    assert status == 200
+    assert response["data"] == []
+    sensor_repo.query_sensor_data.assert_not_called()
+    assert decode_cursor(response["next_cursor"], 1, "2m") == datetime(
+        2024, 12, 9, 10, 2, tzinfo=timezone.utc
+    )
+
+
+@patch("app.controllers.data_controller.MachineRepository")
+def test_get_machine_data_invalid_cursor(machine_repo):
+    """Test malformed cursors are rejected with 400"""
+    machine_repo.get_machine_by_id.return_value = {"id": 1, "name": "Press"}
+
+    response, status = DataController.get_machine_data(
+        1, "-20m", "now()", "2m", "garbage"
+    )
+
+    assert status == 400
+    assert response["status"] == "error"
@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from app.database import PostgresConnectionPool, PoolTimeoutError
+from app.repositories.user_repository import UserRepository
+
+
+def make_connection():
+    conn = MagicMock()
+    conn.closed = 0
+    conn.get_transaction_status.return_value = TRANSACTION_STATUS_IDLE
+    return conn
+
+
+@patch("app.database.get_postgres_connection")
+def test_pool_reuses_returned_connection(mock_connect):
+    """Test a returned connection is handed out again instead of reconnecting"""
+    mock_connect.side_effect = lambda: make_connection()
+    pool = PostgresConnectionPool(min_size=1, max_size=2, timeout=0.1)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert mock_connect.call_count == 1
+    assert pool.stats() == {"size": 1, "idle": 1, "in_use": 0, "max_size": 2}
+
+
+@patch("app.database.get_postgres_connection")
+def test_pool_checkout_timeout(mock_connect):
+    """Test checkout fails once the pool stays exhausted"""
+    mock_connect.side_effect = lambda: make_connection()
+    pool = PostgresConnectionPool(min_size=0, max_size=1, timeout=0.05)
+
+    conn = pool.getconn()
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn()
+
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+
+
+@patch("app.database.get_postgres_connection")
+def test_pool_replaces_closed_connection(mock_connect):
+    """Test a connection closed while idle is replaced on checkout"""
+    mock_connect.side_effect = lambda: make_connection()
+    pool = PostgresConnectionPool(min_size=1, max_size=1, timeout=0.1)
+
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.closed = 1
+
+    replacement = pool.getconn()
+    assert replacement is not conn
+    assert pool.stats()["size"] == 1
+
+
+@patch("app.database.get_postgres_connection")
+def test_pool_warm(mock_connect):
+    """Test warming opens min_size idle connections"""
+    mock_connect.side_effect = lambda: make_connection()
+    pool = PostgresConnectionPool(min_size=3, max_size=5, timeout=0.1)
+
+    pool.warm()
+
+    assert mock_connect.call_count == 3
+    assert pool.stats()["idle"] == 3
+
+
+@patch("app.repositories.user_repository.postgres_connection")
+@patch("app.repositories.user_repository.AuthService")
+def test_create_user_hashes_before_checkout(auth_service, connection):
+    """Test the slow password hash runs without holding a pooled connection"""
+    calls = []
+    auth_service.hash_password.side_effect = lambda password: calls.append("hash")
+    connection.side_effect = lambda: calls.append("checkout") or MagicMock()
+
+    UserRepository.create_user("operator", "secret", "Operator")
+
+    assert calls == ["hash", "checkout"]
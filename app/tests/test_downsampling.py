@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+import numpy as np
+from app.controllers.data_controller import DataController
+from app.utils.downsampling import downsample_rows, lttb_indices, minmax_indices
+
+START = datetime(2024, 12, 9, tzinfo=timezone.utc)
+
+
+def make_rows(values, sensor_type="temperature"):
+    return [
+        {
+            "time": (START + timedelta(minutes=index)).isoformat(),
+            "machine_id": "1",
+            "sensor_type": sensor_type,
+            "unit": "C",
+            "field": "value",
+            "value": value,
+        }
+        for index, value in enumerate(values)
+    ]
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    """Test LTTB returns the target count and keeps visually dominant points"""
+    y = np.sin(np.linspace(0, 10, 1000))
+    y[500] = 25.0
+    x = np.arange(1000, dtype=np.float64)
+
+    indices = lttb_indices(x, y, 50)
+
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+    assert 500 in indices
+
+
+def test_minmax_keeps_bucket_extremes():
+    """Test the min/max envelope keeps every bucket's lowest and highest point"""
+    y = np.zeros(1000)
+    y[123], y[877] = -5.0, 9.0
+
+    indices = minmax_indices(y, 20)
+
+    assert len(indices) <= 20
+    assert 123 in indices and 877 in indices
+
+
+def test_minmax_keeps_endpoints():
+    """Test the envelope always starts and ends at the series endpoints"""
+    y = np.arange(100, dtype=np.float64)
+    y[50] = -1.0
+
+    for max_points in (4, 5, 20):
+        indices = minmax_indices(y, max_points)
+        assert len(indices) <= max_points
+        assert indices[0] == 0 and indices[-1] == 99
+        assert 50 in indices
+
+
+def test_downsample_rows_per_series():
+    """Test each series is reduced independently and order is preserved"""
+    rows = make_rows(range(100)) + make_rows(range(5), sensor_type="pressure")
+
+    result = downsample_rows(rows, 10)
+
+    temperature = [row for row in result if row["sensor_type"] == "temperature"]
+    pressure = [row for row in result if row["sensor_type"] == "pressure"]
+    assert len(temperature) == 10
+    assert pressure == rows[100:]
+    assert result == sorted(result, key=rows.index)
+
+
+@patch("app.controllers.data_controller.SensorDataRepository")
+@patch("app.controllers.data_controller.MachineRepository")
+def test_get_machine_data_max_points(machine_repo, sensor_repo):
+    """Test max_points downsamples the response and rejects bad values"""
+    machine_repo.get_machine_by_id.return_value = {"id": 1, "name": "Press"}
+    sensor_repo.query_sensor_data.return_value = make_rows(range(500))
+
+    response, status = DataController.get_machine_data(
+        1, "-1d", "now()", "1m", max_points="50", downsample="minmax"
+    )
+    _, invalid_status = DataController.get_machine_data(
+        1, "-1d", "now()", "1m", max_points="2"
+    )
+    _, minmax_status = DataController.get_machine_data(
+        1, "-1d", "now()", "1m", max_points="3", downsample="minmax"
+    )
+
+    assert status == 200
+    assert response["data_points"] <= 50
+    assert response["downsampling"]["source_points"] == 500
+    assert invalid_status == 400
+    assert minmax_status == 400
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+import pytest
+from influxdb_client import Point, WritePrecision
+from app.repositories.machine_repository import SensorDataRepository
+from app.utils.line_protocol import format_sensor_line
+from app.utils.time_utils import iso_to_epoch_ns, to_epoch_ns
+
+
+def test_iso_to_epoch_ns_fixed_form():
+    """Test the cached fast path keeps nanoseconds and skips other forms"""
+    assert iso_to_epoch_ns("2024-12-09T10:00:00Z") == 1733738400000000000
+    assert iso_to_epoch_ns("2024-12-09T10:00:00.5Z") == 1733738400500000000
+    assert iso_to_epoch_ns("1969-12-31T23:59:59.25Z") == -750000000
+    assert iso_to_epoch_ns("2024-12-09T10:00:00+00:00") is None
+    assert iso_to_epoch_ns("2024-12-09T10:00:00.1234567890Z") is None
+    assert iso_to_epoch_ns("2024-12-09 10:00:00Z") is None
+
+
+def test_to_epoch_ns_matches_datetime_conversion():
+    """Test strings, datetimes and integers agree on the same instant"""
+    moment = datetime(2024, 12, 9, 10, 0, 0, 123456, tzinfo=timezone.utc)
+    expected = 1733738400123456000
+
+    assert to_epoch_ns(moment) == expected
+    assert to_epoch_ns(moment.replace(tzinfo=None)) == expected
+    assert to_epoch_ns(moment.astimezone(timezone(timedelta(hours=7)))) == expected
+    assert to_epoch_ns("2024-12-09T10:00:00.123456Z") == expected
+    assert to_epoch_ns("2024-12-09T17:00:00.123456+07:00") == expected
+    assert to_epoch_ns(expected) == expected
+
+
+@patch("app.repositories.machine_repository.influx_writer")
+def test_write_sensor_data_uses_epoch_ns(writer):
+    """Test points are written with integer nanosecond timestamps"""
+    SensorDataRepository.write_sensor_data(
+        [
+            {
+                "machine_id": 1,
+                "sensor_type": "temperature",
+                "value": 75,
+                "timestamp": 1733738400123456789,
+                "unit": "celsius",
+            },
+            {
+                "machine_id": 2,
+                "sensor_type": "speed",
+                "value": 1200.5,
+                "timestamp": "2024-12-09T10:00:00Z",
+                "unit": "rpm",
+            },
+        ]
+    )
+
+    lines, precision = writer.write.call_args.args
+    assert precision == WritePrecision.NS
+    assert lines == [
+        "sensor_data,machine_id=1,sensor_type=temperature,unit=celsius "
+        "value=75 1733738400123456789",
+        "sensor_data,machine_id=2,sensor_type=speed,unit=rpm "
+        "value=1200.5 1733738400000000000",
+    ]
+
+
+@pytest.mark.parametrize(
+    "machine_id, sensor_type, unit, value",
+    [
+        (1, "temperature", "celsius", 75.0),
+        ("7", "vibration axial", "mm/s", -1.5e-7),
+        (3, "a,b=c", "trailing\\", 1e22),
+        (4, "", "rpm", 0.1),
+        (5, "tab\tnew\nline", "%", float("nan")),
+    ],
+)
+def test_format_sensor_line_matches_point(machine_id, sensor_type, unit, value):
+    """Test lines are byte-identical to influxdb_client's Point"""
+    point = (
+        Point("sensor_data")
+        .tag("machine_id", str(machine_id))
+        .tag("sensor_type", sensor_type)
+        .tag("unit", unit)
+        .field("value", value)
+        .time(1733738400123456789, WritePrecision.NS)
+    )
+
+    assert (
+        format_sensor_line(machine_id, sensor_type, unit, value, 1733738400123456789)
+        == point.to_line_protocol()
+    )
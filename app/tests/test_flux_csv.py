@@ -0,0 +1,90 @@
+import io
+from unittest.mock import MagicMock, patch
+import pytest
+from influxdb_client.client.flux_csv_parser import (
+    FluxCsvParser,
+    FluxQueryException,
+    FluxSerializationMode,
+)
+from app.repositories.machine_repository import SensorDataRepository
+from app.utils.flux_csv import flux_time_to_iso, parse_flux_csv
+
+ANNOTATED = "\r\n".join(
+    [
+        "#datatype,string,long,dateTime:RFC3339,double,string,string,string,string",
+        "#group,false,false,false,false,true,true,true,true",
+        "#default,_result,,,,,,,",
+        ",result,table,_time,_value,_field,machine_id,sensor_type,unit",
+        ",,0,2024-12-09T10:01:00Z,20.5,value,1,temperature,C",
+        ",,0,2024-12-09T10:02:00.5Z,21,value,1,temperature,C",
+        ",,1,2024-12-09T10:01:00Z,1.5,value,1,pressure,bar",
+        "",
+        "#datatype,string,long,dateTime:RFC3339,long,string,string,string,string",
+        "#group,false,false,false,false,true,true,true,true",
+        "#default,_result,,,,,,,",
+        ",result,table,_time,_value,_field,machine_id,sensor_type,unit",
+        ',,2,2024-12-09T10:01:00Z,7,value,2,"vibration, axial",mm/s',
+        "",
+        "",
+    ]
+)
+
+
+def test_flux_time_to_iso_matches_isoformat():
+    """Test RFC3339 times are rendered like FluxRecord datetimes"""
+    assert flux_time_to_iso("2024-12-09T10:01:00Z") == "2024-12-09T10:01:00+00:00"
+    assert (
+        flux_time_to_iso("2024-12-09T10:01:00.5Z") == "2024-12-09T10:01:00.500000+00:00"
+    )
+    assert flux_time_to_iso("2024-12-09T10:01:00.000000001Z") == (
+        "2024-12-09T10:01:00+00:00"
+    )
+
+
+def test_parse_flux_csv_by_block():
+    """Test columns are typed per block, including quoted values"""
+    blocks = list(parse_flux_csv(ANNOTATED.encode(), ("_value", "sensor_type", "x")))
+
+    assert blocks[0]["_value"] == [20.5, 21.0, 1.5]
+    assert blocks[0]["x"] == [None, None, None]
+    assert blocks[1]["_value"] == [7]
+    assert blocks[1]["sensor_type"] == ["vibration, axial"]
+
+
+def test_parse_flux_csv_raises_query_errors():
+    """Test an in-band error table becomes a FluxQueryException"""
+    body = "#datatype,string,string\r\n,error,reference\r\n,query timeout,897\r\n"
+
+    with pytest.raises(FluxQueryException):
+        list(parse_flux_csv(body, ("_value",)))
+
+
+def test_csv_rows_match_record_rows():
+    """Test the CSV decoder produces exactly the FluxRecord rows"""
+    parser = FluxCsvParser(io.BytesIO(ANNOTATED.encode()), FluxSerializationMode.tables)
+    with parser:
+        list(parser.generator())
+    expected = [
+        SensorDataRepository._record_to_row(record)
+        for table in parser.table_list()
+        for record in table.records
+    ]
+
+    assert SensorDataRepository._csv_to_rows(ANNOTATED.encode()) == expected
+
+
+def test_run_query_uses_query_raw():
+    """Test the default decoder reads the raw CSV response"""
+    client = MagicMock()
+    client.query_api.return_value.query_raw.return_value.data = ANNOTATED.encode()
+
+    with patch(
+        "app.repositories.machine_repository.get_shared_influxdb_client",
+        return_value=client,
+    ), patch(
+        "app.repositories.machine_repository.config.INFLUXDB_QUERY_DECODER", "csv"
+    ):
+        rows = SensorDataRepository._run_query(["1"], "-1h", "now()", "1m", "mean")
+
+    assert len(rows) == 4
+    client.query_api.return_value.query.assert_not_called()
@@ -0,0 +1,68 @@
+import pytest
+from unittest.mock import Mock, patch
+from app.services.influx_writer_service import (
+    InfluxWriterService,
+    WriteBufferFullError,
+)
+
+
+@patch("app.services.influx_writer_service.get_shared_influxdb_client")
+def test_write_queues_records_on_batching_api(mock_client):
+    """Test records are handed to a single long-lived write_api"""
+    write_api = Mock()
+    mock_client.return_value.write_api.return_value = write_api
+    writer = InfluxWriterService()
+
+    writer.write(["m v=1 1"])
+    writer.write(["m v=2 2"])
+
+    assert mock_client.return_value.write_api.call_count == 1
+    assert write_api.write.call_count == 2
+
+
+@patch("app.services.influx_writer_service.config.WRITE_SPOOL_ENABLED", False)
+@patch("app.services.influx_writer_service.get_shared_influxdb_client")
+def test_write_buffer_is_bounded(mock_client):
+    """Test the writer rejects points beyond the buffer bound until batches complete"""
+    mock_client.return_value.write_api.return_value = Mock()
+    writer = InfluxWriterService()
+    writer.max_buffer_points = 3
+
+    writer.write(["a v=1 1", "a v=2 2"])
+    with pytest.raises(WriteBufferFullError):
+        writer.write(["a v=3 3", "a v=4 4"])
+
+    writer._on_success(("sensors", "myorg", "ns"), "a v=1 1\na v=2 2")
+    writer.write(["a v=3 3", "a v=4 4"])
+
+
+@patch("app.services.influx_writer_service.get_shared_influxdb_client")
+def test_flush_closes_and_recreates_write_api(mock_client):
+    """Test flush drains the current write_api and a new one is used afterwards"""
+    first, second = Mock(), Mock()
+    mock_client.return_value.write_api.side_effect = [first, second]
+    writer = InfluxWriterService()
+
+    writer.write(["a v=1 1"])
+    writer.flush()
+    writer.write(["a v=2 2"])
+
+    first.close.assert_called_once()
+    second.write.assert_called_once()
+
+
+@patch("app.services.influx_writer_service.config.WRITE_SPOOL_ENABLED", False)
+@patch("app.services.influx_writer_service.get_shared_influxdb_client")
+def test_write_lines_passes_bytes_through(mock_client):
+    """Test raw line protocol is queued as one record and counted by lines"""
+    write_api = Mock()
+    mock_client.return_value.write_api.return_value = write_api
+    writer = InfluxWriterService()
+    writer.max_buffer_points = 3
+
+    writer.write_lines(b"a v=1 1\na v=2 2", 2, "ms")
+    with pytest.raises(WriteBufferFullError):
+        writer.write(["a v=3 3", "a v=4 4"])
+
+    assert write_api.write.call_args.kwargs["record"] == b"a v=1 1\na v=2 2"
+    assert write_api.write.call_args.kwargs["write_precision"] == "ms"
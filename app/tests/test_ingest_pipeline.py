@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+import pytest
+from app.services.ingest_pipeline import IngestPipeline
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_pipeline_flushes_by_batch_size():
+    """Test decoded points reach the sink in batches"""
+    batches = []
+    pipeline = IngestPipeline(
+        decode=lambda topic, payload: payload.decode(),
+        sink=batches.append,
+        workers=1,
+        batch_size=3,
+        flush_interval=5.0,
+    )
+    pipeline.start()
+
+    for value in ("a", "b", "c"):
+        pipeline.submit("topic", value.encode())
+
+    assert wait_for(lambda: batches)
+    assert batches[0] == ["a", "b", "c"]
+    pipeline.stop()
+
+
+def test_pipeline_skips_invalid_messages():
+    """Test messages decoded to None are not written"""
+    batches = []
+    pipeline = IngestPipeline(
+        decode=lambda topic, payload: None if payload == b"bad" else payload,
+        sink=batches.append,
+        workers=1,
+        batch_size=10,
+        flush_interval=0.05,
+    )
+    pipeline.start()
+
+    pipeline.submit("topic", b"bad")
+    pipeline.submit("topic", b"good")
+
+    assert wait_for(lambda: batches)
+    assert batches == [[b"good"]]
+    pipeline.stop()
+
+
+def test_pipeline_drop_oldest_policy():
+    """Test the oldest queued message is discarded when the queue is full"""
+    pipeline = IngestPipeline(
+        decode=lambda topic, payload: payload,
+        sink=lambda points: None,
+        queue_size=2,
+        policy="drop_oldest",
+    )
+
+    for payload in (b"1", b"2", b"3"):
+        assert pipeline.submit("topic", payload)
+
+    queued = [pipeline._queue.get_nowait()[1] for _ in range(2)]
+    assert queued == [b"2", b"3"]
+
+
+def test_pipeline_spills_and_replays(tmp_path):
+    """Test overflow is spilled to disk and replayed once the queue drains"""
+    batches = []
+    pipeline = IngestPipeline(
+        decode=lambda topic, payload: payload,
+        sink=batches.append,
+        queue_size=1,
+        workers=1,
+        batch_size=100,
+        flush_interval=0.05,
+        policy="spill",
+        spill_dir=str(tmp_path),
+    )
+
+    pipeline.submit("topic", b"queued")
+    pipeline.submit("topic", b"spilled")
+    assert (tmp_path / IngestPipeline.SPILL_FILE).exists()
+
+    pipeline.start()
+    assert wait_for(lambda: sum(len(batch) for batch in batches) == 2)
+    assert sorted(point for batch in batches for point in batch) == [
+        b"queued",
+        b"spilled",
+    ]
+    pipeline.stop()
+
+
+def test_pipeline_spill_is_bounded(tmp_path):
+    """Test messages are dropped once the spill reaches spill_max_bytes"""
+    pipeline = IngestPipeline(
+        decode=lambda topic, payload: payload,
+        sink=lambda points: None,
+        queue_size=1,
+        policy="spill",
+        spill_dir=str(tmp_path),
+        spill_max_bytes=100,
+    )
+
+    assert pipeline.submit("topic", b"queued")
+    assert pipeline.submit("topic", b"spilled")
+    assert not pipeline.submit("topic", b"x" * 100)
+    assert (tmp_path / IngestPipeline.SPILL_FILE).read_bytes().count(b"\n") == 1
+
+
+def test_spill_replay_stops_with_pipeline(tmp_path):
+    """Test replay into a full queue gives up on stop and keeps the file"""
+    pipeline = IngestPipeline(
+        decode=lambda topic, payload: payload,
+        sink=lambda points: None,
+        queue_size=1,
+        flush_interval=0.01,
+        policy="spill",
+        spill_dir=str(tmp_path),
+    )
+    pipeline.submit("topic", b"queued")
+    pipeline.submit("topic", b"spilled")
+    (path,) = pipeline._rotate_spill_files()
+
+    replay = threading.Thread(target=pipeline._replay_spill_file, args=(path,))
+    replay.start()
+    pipeline._stop_event.set()
+    replay.join(1)
+
+    assert not replay.is_alive()
+    assert os.path.exists(path)
+
+
+def test_pipeline_rejects_unknown_policy():
+    """Test invalid backpressure policy configuration"""
+    with pytest.raises(ValueError):
+        IngestPipeline(decode=None, sink=None, policy="ignore")
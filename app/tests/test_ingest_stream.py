@@ -0,0 +1,70 @@
+import io
+import json
+from unittest.mock import patch
+from app.controllers.data_controller import DataController
+from app.services.influx_writer_service import WriteBufferFullError
+
+
+def point(machine_id=1, value=20.5):
+    return {
+        "machine_id": machine_id,
+        "sensor_type": "temperature",
+        "value": value,
+        "timestamp": "2024-12-09T10:00:00Z",
+        "unit": "C",
+    }
+
+
+def ndjson(*lines):
+    return io.BytesIO(
+        b"".join(
+            (line if isinstance(line, bytes) else json.dumps(line).encode()) + b"\n"
+            for line in lines
+        )
+    )
+
+
+@patch("app.controllers.data_controller.config.INGEST_STREAM_CHUNK_SIZE", 2)
+@patch("app.controllers.data_controller.SensorDataRepository")
+def test_stream_ingest_writes_chunks_and_reports_bad_lines(sensor_repo):
+    """Test valid lines are written in chunks and bad lines reported by number"""
+    stream = ndjson(point(1), b"{not json", point(2), {"machine_id": "x"}, point(3))
+
+    response, status = DataController.ingest_sensor_stream(stream, "gw-1")
+
+    assert status == 201
+    assert response["status"] == "partial"
+    assert response["accepted"] == 3
+    assert [error["line"] for error in response["errors"]] == [2, 4]
+    writes = sensor_repo.write_sensor_data.call_args_list
+    assert [len(call.args[0]) for call in writes] == [2, 1]
+
+
+@patch("app.controllers.data_controller.config.INGEST_STREAM_MAX_LINE_BYTES", 200)
+@patch("app.controllers.data_controller.SensorDataRepository")
+def test_stream_ingest_skips_oversized_lines(sensor_repo):
+    """Test an oversized line is rejected without losing the next line"""
+    stream = ndjson(b'{"padding": "' + b"x" * 1000 + b'"}', point(1))
+
+    response, status = DataController.ingest_sensor_stream(stream, "gw-1")
+
+    assert status == 201
+    assert response["accepted"] == 1
+    assert response["errors"][0]["line"] == 1
+
+
+@patch("app.controllers.data_controller.config.INGEST_STREAM_CHUNK_SIZE", 1)
+@patch("app.controllers.data_controller.SensorDataRepository")
+def test_stream_ingest_buffer_full_returns_resume_line(sensor_repo):
+    """Test a full write buffer stops the upload with the line to resume from"""
+    sensor_repo.write_sensor_data.side_effect = [True, WriteBufferFullError("full")]
+
+    response, status = DataController.ingest_sensor_stream(
+        ndjson(point(1), point(2), point(3)), "gw-1"
+    )
+    _, missing_gateway = DataController.ingest_sensor_stream(ndjson(point()), None)
+
+    assert status == 503
+    assert response["accepted"] == 1
+    assert response["resume_line"] == 2
+    assert missing_gateway == 400
@@ -0,0 +1,122 @@
+import gzip
+import io
+from unittest.mock import patch
+import pytest
+from app.controllers.data_controller import DataController
+from app.services.influx_writer_service import WriteBufferFullError
+from app.utils.line_protocol import (
+    LineProtocolError,
+    decompress,
+    parse_role_limits,
+    split_chunks,
+    validate,
+)
+
+LINES = [
+    b"sensor_data,machine_id=1,sensor_type=temperature,unit=C value=20.5 1733738400000000000",
+    b"sensor_data,machine_id=2,sensor_type=pressure,unit=bar value=-1.5e2",
+    rb"sensor_data,machine_id=3,sensor_type=vibration\ axial,unit=mm/s value=7",
+]
+BODY = b"\n".join(LINES) + b"\n"
+
+
+def test_validate_counts_valid_points():
+    """Test valid bodies are accepted and counted in one pass"""
+    assert validate(BODY) == 3
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        b"cpu,machine_id=1,sensor_type=temperature,unit=C value=20.5",
+        b"sensor_data,machine_id=1,sensor_type=temperature,unit=C,host=a value=1",
+        b"sensor_data,machine_id=x,sensor_type=temperature,unit=C value=1",
+        b"sensor_data,machine_id=1,sensor_type=temperature,unit=C value=1i",
+        b"sensor_data,machine_id=1,sensor_type=temperature,unit=C value=1,x=2",
+        b"sensor_data,machine_id=1,unit=C,sensor_type=temperature value=1",
+    ],
+)
+def test_validate_reports_invalid_lines(line):
+    """Test foreign measurements, tags, fields and types are rejected by line"""
+    with pytest.raises(LineProtocolError) as error:
+        validate(LINES[0] + b"\n" + line)
+
+    assert [entry["line"] for entry in error.value.errors] == [2]
+
+
+@pytest.mark.parametrize(
+    "line, precision",
+    [
+        (LINES[1] + b" 9999999999999999999", "ns"),
+        (LINES[1] + b" -9223372036854775809", "ns"),
+        (LINES[1] + b" 9223372036855", "ms"),
+        (LINES[1] + b" 9223372036854776", "us"),
+        (LINES[1] + b" 9223372037", "s"),
+        (LINES[1].replace(b"-1.5e2", b"1e999"), "ns"),
+        (LINES[1].replace(b"-1.5e2", b"-" + b"9" * 400), "ns"),
+    ],
+)
+def test_validate_reports_out_of_range_lines(line, precision):
+    """Test int64 overflowing timestamps and non-finite values are line errors"""
+    with pytest.raises(LineProtocolError) as error:
+        validate(LINES[2] + b"\n" + line, precision)
+
+    assert [entry["line"] for entry in error.value.errors] == [2]
+
+
+def test_validate_accepts_range_limits():
+    """Test timestamps at the int64 limits and large finite values pass"""
+    assert validate(LINES[1] + b" 9223372036854775807") == 1
+    assert validate(LINES[1] + b" -9223372036854775808") == 1
+    assert validate(LINES[1] + b" 9223372036854", "ms") == 1
+    assert validate(LINES[1].replace(b"-1.5e2", b"1.7e308")) == 1
+
+
+def test_decompress_limits_output():
+    """Test gzip bodies are inflated only up to the byte limit"""
+    assert decompress(gzip.compress(BODY), 1024) == BODY
+    with pytest.raises(LineProtocolError) as error:
+        decompress(gzip.compress(BODY * 100), 1024)
+    assert error.value.status_code == 413
+
+
+def test_split_chunks_are_line_aligned():
+    """Test chunks end on line boundaries and count their lines"""
+    chunks = list(split_chunks(BODY, 10))
+
+    assert [count for _, count in chunks] == [1, 1, 1]
+    assert b"\n".join(chunk for chunk, _ in chunks) == BODY.rstrip(b"\n")
+    assert parse_role_limits("Operator:10, Management:100") == {
+        "Operator": 10,
+        "Management": 100,
+    }
+
+
+@patch(
+    "app.controllers.data_controller.config.LINE_PROTOCOL_ROLE_LIMITS",
+    "Operator:2,Management:10",
+)
+@patch("app.controllers.data_controller.SensorDataRepository")
+def test_ingest_line_protocol(sensor_repo):
+    """Test gzip passthrough, per-role limits and buffer-full responses"""
+    response, status = DataController.ingest_line_protocol(
+        io.BytesIO(gzip.compress(BODY)), "gzip", "ns", "Management"
+    )
+    _, limited = DataController.ingest_line_protocol(
+        io.BytesIO(BODY), None, "ns", "Operator"
+    )
+    _, bad_precision = DataController.ingest_line_protocol(
+        io.BytesIO(BODY), None, "h", "Management"
+    )
+    sensor_repo.write_line_protocol.side_effect = WriteBufferFullError("full")
+    _, full = DataController.ingest_line_protocol(
+        io.BytesIO(BODY), None, "ns", "Management"
+    )
+
+    assert status == 201
+    assert response["accepted"] == 3
+    first_write = sensor_repo.write_line_protocol.call_args_list[0]
+    assert first_write.args == (BODY.rstrip(b"\n"), 3, "ns")
+    assert limited == 413
+    assert bad_precision == 400
+    assert full == 503
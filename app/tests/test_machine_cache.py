@@ -0,0 +1,93 @@
+from unittest.mock import patch
+from app.repositories.machine_repository import MachineRepository
+from app.services.cache_service import CacheService
+
+
+class FakeRedis:
+    """Just enough of a Redis client for CacheService's machine entries"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def sadd(self, key, member):
+        self.data.setdefault(key, set()).add(member)
+
+    def smembers(self, key):
+        return set(self.data.get(key, ()))
+
+    def exists(self, key):
+        return key in self.data
+
+    def expire(self, key, ttl):
+        pass
+
+    def eval(self, script, numkeys, key, token):
+        # Lock release script: delete the key if it still holds our token
+        if self.data.get(key) == token:
+            del self.data[key]
+
+    def publish(self, channel, message):
+        pass
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [
+            getattr(self.client, name)(*args, **kwargs)
+            for name, args, kwargs in self.calls
+        ]
+
+
+@patch("app.repositories.machine_repository.postgres_connection")
+@patch("app.services.cache_service.get_redis_client")
+def test_create_machine_drops_cached_selector_results(mock_redis, postgres):
+    """Test selector results are recomputed after a machine is created"""
+    mock_redis.return_value = FakeRedis()
+    cursor = (
+        postgres.return_value.__enter__.return_value.cursor.return_value.__enter__
+    ).return_value
+    first = {"id": 1, "name": "Press", "location": "Line A"}
+    second = {"id": 2, "name": "Lathe", "location": "Line A"}
+
+    with patch(
+        "app.repositories.machine_repository.cache_service",
+        CacheService(use_local_cache=False),
+    ):
+        cursor.fetchall.return_value = [first]
+        assert MachineRepository.find_machines(location="Line A") == [first]
+
+        cursor.fetchone.return_value = second
+        MachineRepository.create_machine(
+            {"name": "Lathe", "location": "Line A", "sensor_type": "x", "status": "on"}
+        )
+
+        cursor.fetchall.return_value = [first, second]
+        assert MachineRepository.find_machines(location="Line A") == [first, second]
@@ -0,0 +1,71 @@
+import json
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from influxdb_client.client.flux_table import FluxRecord
+from app.controllers.data_controller import DataController
+from app.repositories.machine_repository import SensorDataRepository
+
+
+def make_record(minute, value):
+    return FluxRecord(
+        table=0,
+        values={
+            "_time": datetime(2024, 12, 9, 10, minute, tzinfo=timezone.utc),
+            "_value": value,
+            "_field": "value",
+            "machine_id": "1",
+            "sensor_type": "temperature",
+            "unit": "C",
+        },
+    )
+
+
+def test_stream_sensor_data_uses_query_stream():
+    """Test rows are produced lazily from query_stream records"""
+    client = MagicMock()
+    client.query_api.return_value.query_stream.return_value = iter(
+        [make_record(1, 20.5), make_record(2, 21.0)]
+    )
+
+    with patch(
+        "app.repositories.machine_repository.get_shared_influxdb_client",
+        return_value=client,
+    ):
+        rows = SensorDataRepository.stream_sensor_data(1, "-1h", "now()", "1m")
+        client.query_api.return_value.query_stream.assert_not_called()
+        rows = list(rows)
+
+    assert [row["value"] for row in rows] == [20.5, 21.0]
+    assert rows[0]["time"] == "2024-12-09T10:01:00+00:00"
+    client.query_api.return_value.query.assert_not_called()
+
+
+@patch("app.controllers.data_controller.SensorDataRepository")
+@patch("app.controllers.data_controller.MachineRepository")
+def test_stream_machine_data_writes_ndjson(machine_repo, sensor_repo):
+    """Test one JSON document per line, with in-band errors"""
+
+    def rows(*args):
+        yield {"time": "t1", "value": 1.0}
+        yield {"time": "t2", "value": 2.0}
+        raise RuntimeError("connection reset")
+
+    machine_repo.get_machine_by_id.return_value = {"id": 1, "name": "Press"}
+    sensor_repo.stream_sensor_data.side_effect = rows
+
+    lines, status = DataController.stream_machine_data(1, "-1h", "now()", "1m")
+    documents = [json.loads(line) for line in "".join(lines).splitlines()]
+
+    assert status == 200
+    assert documents[:2] == [{"time": "t1", "value": 1.0}, {"time": "t2", "value": 2.0}]
+    assert documents[2]["status"] == "error"
+
+
+@patch("app.controllers.data_controller.MachineRepository")
+def test_stream_machine_data_unknown_machine(machine_repo):
+    """Test errors before streaming starts keep their status code"""
+    machine_repo.get_machine_by_id.return_value = None
+
+    response, status = DataController.stream_machine_data(9, "-1h", "now()")
+
+    assert status == 404
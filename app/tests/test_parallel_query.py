@@ -0,0 +1,98 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+import pytest
+from app.repositories.machine_repository import SensorDataRepository
+from app.services.query_executor import ParallelQueryExecutor
+
+START = datetime(2024, 11, 1, tzinfo=timezone.utc)
+
+
+def test_split_range_is_window_aligned():
+    """Test sub-ranges cover the range, respect the cap and align to windows"""
+    stop = START + timedelta(days=30, minutes=7)
+    every = timedelta(hours=1)
+
+    with patch(
+        "app.repositories.machine_repository.config.QUERY_PARALLELISM", 4
+    ), patch(
+        "app.repositories.machine_repository.config.QUERY_PARALLEL_MIN_SPAN", "1d"
+    ):
+        ranges = SensorDataRepository._split_range(START, stop, every)
+        short = SensorDataRepository._split_range(
+            START, START + timedelta(hours=30), every
+        )
+
+    assert len(ranges) == 4
+    assert ranges[0][0] == START and ranges[-1][1] == stop
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert all(bound.minute == 0 for _, bound in ranges[:-1])
+    assert short == [(START, START + timedelta(hours=30))]
+
+
+def test_executor_preserves_order_and_bounds_threads():
+    """Test results come back in call order from at most max_workers threads"""
+    executor = ParallelQueryExecutor(max_workers=3)
+    threads = set()
+
+    def work(value):
+        threads.add(threading.current_thread().name)
+        return value * 2
+
+    try:
+        assert executor.map(work, [(n,) for n in range(20)]) == [
+            n * 2 for n in range(20)
+        ]
+    finally:
+        executor.shutdown()
+    assert 1 <= len(threads) <= 3
+
+
+def test_executor_propagates_errors():
+    """Test a failing sub-range fails the whole query"""
+    executor = ParallelQueryExecutor(max_workers=2)
+
+    def work(value):
+        if value == 3:
+            raise RuntimeError("timeout")
+        return value
+
+    try:
+        with pytest.raises(RuntimeError):
+            executor.map(work, [(n,) for n in range(5)])
+    finally:
+        executor.shutdown()
+
+
+def test_fetch_range_merges_sub_ranges_in_order():
+    """Test concurrent sub-range results are merged into series-then-time order"""
+
+    def run_query(machine_ids, start, stop, interval, aggregate, tier=None):
+        return [
+            {"time": start, "machine_id": "1", "sensor_type": sensor, "value": 1.0}
+            for sensor in ("pressure", "temperature")
+        ]
+
+    with patch(
+        "app.repositories.machine_repository.config.ROLLUP_ENABLED", False
+    ), patch("app.repositories.machine_repository.config.QUERY_PARALLELISM", 4), patch(
+        "app.repositories.machine_repository.query_executor",
+        ParallelQueryExecutor(max_workers=4),
+    ), patch.object(
+        SensorDataRepository, "_run_query", side_effect=run_query
+    ) as mock_run:
+        rows = SensorDataRepository._fetch_range(
+            ["1"],
+            START,
+            START + timedelta(days=8),
+            timedelta(hours=1),
+            "1h",
+            "mean",
+            START + timedelta(days=9),
+        )
+
+    assert mock_run.call_count == 4
+    assert [row["sensor_type"] for row in rows] == ["pressure"] * 4 + [
+        "temperature"
+    ] * 4
+    assert [row["time"] for row in rows[:4]] == sorted(row["time"] for row in rows[:4])
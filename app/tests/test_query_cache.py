@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.services.query_cache_service import SensorQueryCache
+from app.utils.time_utils import (
+    ceil_time,
+    floor_time,
+    parse_duration,
+    parse_time,
+    to_rfc3339,
+)
+
+EVERY = timedelta(minutes=1)
+NOW = datetime(2024, 12, 9, 12, 0, 30, tzinfo=timezone.utc)
+
+
+class DictCache:
+    """Minimal stand-in for CacheService's bulk API"""
+
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+        self.counters = {}
+
+    def get_many(self, keys):
+        return {key: self.store[key] for key in keys if key in self.store}
+
+    def set_many(self, mapping, ttl=300):
+        self.store.update(mapping)
+        self.ttls.update(dict.fromkeys(mapping, ttl))
+
+    def get_counter(self, key):
+        return self.counters.get(key, 0)
+
+    def incr(self, key):
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+
+class FakeInflux:
+    """Emulates aggregateWindow: one row per epoch-aligned window, _stop as time"""
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, start, stop):
+        self.calls.append((start, stop))
+        rows = []
+        window = floor_time(start, EVERY)
+        while window < stop:
+            row_time = min(window + EVERY, stop)
+            rows.append(
+                {
+                    "time": row_time.isoformat(),
+                    "sensor_type": "temperature",
+                    "unit": "C",
+                    "field": "value",
+                    "value": (row_time - max(window, start)).total_seconds(),
+                }
+            )
+            window += EVERY
+        return rows
+
+
+@pytest.fixture
+def influx():
+    return FakeInflux()
+
+
+@pytest.fixture
+def query_cache():
+    return SensorQueryCache(cache=DictCache(), chunk_buckets=10, ttl=60, grace=0)
+
+
+def test_cached_query_matches_live_query(influx, query_cache):
+    """Test chunked results are identical to one live query"""
+    start = datetime(2024, 12, 9, 10, 3, 20, tzinfo=timezone.utc)
+    stop = datetime(2024, 12, 9, 12, 0, 10, tzinfo=timezone.utc)
+
+    expected = influx.fetch(start, stop)
+    first = query_cache.query(1, start, stop, EVERY, "mean", influx.fetch, now=NOW)
+    second = query_cache.query(1, start, stop, EVERY, "mean", influx.fetch, now=NOW)
+
+    assert first == expected
+    assert second == expected
+
+
+def test_repeat_query_only_fetches_open_edges(influx, query_cache):
+    """Test closed chunks are served from the cache on the second call"""
+    start = datetime(2024, 12, 9, 10, 3, 20, tzinfo=timezone.utc)
+    stop = NOW
+
+    query_cache.query(1, start, stop, EVERY, "mean", influx.fetch, now=NOW)
+    influx.calls.clear()
+    query_cache.query(1, start, stop, EVERY, "mean", influx.fetch, now=NOW)
+
+    # Partial leading bucket plus the still-open tail
+    assert influx.calls == [
+        (start, ceil_time(start, EVERY)),
+        (datetime(2024, 12, 9, 12, 0, tzinfo=timezone.utc), stop),
+    ]
+
+
+def test_cache_key_includes_aggregate_and_interval(influx, query_cache):
+    """Test different aggregates do not share cached chunks"""
+    start = datetime(2024, 12, 9, 10, 0, tzinfo=timezone.utc)
+    stop = datetime(2024, 12, 9, 11, 0, tzinfo=timezone.utc)
+
+    query_cache.query(1, start, stop, EVERY, "mean", influx.fetch, now=NOW)
+    influx.calls.clear()
+    query_cache.query(1, start, stop, EVERY, "max", influx.fetch, now=NOW)
+
+    assert influx.calls == [(start, stop)]
+
+
+def test_open_range_bypasses_cache(influx, query_cache):
+    """Test ranges with no closed chunk run as one live query"""
+    start = datetime(2024, 12, 9, 12, 0, 5, tzinfo=timezone.utc)
+
+    query_cache.query(1, start, NOW, EVERY, "mean", influx.fetch, now=NOW)
+
+    assert influx.calls == [(start, NOW)]
+    assert query_cache.cache.store == {}
+
+
+def test_invalidate_all_bumps_generation(influx, query_cache):
+    """Test invalidation makes every cached chunk miss without deleting keys"""
+    start = datetime(2024, 12, 9, 10, 0, tzinfo=timezone.utc)
+    stop = datetime(2024, 12, 9, 11, 0, tzinfo=timezone.utc)
+
+    query_cache.query(1, start, stop, EVERY, "mean", influx.fetch, now=NOW)
+    cached_keys = set(query_cache.cache.store)
+    query_cache.invalidate_all()
+    influx.calls.clear()
+    query_cache.query(1, start, stop, EVERY, "mean", influx.fetch, now=NOW)
+
+    assert influx.calls == [(start, stop)]
+    assert cached_keys < set(query_cache.cache.store)
+
+
+def test_recent_chunks_expire_sooner(influx):
+    """Test chunks that may still receive late points get the short TTL"""
+    query_cache = SensorQueryCache(
+        cache=DictCache(),
+        chunk_buckets=10,
+        ttl=3600,
+        grace=0,
+        recent_window=1800,
+        recent_ttl=60,
+    )
+    start = datetime(2024, 12, 9, 11, 0, tzinfo=timezone.utc)
+
+    query_cache.query(1, start, NOW, EVERY, "mean", influx.fetch, now=NOW)
+
+    ttls = {
+        int(key.rsplit(":", 1)[1]): ttl for key, ttl in query_cache.cache.ttls.items()
+    }
+    recent_from = int((NOW - timedelta(seconds=1800)).timestamp())
+    assert ttls == {
+        chunk_start: 60 if chunk_start + 600 > recent_from else 3600
+        for chunk_start in range(int(start.timestamp()), int(NOW.timestamp()) - 30, 600)
+    }
+    assert set(ttls.values()) == {60, 3600}
+
+
+def test_parse_time_and_duration():
+    """Test query time helpers"""
+    assert parse_duration("1h30m") == timedelta(minutes=90)
+    assert parse_time("-2m", NOW) == NOW - timedelta(minutes=2)
+    assert parse_time("2024-12-09T12:00:30Z") == NOW
+    assert to_rfc3339(NOW) == "2024-12-09T12:00:30Z"
+
+    with pytest.raises(ValueError):
+        parse_duration("1mo")
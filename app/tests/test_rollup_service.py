@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from app.repositories.machine_repository import SensorDataRepository
+from app.services.rollup_service import RollupService, parse_tiers
+
+NOW = datetime(2024, 12, 9, 12, 30, tzinfo=timezone.utc)
+
+
+def make_service():
+    return RollupService(
+        tiers=parse_tiers("1m:30d,1h:730d,1d:inf", "sensors"),
+        lag=timedelta(minutes=5),
+        start="",
+    )
+
+
+def test_parse_tiers():
+    """Test tier spec parsing and ordering"""
+    tiers = parse_tiers("1d:inf,1m:30d", "sensors")
+
+    assert [tier.name for tier in tiers] == ["1m", "1d"]
+    assert tiers[0].bucket == "sensors_1m"
+    assert tiers[0].retention == timedelta(days=30)
+    assert tiers[1].retention is None
+
+
+def test_select_tier_picks_coarsest_matching_tier():
+    """Test the coarsest tier dividing the interval is chosen"""
+    service = make_service()
+    day_start = datetime(2024, 11, 1, tzinfo=timezone.utc)
+    hour_start = datetime(2024, 11, 1, 6, tzinfo=timezone.utc)
+
+    assert service.select_tier(timedelta(days=1), "mean", day_start, NOW).name == "1d"
+    assert service.select_tier(timedelta(hours=6), "max", hour_start, NOW).name == "1h"
+    assert service.select_tier(timedelta(minutes=5), "mean", NOW, NOW).name == "1m"
+
+
+def test_select_tier_falls_back_to_raw():
+    """Test unsupported aggregates, unaligned starts and expired tiers"""
+    service = make_service()
+    unaligned = datetime(2024, 12, 9, 10, 0, 30, tzinfo=timezone.utc)
+    expired = NOW - timedelta(days=60)
+
+    assert service.select_tier(timedelta(hours=1), "median", NOW, NOW) is None
+    assert service.select_tier(timedelta(minutes=1), "mean", unaligned, NOW) is None
+    assert service.select_tier(timedelta(minutes=5), "mean", expired, NOW) is None
+
+
+def test_mean_tier_query_is_weighted():
+    """Test the tier mean is rebuilt from sums and counts"""
+    service = make_service()
+    query = service.build_query(
+        service.tiers[1], 'r["machine_id"] == "1"', "-1d", "now()", "6h", "mean"
+    )
+
+    assert 'from(bucket: "sensors_1h")' in query
+    assert "r.sum / r.count" in query
+
+
+def test_fetch_range_reads_raw_past_watermark():
+    """Test the tier is read up to its watermark and raw data after it"""
+    service = make_service()
+    start = datetime(2024, 12, 9, 10, 0, tzinfo=timezone.utc)
+
+    with patch("app.repositories.machine_repository.rollup_service", service), patch(
+        "app.repositories.machine_repository.config.ROLLUP_ENABLED", True
+    ), patch.object(SensorDataRepository, "_run_query", return_value=[]) as run_query:
+        SensorDataRepository._fetch_range(
+            ["1"], start, NOW, timedelta(hours=1), "1h", "mean", NOW
+        )
+
+    tier_call, raw_call = run_query.call_args_list
+    assert tier_call.kwargs["tier"].name == "1h"
+    assert tier_call.args[1:3] == ("2024-12-09T10:00:00Z", "2024-12-09T12:00:00Z")
+    assert raw_call.args[1:3] == ("2024-12-09T12:00:00Z", "2024-12-09T12:30:00Z")
@@ -0,0 +1,61 @@
+from unittest.mock import patch
+from app.services.auth_service import AuthService
+from app.services.telemetry_hub import EVICTED, TelemetryHub
+
+POINTS = [
+    {"factory_id": "f1", "machine_id": 1, "sensor_type": "temperature", "value": 1},
+    {"factory_id": "f1", "machine_id": 2, "sensor_type": "temperature", "value": 2},
+    {"factory_id": "f2", "machine_id": 3, "sensor_type": "pressure", "value": 3},
+]
+
+
+def make_hub(**kwargs):
+    hub = TelemetryHub(channel="test", **kwargs)
+    hub._ensure_listening = lambda: None
+    return hub
+
+
+def test_dispatch_routes_by_machine_and_factory():
+    """Test each subscription only receives its own points"""
+    hub = make_hub()
+    machine = hub.subscribe(machine_id=2)
+    factory = hub.subscribe(factory_id="f1")
+
+    hub.dispatch(POINTS)
+
+    assert machine.get(timeout=0) == [POINTS[1]]
+    assert factory.get(timeout=0) == POINTS[:2]
+    assert machine.get(timeout=0) is None
+
+
+def test_slow_subscriber_is_evicted():
+    """Test a full queue evicts the subscriber without blocking dispatch"""
+    hub = make_hub(queue_size=2)
+    slow = hub.subscribe(factory_id="f1")
+
+    for _ in range(3):
+        hub.dispatch(POINTS)
+
+    assert slow.evicted
+    assert slow.get(timeout=0) is EVICTED
+    assert hub.subscriber_count() == 0
+
+
+def test_stream_accepts_query_token(client):
+    """Test EventSource-style ?access_token= auth on stream endpoints"""
+    token = AuthService.create_access_token(
+        {"user_id": 1, "username": "op", "role": "Operator"}
+    )
+    hub = make_hub()
+
+    with patch("app.controllers.stream_controller.telemetry_hub", hub), patch(
+        "app.controllers.stream_controller.config.TELEMETRY_STREAM_MAX_SECONDS", 0
+    ):
+        unauthenticated = client.get("/api/v1/stream/factory/f1")
+        response = client.get(f"/api/v1/stream/factory/f1?access_token={token}")
+
+        assert unauthenticated.status_code == 401
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        assert response.get_data(as_text=True).startswith("retry:")
+    assert hub.subscriber_count() == 0
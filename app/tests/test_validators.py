@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+import pytest
+from marshmallow import EXCLUDE, ValidationError
+from app.models.schemas import SensorDataIngestSchema, SensorDataPointSchema
+from app.models.validators import SensorDataValidator, sensor_data_validator
+from app.services.mqtt_service import MQTTService
+
+# Datetime mode, for comparing results with the marshmallow schemas
+validator = SensorDataValidator()
+
+
+def point(**overrides):
+    data = {
+        "machine_id": 1,
+        "sensor_type": "temperature",
+        "value": 75.5,
+        "timestamp": "2024-12-09T10:00:00Z",
+        "unit": "celsius",
+    }
+    data.update(overrides)
+    return {key: value for key, value in data.items() if value is not ...}
+
+
+POINTS = [
+    point(),
+    point(machine_id="7", value="12.5"),
+    point(machine_id=7.9),
+    point(machine_id=True),
+    point(machine_id="x", value=None),
+    point(machine_id=...),
+    point(value=float("nan")),
+    point(value="inf", unit=3),
+    point(value=10**400),
+    point(value=[1]),
+    point(sensor_type=b"temperature"),
+    point(timestamp="2024-12-09 10:00"),
+    point(timestamp="2024-1-9T1:2:3.5+0530"),
+    point(timestamp="2024-12-09T10:00:00.1234567-01:30"),
+    point(timestamp="2024-12-09T10:00:00Z\n"),
+    point(timestamp="2024-02-30T10:00:00Z"),
+    point(timestamp="20241209T100000Z"),
+    point(timestamp=""),
+    point(extra="field"),
+    {"machine_id": 1, "foo": 2},
+    point(unit=..., extra="field"),
+    "not an object",
+]
+
+
+@pytest.mark.parametrize("data", POINTS)
+def test_validate_point_matches_schema(data):
+    """Test results and error dictionaries match SensorDataPointSchema"""
+    try:
+        expected = SensorDataPointSchema().load(data)
+    except ValidationError as e:
+        with pytest.raises(ValidationError) as error:
+            validator.validate_point(data)
+        assert error.value.messages == e.messages
+    else:
+        assert validator.validate_point(data) == expected
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"gateway_id": "gw-1", "timestamp": "2024-12-09T10:00:00Z", "data": POINTS},
+        {"gateway_id": "gw-1", "timestamp": "2024-12-09T10:00:00Z", "data": POINTS[:2]},
+        {"gateway_id": 5, "data": []},
+        {"timestamp": None, "data": "x", "other": 1},
+        [],
+    ],
+)
+def test_validate_ingest_matches_schema(payload):
+    """Test batch results and nested error dictionaries match SensorDataIngestSchema"""
+    try:
+        expected = SensorDataIngestSchema().load(payload)
+    except ValidationError as e:
+        with pytest.raises(ValidationError) as error:
+            validator.validate_ingest(payload)
+        assert error.value.messages == e.messages
+    else:
+        assert validator.validate_ingest(payload) == expected
+
+
+def test_epoch_timestamps_and_unknown_exclude():
+    """Test epoch seconds/ms/ns are accepted and EXCLUDE drops extra fields"""
+    expected = datetime(2024, 12, 9, 10, 0, tzinfo=timezone.utc)
+
+    for timestamp in (1733738400, 1733738400000, 1733738400000000000):
+        result = validator.validate_point(point(timestamp=timestamp))
+        assert result["timestamp"] == expected
+
+    result = validator.validate_point(point(extra=1), unknown=EXCLUDE)
+    assert "extra" not in result
+
+
+def test_mqtt_parse_message_uses_shared_validator():
+    """Test MQTT payloads get the same validation, with the topic's machine ID"""
+    service = MQTTService.__new__(MQTTService)
+    topic = "factory/f1/machine/7/telemetry"
+    valid = service.parse_message(
+        topic,
+        b'{"sensor_type": "speed", "value": 1200, "timestamp": 1733738400, "unit": "rpm"}',
+    )
+    invalid = service.parse_message(
+        topic,
+        b'{"sensor_type": "speed", "value": "fast", "timestamp": 1, "unit": "rpm"}',
+    )
+
+    assert valid["factory_id"] == "f1"
+    assert valid["machine_id"] == 7
+    assert valid["timestamp"] == 1733738400000000000
+    assert invalid is None
+
+
+@pytest.mark.parametrize(
+    "timestamp, expected",
+    [
+        ("2024-12-09T10:00:00.123456789Z", 1733738400123456789),
+        ("2024-12-09T11:00:00+01:00", 1733738400000000000),
+        ("2024-12-9T10:00Z", 1733738400000000000),
+        (1733738400.5, 1733738400500000000),
+        (1733738400123, 1733738400123000000),
+        ("2024-12-09T25:00:00Z", None),
+        ("3000-01-01T00:00:00Z", None),
+        (10**30, None),
+    ],
+)
+def test_epoch_ns_mode(timestamp, expected):
+    """Test the ingest singleton returns integer epoch nanoseconds"""
+    if expected is None:
+        with pytest.raises(ValidationError) as error:
+            sensor_data_validator.validate_point(point(timestamp=timestamp))
+        assert list(error.value.messages) == ["timestamp"]
+    else:
+        result = sensor_data_validator.validate_point(point(timestamp=timestamp))
+        assert result["timestamp"] == expected
@@ -0,0 +1,179 @@
+import os
+import time
+from unittest.mock import Mock, patch
+from influxdb_client.rest import ApiException
+from app.services.influx_writer_service import InfluxWriterService
+from app.services.write_spool import WriteSpool
+from ingest import claim_spool_slot
+
+
+class Recorder:
+    def __init__(self, fail_at=None):
+        self.records = []
+        self.fail_at = fail_at
+
+    def __call__(self, data, count, precision):
+        if len(self.records) == self.fail_at:
+            self.fail_at = None
+            raise ConnectionError("influxdb down")
+        self.records.append((data, count, precision))
+
+
+def ready():
+    return True
+
+
+def test_spool_rotates_segments_and_replays_in_order(tmp_path):
+    """Test records survive rotation and replay oldest first, then files go"""
+    spool = WriteSpool(str(tmp_path), segment_bytes=20, replay_rate=10**9)
+    for index in range(3):
+        assert spool.append(f"m v={index} {index}", 1, "ns")
+    spool.append(b"m v=3 3\nm v=4 4", 2, "ms")
+
+    assert len(os.listdir(tmp_path)) == 4
+    write = Recorder()
+    assert spool.replay(write, ready) == 5
+    assert [data for data, _, _ in write.records] == [
+        b"m v=0 0",
+        b"m v=1 1",
+        b"m v=2 2",
+        b"m v=3 3\nm v=4 4",
+    ]
+    assert write.records[-1][1:] == (2, "ms")
+    assert os.listdir(tmp_path) == []
+
+
+def test_replay_resumes_after_failed_write(tmp_path):
+    """Test a failing write leaves its record in the spool for the next round"""
+    spool = WriteSpool(str(tmp_path), replay_rate=10**9)
+    for index in range(3):
+        spool.append(f"m v={index} {index}", 1)
+
+    write = Recorder(fail_at=1)
+    assert spool.replay(write, ready) == 1
+    assert spool.replay(write, ready) == 2
+    assert [data for data, _, _ in write.records] == [
+        b"m v=0 0",
+        b"m v=1 1",
+        b"m v=2 2",
+    ]
+    assert spool.pending_segments() == 0
+
+
+def test_torn_tail_and_disk_bound(tmp_path):
+    """Test a torn last record is discarded and a full spool refuses records"""
+    spool = WriteSpool(str(tmp_path), max_bytes=60, replay_rate=10**9)
+    assert spool.append("m v=1 1", 1)
+    assert spool.append("m v=2 2", 1)
+    assert not spool.append("m v=3 3" * 10, 10)
+    spool.seal()
+
+    (segment,) = tmp_path.iterdir()
+    segment.write_bytes(segment.read_bytes()[:-3])
+    write = Recorder()
+    assert spool.replay(write, ready) == 1
+    assert write.records == [(b"m v=1 1", 1, "ns")]
+
+
+def test_recover_seals_segments_of_dead_processes(tmp_path):
+    """Test open and claimed segments of dead processes become replayable"""
+    writer = WriteSpool(str(tmp_path))
+    writer.append("m v=1 1", 1)
+    writer.seal()
+    (sealed,) = tmp_path.iterdir()
+    os.replace(sealed, tmp_path / "00000000000000000001-999999999.open")
+    (tmp_path / "00000000000000000002-1.999999999.replaying").write_bytes(b"")
+
+    spool = WriteSpool(str(tmp_path), replay_rate=10**9)
+    spool._recover()
+    assert sorted(os.listdir(tmp_path)) == [
+        "00000000000000000001-999999999.seg",
+        "00000000000000000002-1.seg",
+    ]
+    assert spool.replay(Recorder(), ready) == 1
+
+
+def test_replay_is_paced(tmp_path):
+    """Test replay does not exceed replay_rate points per second"""
+    spool = WriteSpool(str(tmp_path), replay_rate=200)
+    for _ in range(4):
+        spool.append("\n".join(["m v=1 1"] * 10), 10)
+
+    started = time.monotonic()
+    assert spool.replay(Recorder(), ready) == 40
+    assert time.monotonic() - started >= 0.19
+
+
+@patch("app.services.influx_writer_service.sensor_query_cache")
+@patch("app.services.influx_writer_service.get_shared_influxdb_client")
+def test_writer_spools_overflow_and_failed_batches(mock_client, query_cache, tmp_path):
+    """Test overflow and failed batches are spooled and replayed when healthy"""
+    write_api = Mock()
+    mock_client.return_value.write_api.return_value = write_api
+    with patch.multiple(
+        "app.services.influx_writer_service.config",
+        WRITE_SPOOL_DIR=str(tmp_path),
+        WRITE_SPOOL_REPLAY_RATE=10**9,
+    ):
+        writer = InfluxWriterService()
+    writer.max_buffer_points = 4
+    writer.spool.poll_interval = 3600
+
+    writer.write(["a v=1 1", "a v=2 2", "a v=3 3"])
+    writer.write(["a v=4 4", "a v=5 5"])
+    writer._on_error(("sensors", "myorg", "ns"), b"a v=1 1\na v=2 2\na v=3 3", None)
+
+    assert writer.spool.pending_segments() == 1
+    assert not writer._ready_to_replay()
+
+    writer._last_error = None
+    assert writer.spool.replay(writer._write_spooled, writer._ready_to_replay) == 2
+    assert write_api.write.call_args.kwargs["record"] == b"a v=4 4\na v=5 5"
+    writer._on_success(("sensors", "myorg", "ns"), b"a v=4 4\na v=5 5")
+    assert writer.spool.replay(writer._write_spooled, writer._ready_to_replay) == 3
+
+    writer._on_drained()
+    # Newer ingest still buffered behind the replay does not delay it
+    writer.write(["a v=6 6"])
+    query_cache.invalidate_all.assert_not_called()
+    writer._on_success(("sensors", "myorg", "ns"), b"a v=1 1\na v=2 2\na v=3 3")
+    query_cache.invalidate_all.assert_called_once()
+    writer.spool.stop()
+
+
+@patch("app.services.influx_writer_service.get_shared_influxdb_client")
+def test_writer_does_not_spool_rejected_batches(mock_client, tmp_path):
+    """Test 4xx rejections are counted as failed, not spooled; 429/5xx are spooled"""
+    with patch(
+        "app.services.influx_writer_service.config.WRITE_SPOOL_DIR", str(tmp_path)
+    ):
+        writer = InfluxWriterService()
+    conf = ("sensors", "myorg", "ns")
+
+    writer._on_error(conf, b"a v=1 1", ApiException(status=400))
+    writer._on_error(conf, b"a v=2 2", ApiException(status=422))
+
+    assert writer.spool.pending_segments() == 0
+    assert writer._ready_to_replay()
+
+    writer._on_error(conf, b"a v=3 3", ApiException(status=503))
+    writer._on_error(conf, b"a v=4 4", ApiException(status=429))
+    writer.spool.seal()
+
+    write = Recorder()
+    writer.spool.replay(write, ready)
+    assert [data for data, _, _ in write.records] == [b"a v=3 3", b"a v=4 4"]
+
+
+def test_ingest_workers_claim_separate_spool_slots(tmp_path):
+    """Test replicas sharing a volume lock distinct slots, reused once freed"""
+    first, first_lock = claim_spool_slot(str(tmp_path))
+    second, second_lock = claim_spool_slot(str(tmp_path))
+
+    assert os.path.basename(first) == "slot-0"
+    assert os.path.basename(second) == "slot-1"
+
+    first_lock.close()
+    replacement, _ = claim_spool_slot(str(tmp_path))
+    assert replacement == first
+    second_lock.close()
@@ -0,0 +1,148 @@
+import json
+import struct
+import sys
+from array import array
+from datetime import datetime
+
+SERIES_KEYS = ("machine_id", "sensor_type", "unit", "field")
+
+BINARY_MIMETYPE = "application/vnd.gonsters.series"
+BINARY_MAGIC = b"GSD1"
+_UINT32 = struct.Struct("<I")
+
+
+class _SeriesBuffer:
+    """Array-backed time and value columns of one series"""
+
+    __slots__ = ("meta", "times", "epoch_ms", "columns")
+
+    def __init__(self, meta, columns):
+        self.meta = meta
+        self.times = []
+        self.epoch_ms = array("q")
+        self.columns = {name: array("d") for name in columns}
+
+
+def _epoch_ms(time: str) -> int:
+    return int(datetime.fromisoformat(time).timestamp() * 1000)
+
+
+def _group(rows, epoch_ms: bool, columns=("value",)):
+    # Multi-aggregate rows carry one column per aggregate and no "field"
+    keys = SERIES_KEYS if "value" in columns else SERIES_KEYS[:-1]
+    series = {}
+    for row in rows:
+        key = tuple(row.get(name) for name in keys)
+        buffer = series.get(key)
+        if buffer is None:
+            buffer = series[key] = _SeriesBuffer(dict(zip(keys, key)), columns)
+        if epoch_ms:
+            buffer.epoch_ms.append(_epoch_ms(row["time"]))
+        else:
+            buffer.times.append(row["time"])
+        for name, column in buffer.columns.items():
+            column.append(row[name])
+    return list(series.values())
+
+
+def to_columnar(rows, epoch_ms: bool = False, columns=("value",)) -> list:
+    """
+    Convert rows to one entry per series with parallel time/value arrays
+
+    Series metadata (machine_id, sensor_type, unit, field) is sent once per
+    series instead of on every row.
+
+    Args:
+        rows: Rows as returned by SensorDataRepository
+        epoch_ms: Send times as integer epoch milliseconds instead of ISO strings
+        columns: Value columns to emit, e.g. the aggregates of a
+                 multi-aggregate query
+
+    Returns:
+        List of {**metadata, "time": [...], <column>: [...], ...}
+    """
+    return [
+        {
+            **buffer.meta,
+            "time": buffer.epoch_ms.tolist() if epoch_ms else buffer.times,
+            **{name: column.tolist() for name, column in buffer.columns.items()},
+        }
+        for buffer in _group(rows, epoch_ms, columns)
+    ]
+
+
+def _little_endian(buffer: array) -> bytes:
+    if sys.byteorder == "big":
+        buffer = array(buffer.typecode, buffer)
+        buffer.byteswap()
+    return buffer.tobytes()
+
+
+def pack_series(header: dict, rows) -> bytes:
+    """
+    Pack a response into the compact binary series format
+
+    Layout (little-endian): ``b"GSD1"``, uint32 header length, header JSON,
+    uint32 series count, then per series: uint32 metadata length, metadata
+    JSON, uint32 point count, int64 epoch-ms times, float64 values.
+    """
+    header_bytes = json.dumps(header).encode("utf-8")
+    series = _group(rows, epoch_ms=True)
+
+    parts = [
+        BINARY_MAGIC,
+        _UINT32.pack(len(header_bytes)),
+        header_bytes,
+        _UINT32.pack(len(series)),
+    ]
+    for buffer in series:
+        meta = json.dumps(buffer.meta).encode("utf-8")
+        parts += [
+            _UINT32.pack(len(meta)),
+            meta,
+            _UINT32.pack(len(buffer.epoch_ms)),
+            _little_endian(buffer.epoch_ms),
+            _little_endian(buffer.columns["value"]),
+        ]
+    return b"".join(parts)
+
+
+def unpack_series(data: bytes):
+    """
+    Decode pack_series output (reference implementation for clients)
+
+    Returns:
+        (header dict, list of {**metadata, "time": [...], "value": [...]})
+
+    Raises:
+        ValueError: If the data is not in the binary series format
+    """
+    if data[:4] != BINARY_MAGIC:
+        raise ValueError("Not a binary series payload")
+
+    def read_json(offset):
+        (length,) = _UINT32.unpack_from(data, offset)
+        start = offset + _UINT32.size
+        return json.loads(data[start : start + length]), start + length
+
+    header, offset = read_json(4)
+    (count,) = _UINT32.unpack_from(data, offset)
+    offset += _UINT32.size
+
+    series = []
+    for _ in range(count):
+        meta, offset = read_json(offset)
+        (points,) = _UINT32.unpack_from(data, offset)
+        offset += _UINT32.size
+
+        columns = []
+        for typecode in ("q", "d"):
+            column = array(typecode)
+            column.frombytes(data[offset : offset + points * column.itemsize])
+            if sys.byteorder == "big":
+                column.byteswap()
+            offset += points * column.itemsize
+            columns.append(column.tolist())
+
+        series.append({**meta, "time": columns[0], "value": columns[1]})
+    return header, series
@@ -0,0 +1,58 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a continuation token is malformed or does not match the query"""
+
+
+CURSOR_VERSION = 1
+
+
+def encode_cursor(machine_id, interval: str, since: datetime) -> str:
+    """
+    Build an opaque continuation token for incremental machine data polling
+
+    Args:
+        machine_id: Machine the cursor belongs to
+        interval: Aggregation interval of the query
+        since: First bucket boundary the next poll has to re-read
+
+    Returns:
+        URL-safe token string
+    """
+    payload = {
+        "v": CURSOR_VERSION,
+        "m": machine_id,
+        "i": interval,
+        "s": int(since.timestamp() * 1000),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str, machine_id, interval: str) -> datetime:
+    """
+    Decode a continuation token back to its ``since`` boundary
+
+    Raises:
+        InvalidCursorError: If the token is malformed or was issued for a
+            different machine or interval
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        since = datetime.fromtimestamp(int(payload["s"]) / 1000, tz=timezone.utc)
+        matches = (
+            payload["v"] == CURSOR_VERSION
+            and payload["m"] == machine_id
+            and payload["i"] == interval
+        )
+    except (ValueError, TypeError, KeyError, OverflowError, OSError):
+        raise InvalidCursorError("Invalid cursor")
+
+    if not matches:
+        raise InvalidCursorError("Cursor does not match this query")
+
+    return since
@@ -0,0 +1,117 @@
+from datetime import datetime
+import numpy as np
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets point selection
+
+    Keeps the first and last points and, for each of ``max_points - 2``
+    equal-width buckets in between, the point forming the largest triangle
+    with the previously selected point and the next bucket's average.
+
+    Returns:
+        Sorted indices of the selected points
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    counts = ends - starts
+
+    # Bucket averages; the last bucket's "next" point is the final point
+    avg_x = np.add.reduceat(x[: n - 1], starts) / counts
+    avg_y = np.add.reduceat(y[: n - 1], starts) / counts
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        ax, ay = x[selected], y[selected]
+        areas = np.abs(
+            (ax - next_x[bucket]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (next_y[bucket] - ay)
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+    return indices
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Min/max envelope point selection
+
+    Keeps the first and last points, like LTTB, and splits the points in
+    between into ``(max_points - 2) // 2`` buckets, keeping the lowest and
+    highest point of each, so spikes are never averaged away.
+
+    Returns:
+        Sorted, de-duplicated indices of the selected points
+    """
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+
+    buckets = (max_points - 2) // 2
+    if buckets < 1:
+        return np.array([0, n - 1])
+
+    inner = n - 2
+    bucket_ids = np.arange(inner) * buckets // inner
+    order = np.lexsort((y[1:-1], bucket_ids)) + 1
+    first = np.concatenate(([0], np.flatnonzero(np.diff(bucket_ids)) + 1))
+    last = np.concatenate((first[1:] - 1, [inner - 1]))
+    return np.unique(np.concatenate(([0, n - 1], order[first], order[last])))
+
+
+def downsample_rows(rows, max_points: int, method: str = "lttb") -> list:
+    """
+    Reduce every series in ``rows`` to at most ``max_points`` points
+
+    Args:
+        rows: Rows as returned by SensorDataRepository, ordered by time
+              within each series
+        max_points: Target number of points per series
+        method: "lttb" or "minmax"
+
+    Returns:
+        The selected rows, in their original order
+    """
+    series = {}
+    for position, row in enumerate(rows):
+        key = (row.get("machine_id"), row.get("sensor_type"), row.get("unit"))
+        series.setdefault(key, []).append(position)
+
+    keep = []
+    for positions in series.values():
+        if len(positions) <= max_points:
+            keep.extend(positions)
+            continue
+
+        y = np.fromiter(
+            (rows[position]["value"] for position in positions),
+            dtype=np.float64,
+            count=len(positions),
+        )
+        if method == "minmax":
+            selected = minmax_indices(y, max_points)
+        else:
+            x = np.fromiter(
+                (
+                    datetime.fromisoformat(rows[position]["time"]).timestamp()
+                    for position in positions
+                ),
+                dtype=np.float64,
+                count=len(positions),
+            )
+            selected = lttb_indices(x, y, max_points)
+        keep.extend(positions[index] for index in selected)
+
+    keep.sort()
+    return [rows[position] for position in keep]
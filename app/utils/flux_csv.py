@@ -0,0 +1,111 @@
+import csv
+import io
+from operator import itemgetter
+from influxdb_client import Dialect
+from influxdb_client.client.flux_csv_parser import FluxQueryException
+
+# Only the datatype annotation is needed to convert values; group/default
+# annotations are what FluxCsvParser uses to build FluxTable objects
+FLUX_CSV_DIALECT = Dialect(
+    header=True,
+    delimiter=",",
+    comment_prefix="#",
+    annotations=["datatype"],
+    date_time_format="RFC3339",
+)
+
+
+def flux_time_to_iso(value: str):
+    """
+    Convert a Flux RFC3339 UTC timestamp to datetime.isoformat() output
+
+    "2024-12-09T10:01:00Z" -> "2024-12-09T10:01:00+00:00"; fractions are cut
+    to microseconds and dropped when zero, as FluxRecord times would be.
+    """
+    if not value:
+        return None
+    dot = value.find(".")
+    if dot < 0:
+        return value[:-1] + "+00:00"
+    micros = (value[dot + 1 : -1] + "000000")[:6]
+    if micros == "000000":
+        return value[:dot] + "+00:00"
+    return f"{value[:dot]}.{micros}+00:00"
+
+
+def _convert(datatype: str, values) -> list:
+    if datatype == "double":
+        if "" in values:
+            return [float(value) if value else None for value in values]
+        return list(map(float, values))
+    if datatype in ("long", "unsignedLong"):
+        return [int(value) if value else None for value in values]
+    if datatype == "boolean":
+        return [value == "true" if value else None for value in values]
+    if datatype.startswith("dateTime"):
+        # Every series of a block shares the same window timestamps
+        converted = {value: flux_time_to_iso(value) for value in set(values)}
+        return list(map(converted.__getitem__, values))
+    return [value if value else None for value in values]
+
+
+def _block_columns(datatypes, header, rows, columns) -> dict:
+    """Extract and convert only the requested columns of a block of CSV rows"""
+    result = {}
+    for name in columns:
+        try:
+            index = header.index(name)
+        except ValueError:
+            result[name] = [None] * len(rows)
+            continue
+        values = list(map(itemgetter(index), rows))
+        result[name] = _convert(datatypes[index], values)
+    return result
+
+
+def parse_flux_csv(data, columns):
+    """
+    Decode an annotated Flux CSV response column by column
+
+    The response is cut into blocks (tables sharing one header, separated
+    by an empty line), each block is split into rows in one pass (str.split
+    when nothing is quoted, the csv module otherwise), and every requested
+    column is then converted with a single typed pass instead of building a
+    FluxRecord per row.
+
+    Args:
+        data: Response body (bytes or str) queried with FLUX_CSV_DIALECT
+        columns: Column names to return; missing columns are all None
+
+    Yields:
+        {column: [values...]} per block, rows in response order
+
+    Raises:
+        FluxQueryException: If InfluxDB reported an error in the response
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+
+    separator = "\r\n\r\n" if "\r\n" in data else "\n\n"
+    for block in data.split(separator):
+        if '"' in block:
+            rows = list(csv.reader(io.StringIO(block)))
+        else:
+            # Nothing is quoted, so plain splitting parses the same as csv
+            rows = [line.split(",") for line in block.splitlines()]
+        # Annotation rows start with "#..."; header and data rows leave the
+        # annotation column empty
+        start = 0
+        datatypes = None
+        while start < len(rows) and rows[start] and rows[start][0]:
+            if rows[start][0] == "#datatype":
+                datatypes = rows[start]
+            start += 1
+        if start + 1 >= len(rows):
+            continue
+
+        header = rows[start]
+        if header[1:3] == ["error", "reference"]:
+            error = rows[start + 1]
+            raise FluxQueryException(error[1], error[2])
+        yield _block_columns(datatypes, header, rows[start + 1 :], columns)
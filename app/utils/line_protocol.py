@@ -0,0 +1,214 @@
+import math
+import re
+import zlib
+from functools import lru_cache
+
+WRITE_PRECISIONS = ("ns", "us", "ms", "s")
+MAX_REPORTED_ERRORS = 20
+
+# Possessive quantifiers (Python 3.11+) keep the whole-body match from
+# saving backtracking state for every line
+_TAG_VALUE = rb"(?:[^,= \\\r\n]|\\[^\r\n])[^,= \\\r\n]*+(?:\\[^\r\n][^,= \\\r\n]*+)*+"
+_FLOAT = rb"[-+]?+(?:\d++(?:\.\d*+)?+|\.\d++)(?:[eE][-+]?+\d++)?+"
+
+# One sensor_data point: the allowed tags in sorted key order (as the
+# InfluxDB clients write them), a single float "value" field and an optional
+# integer timestamp
+_LINE = (
+    rb"sensor_data,machine_id=\d{1,18}+,sensor_type="
+    + _TAG_VALUE
+    + rb",unit="
+    + _TAG_VALUE
+    + rb" value="
+    + _FLOAT
+    + rb"(?: -?\d{1,19}+)?+"
+)
+LINE_PATTERN = re.compile(_LINE)
+BODY_PATTERN = re.compile(rb"(?:" + _LINE + rb"\n)*+" + _LINE)
+
+# Timestamps InfluxDB accepts: int64 nanoseconds, scaled down per precision
+_PRECISION_SCALE = {"ns": 1, "us": 10**3, "ms": 10**6, "s": 10**9}
+TIMESTAMP_RANGES = {
+    precision: (-(2**63) // scale + (-(2**63) % scale > 0), (2**63 - 1) // scale)
+    for precision, scale in _PRECISION_SCALE.items()
+}
+
+
+def _long_timestamp_pattern(limit: int):
+    # Timestamps with as many digits as the limit and the same or a higher
+    # leading digit, or more digits; only these can be out of range
+    digits = str(limit)
+    return re.compile(
+        rb"(?m) -?(?:[%s-9]\d{%d}|\d{%d,})$"
+        % (digits[0].encode(), len(digits) - 1, len(digits) + 1)
+    )
+
+
+_LONG_TIMESTAMP = {
+    precision: _long_timestamp_pattern(upper)
+    for precision, (_, upper) in TIMESTAMP_RANGES.items()
+}
+# Values with an exponent or hundreds of digits may overflow to infinity;
+# on a matched body anything but a space or newline after up to 299 digits
+# and dots is either of those
+_LARGE_VALUE = re.compile(rb" value=[-+]?+[\d.]{0,299}+[^ \n]")
+_SYNTAX_ERROR = (
+    "Expected sensor_data,machine_id=<int>,sensor_type=<str>,"
+    "unit=<str> value=<float> [timestamp]"
+)
+
+# Tag value escaping of influxdb_client's Point
+_ESCAPE_TAG = str.maketrans(
+    {",": r"\,", "=": r"\=", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r"}
+)
+
+
+class LineProtocolError(ValueError):
+    """Raised for line protocol bodies that cannot be accepted"""
+
+    def __init__(self, message, errors=None, status_code=400):
+        super().__init__(message)
+        self.errors = errors or []
+        self.status_code = status_code
+
+
+@lru_cache(maxsize=4096)
+def _tag(key: str, value: str) -> str:
+    # Machines, sensor types and units repeat, so escaping runs once per value
+    value = value.translate(_ESCAPE_TAG)
+    if value.endswith("\\"):
+        value += " "
+    return f",{key}={value}" if value else ""
+
+
+def format_sensor_line(machine_id, sensor_type, unit, value: float, epoch_ns: int):
+    """
+    Format one sensor_data point as line protocol
+
+    Produces the same line as influxdb_client's Point with an integer
+    nanosecond time, without building the Point: empty tags are left out
+    and whole floats lose their ".0".
+
+    Returns:
+        The line, or "" for a non-finite value (Point drops those too)
+    """
+    if not math.isfinite(value):
+        return ""
+    field = repr(value)
+    if field.endswith(".0"):
+        field = field[:-2]
+    return (
+        f"sensor_data{_tag('machine_id', str(machine_id))}"
+        f"{_tag('sensor_type', sensor_type)}{_tag('unit', unit)}"
+        f" value={field} {epoch_ns}"
+    )
+
+
+def parse_role_limits(spec: str) -> dict:
+    """
+    Parse "Role:max_lines,..." into {role: max_lines}
+
+    Raises:
+        ValueError: For malformed entries
+    """
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        role, _, limit = entry.partition(":")
+        if not role or not limit.isdigit():
+            raise ValueError(f"Invalid line protocol limit: {entry}")
+        limits[role.strip()] = int(limit)
+    return limits
+
+
+def decompress(data: bytes, max_bytes: int) -> bytes:
+    """
+    Gunzip a request body, refusing output larger than ``max_bytes``
+
+    Raises:
+        LineProtocolError: For corrupt data (400) or oversized output (413)
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        body = decompressor.decompress(data, max_bytes + 1)
+    except zlib.error:
+        raise LineProtocolError("Invalid gzip body")
+    if len(body) > max_bytes or decompressor.unconsumed_tail:
+        raise LineProtocolError(
+            f"Decompressed body exceeds {max_bytes} bytes", status_code=413
+        )
+    if not decompressor.eof:
+        raise LineProtocolError("Truncated gzip body")
+    return body
+
+
+def _range_error(line: bytes, precision: str):
+    """Error message for a well-formed line InfluxDB would still reject"""
+    value, _, timestamp = line.rpartition(b" value=")[2].partition(b" ")
+    if not math.isfinite(float(value)):
+        return "Value out of float range"
+    lower, upper = TIMESTAMP_RANGES[precision]
+    if timestamp and not lower <= int(timestamp) <= upper:
+        return f"Timestamp out of int64 nanosecond range for precision {precision}"
+    return None
+
+
+def validate(body: bytes, precision: str = "ns") -> int:
+    """
+    Check a line protocol body and count its points
+
+    The whole body is matched with one precompiled regex, so valid bodies
+    are checked without creating a Python object per line. Two more regex
+    scans look for values and timestamps large enough to be out of range;
+    only then, or to report errors, are lines looked at one by one.
+
+    Args:
+        body: Line protocol
+        precision: Timestamp precision, for the timestamp range check
+
+    Returns:
+        Number of points in the body
+
+    Raises:
+        LineProtocolError: With the first MAX_REPORTED_ERRORS invalid lines
+    """
+    body = body.rstrip(b"\n")
+    if not body:
+        raise LineProtocolError("No data points")
+    if (
+        BODY_PATTERN.fullmatch(body)
+        and not _LARGE_VALUE.search(body)
+        and not _LONG_TIMESTAMP[precision].search(body)
+    ):
+        return body.count(b"\n") + 1
+
+    errors = []
+    for number, line in enumerate(body.split(b"\n"), start=1):
+        if LINE_PATTERN.fullmatch(line):
+            message = _range_error(line, precision)
+        else:
+            message = _SYNTAX_ERROR
+        if message:
+            errors.append({"line": number, "errors": [message]})
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                break
+    if not errors:
+        return body.count(b"\n") + 1
+    raise LineProtocolError("Invalid line protocol", errors)
+
+
+def split_chunks(body: bytes, chunk_bytes: int):
+    """
+    Cut a validated body into line-aligned chunks of about ``chunk_bytes``
+
+    Yields:
+        (chunk, line_count) tuples, without trailing newlines
+    """
+    body = body.rstrip(b"\n")
+    start = 0
+    while start < len(body):
+        end = body.find(b"\n", start + chunk_bytes)
+        if end < 0:
+            end = len(body)
+        chunk = body[start:end]
+        yield chunk, chunk.count(b"\n") + 1
+        start = end + 1
@@ -0,0 +1,79 @@
+import fnmatch
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCache:
+    """
+    Thread-safe in-process LRU cache with per-entry TTL
+
+    Values are stored by reference, so callers must treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str, default=None):
+        """Get a value, or ``default`` if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: str, value, ttl: float = None):
+        """Store a value, evicting the least recently used entry when full"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_matching(self, pattern: str):
+        """Delete every key matching a glob-style pattern (e.g. "machine:*")"""
+        with self._lock:
+            matching = [
+                key for key in self._entries if fnmatch.fnmatchcase(key, pattern)
+            ]
+            for key in matching:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
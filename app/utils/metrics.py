@@ -0,0 +1,88 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class MetricsRegistry:
+    """In-process registry for counters, gauges and timing summaries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._summaries = {}
+        self._gauges = {}
+
+    def increment(self, name: str, value=1):
+        """Increment a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        """Record a sample (latency, batch size, ...) into a summary"""
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                self._summaries[name] = {
+                    "count": 1,
+                    "sum": value,
+                    "min": value,
+                    "max": value,
+                    "last": value,
+                }
+                return
+
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["last"] = value
+            if value < summary["min"]:
+                summary["min"] = value
+            if value > summary["max"]:
+                summary["max"] = value
+
+    def register_gauge(self, name: str, func):
+        """Register a callable evaluated each time a snapshot is taken"""
+        with self._lock:
+            self._gauges[name] = func
+
+    @contextmanager
+    def timer(self, name: str):
+        """Context manager recording elapsed wall time in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def snapshot(self) -> dict:
+        """
+        Return the current metric values
+
+        Returns:
+            Dictionary with counters, gauges and summaries (with averages)
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            summaries = {
+                name: dict(summary, avg=summary["sum"] / summary["count"])
+                for name, summary in self._summaries.items()
+            }
+
+        gauge_values = {}
+        for name, func in gauges.items():
+            try:
+                gauge_values[name] = func()
+            except Exception:
+                gauge_values[name] = None
+
+        return {"counters": counters, "gauges": gauge_values, "summaries": summaries}
+
+    def reset(self):
+        """Clear counters and summaries (registered gauges are kept)"""
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+
+# Singleton instance
+metrics = MetricsRegistry()
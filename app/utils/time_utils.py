@@ -0,0 +1,192 @@
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Range of InfluxDB timestamps (signed 64-bit nanoseconds)
+EPOCH_NS_MIN = -(2**63)
+EPOCH_NS_MAX = 2**63 - 1
+
+_DURATION_UNITS = {
+    "ns": timedelta(microseconds=0.001),
+    "us": timedelta(microseconds=1),
+    "ms": timedelta(milliseconds=1),
+    "s": timedelta(seconds=1),
+    "m": timedelta(minutes=1),
+    "h": timedelta(hours=1),
+    "d": timedelta(days=1),
+    "w": timedelta(weeks=1),
+}
+_DURATION_RE = re.compile(r"^(?:\d+(?:ns|us|ms|s|m|h|d|w))+$")
+_DURATION_PART_RE = re.compile(r"(\d+)(ns|us|ms|s|m|h|d|w)")
+
+
+def utcnow() -> datetime:
+    """Current time as an aware UTC datetime"""
+    return datetime.now(timezone.utc)
+
+
+def parse_duration(value: str) -> timedelta:
+    """
+    Parse a fixed-length Flux duration such as "5m", "1h30m" or "500ms"
+
+    Raises:
+        ValueError: For malformed or calendar durations ("1mo", "1y")
+    """
+    if not value or not _DURATION_RE.match(value):
+        raise ValueError(f"Invalid duration: {value!r}")
+
+    total = timedelta()
+    for amount, unit in _DURATION_PART_RE.findall(value):
+        total += int(amount) * _DURATION_UNITS[unit]
+
+    if total <= timedelta():
+        raise ValueError(f"Duration must be positive: {value!r}")
+    return total
+
+
+def parse_time(value, now: datetime = None) -> datetime:
+    """
+    Parse a query time into an aware UTC datetime
+
+    Accepts RFC3339 timestamps, "now()" and negative relative durations
+    such as "-1h" (relative to ``now``). Naive timestamps are taken as UTC.
+
+    Raises:
+        ValueError: If the value is not one of the supported forms
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        value = (value or "").strip()
+        now = now or utcnow()
+
+        if value == "now()":
+            return now
+        if value.startswith("-"):
+            return now - parse_duration(value[1:])
+
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def to_rfc3339(value: datetime) -> str:
+    """Format an aware datetime as an RFC3339 UTC string ("...Z")"""
+    return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _micros(value) -> int:
+    return value // timedelta(microseconds=1)
+
+
+def floor_time(value: datetime, step: timedelta) -> datetime:
+    """Round down to a multiple of ``step`` since the Unix epoch"""
+    offset = _micros(value - EPOCH)
+    return EPOCH + timedelta(microseconds=offset - offset % _micros(step))
+
+
+def ceil_time(value: datetime, step: timedelta) -> datetime:
+    """Round up to a multiple of ``step`` since the Unix epoch"""
+    floored = floor_time(value, step)
+    return floored if floored == value else floored + step
+
+
+def datetime_to_epoch_ns(value: datetime) -> int:
+    """Integer nanoseconds since the Unix epoch; naive datetimes are taken as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return _micros(value - EPOCH) * 1000
+
+
+def epoch_to_ns(value) -> int:
+    """
+    Scale an epoch timestamp to nanoseconds
+
+    The unit follows the magnitude: seconds below 1e11, milliseconds below
+    1e14, microseconds below 1e17, nanoseconds otherwise.
+
+    Raises:
+        ValueError, OverflowError: For nan or infinite values
+    """
+    magnitude = abs(value)
+    if magnitude < 1e11:
+        return int(value * 1_000_000_000)
+    if magnitude < 1e14:
+        return int(value * 1_000_000)
+    if magnitude < 1e17:
+        return int(value * 1_000)
+    return int(value)
+
+
+@lru_cache(maxsize=4096)
+def _epoch_seconds(prefix: str) -> int:
+    # Points of a batch share few distinct seconds, so most lookups hit
+    return _micros(datetime.fromisoformat(prefix + "+00:00") - EPOCH) // 1_000_000
+
+
+def iso_to_epoch_ns(value: str):
+    """
+    Fast path for the fixed UTC form "YYYY-MM-DDTHH:MM:SS[.fffffffff]Z"
+
+    This is what the simulator and gateways send. The date and time part is
+    parsed once per distinct second (cached) and the fraction is added as an
+    integer, so nanosecond digits are kept and no datetime is created.
+
+    Returns:
+        Epoch nanoseconds, or None if the string is not in the fixed form
+
+    Raises:
+        ValueError: For the fixed form with an impossible date or time
+    """
+    length = len(value)
+    if (
+        length < 20
+        or value[-1] != "Z"
+        or value[10] != "T"
+        or value[4] != "-"
+        or value[7] != "-"
+        or value[13] != ":"
+        or value[16] != ":"
+    ):
+        return None
+
+    nanos = 0
+    if length > 20:
+        fraction = value[20:-1]
+        if (
+            value[19] != "."
+            or not 0 < len(fraction) <= 9
+            or not fraction.isascii()
+            or not fraction.isdigit()
+        ):
+            return None
+        nanos = int(fraction) * 10 ** (9 - len(fraction))
+    return _epoch_seconds(value[:19]) * 1_000_000_000 + nanos
+
+
+def to_epoch_ns(value) -> int:
+    """
+    Normalize a data point timestamp to integer epoch nanoseconds
+
+    Integers are taken as epoch nanoseconds already (what the ingest
+    validator produces); datetimes and ISO 8601 strings are converted,
+    naive ones as UTC.
+
+    Raises:
+        ValueError: For strings that are not ISO 8601
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        return datetime_to_epoch_ns(value)
+
+    epoch_ns = iso_to_epoch_ns(value)
+    if epoch_ns is None:
+        epoch_ns = datetime_to_epoch_ns(
+            datetime.fromisoformat(value.replace("Z", "+00:00"))
+        )
+    return epoch_ns
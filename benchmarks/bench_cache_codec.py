@@ -0,0 +1,59 @@
+"""
+Benchmark cache codecs on a machines:all-shaped payload
+
+Compares the msgpack codec with the JSON fallback (json.dumps with
+DateTimeEncoder, json.loads plus the datetime restore walk).
+
+Usage:
+    python benchmarks/bench_cache_codec.py [machine_count] [repeat]
+"""
+
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cache_codec import CacheCodecRegistry
+
+
+def build_machines(count):
+    created = datetime(2024, 12, 9, 10, 0, 0)
+    return [
+        {
+            "id": index,
+            "name": f"Machine {index}",
+            "location": f"Factory {index % 5}",
+            "sensor_type": "temperature",
+            "status": "active",
+            "created_at": created + timedelta(seconds=index),
+            "updated_at": created + timedelta(seconds=index, microseconds=500),
+        }
+        for index in range(count)
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    machines = build_machines(count)
+
+    print(f"Payload: {count} machines, {repeat} iterations each")
+    print(f"{'codec':<10}{'size (KB)':>12}{'encode (ms)':>14}{'decode (ms)':>14}")
+
+    for name in ("json", "msgpack"):
+        codec = CacheCodecRegistry(name)
+        encoded = codec.encode(machines)
+        assert codec.decode(encoded) == machines
+
+        encode_ms = timeit.timeit(lambda: codec.encode(machines), number=repeat)
+        decode_ms = timeit.timeit(lambda: codec.decode(encoded), number=repeat)
+        print(
+            f"{name:<10}{len(encoded) / 1024:>12.1f}"
+            f"{encode_ms / repeat * 1000:>14.2f}{decode_ms / repeat * 1000:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark decoding an aggregated Flux query response into API rows
+
+Compares the FluxTable/FluxRecord path (query_api.query() plus
+_record_to_row per record) with the raw annotated CSV path
+(query_raw() plus column-wise parse_flux_csv) on the same synthetic
+response: several machine/sensor series of 1-minute buckets.
+
+Usage:
+    python benchmarks/bench_flux_decode.py [row_count] [repeat]
+"""
+
+import io
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from influxdb_client.client.flux_csv_parser import FluxCsvParser, FluxSerializationMode
+
+from app.repositories.machine_repository import SensorDataRepository
+
+HEADER = ",result,table,_start,_stop,_time,_value,_field,_measurement,machine_id,sensor_type,unit"
+DATATYPES = (
+    "#datatype,string,long,dateTime:RFC3339,dateTime:RFC3339,dateTime:RFC3339,"
+    "double,string,string,string,string,string"
+)
+GROUP = "#group,false,false,true,true,false,false,true,true,true,true,true"
+DEFAULT = "#default,_result,,,,,,,,,,"
+SERIES = [
+    (str(machine_id), sensor_type, unit)
+    for machine_id in range(1, 11)
+    for sensor_type, unit in (("temperature", "C"), ("pressure", "bar"))
+]
+
+
+def build_response(row_count, full_annotations):
+    """Annotated CSV as InfluxDB returns it for an aggregateWindow query"""
+    start = datetime(2024, 11, 1, tzinfo=timezone.utc)
+    per_series = row_count // len(SERIES)
+    times = [
+        (start + timedelta(minutes=index + 1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        for index in range(per_series)
+    ]
+    window = f"{times[0]},{times[-1]}"
+
+    lines = [DATATYPES]
+    if full_annotations:
+        lines += [GROUP, DEFAULT]
+    lines.append(HEADER)
+    for table, (machine_id, sensor_type, unit) in enumerate(SERIES):
+        tags = f"value,sensor_data,{machine_id},{sensor_type},{unit}"
+        lines += [
+            f",_result,{table},{window},{stamp},{20 + index % 100 / 7:.4f},{tags}"
+            for index, stamp in enumerate(times)
+        ]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+
+
+def decode_records(body):
+    parser = FluxCsvParser(io.BytesIO(body), FluxSerializationMode.tables)
+    with parser:
+        list(parser.generator())
+    return [
+        SensorDataRepository._record_to_row(record)
+        for table in parser.table_list()
+        for record in table.records
+    ]
+
+
+def decode_csv(body):
+    return SensorDataRepository._csv_to_rows(body)
+
+
+def best_of(function, body, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = function(body)
+        timings.append(time.perf_counter() - started)
+    return min(timings), rows
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    records_body = build_response(row_count, full_annotations=True)
+    csv_body = build_response(row_count, full_annotations=False)
+
+    print(f"Payload: {row_count} rows in {len(SERIES)} series, best of {repeat}")
+    print(f"{'decoder':<10}{'size (MB)':>12}{'decode (s)':>14}{'rows/s':>14}")
+
+    results = {}
+    for name, function, body in (
+        ("records", decode_records, records_body),
+        ("csv", decode_csv, csv_body),
+    ):
+        elapsed, rows = best_of(function, body, repeat)
+        results[name] = rows
+        print(
+            f"{name:<10}{len(body) / 1024 / 1024:>12.1f}"
+            f"{elapsed:>14.2f}{len(rows) / elapsed:>14,.0f}"
+        )
+
+    assert results["csv"] == results["records"]
+
+
+if __name__ == "__main__":
+    main()
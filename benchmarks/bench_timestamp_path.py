@@ -0,0 +1,84 @@
+"""
+Benchmark the ingest timestamp path from JSON point to line protocol
+
+Compares validating to datetimes and building influxdb_client Points (which
+convert the datetimes back to nanoseconds) with validating straight to
+integer epoch nanoseconds and formatting the lines directly, as
+SensorDataRepository.write_sensor_data does.
+
+Usage:
+    python benchmarks/bench_timestamp_path.py [point_count] [repeat]
+"""
+
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from influxdb_client import Point
+from app.models.validators import SensorDataValidator
+from app.utils.line_protocol import format_sensor_line
+from app.utils.time_utils import to_epoch_ns
+
+
+def build_points(count):
+    start = datetime(2024, 12, 9, 10, 0, 0)
+    return [
+        {
+            "machine_id": 1,
+            "sensor_type": "temperature",
+            "value": 65.5,
+            "timestamp": (start + timedelta(milliseconds=100 * index)).isoformat()
+            + "Z",
+            "unit": "celsius",
+        }
+        for index in range(count)
+    ]
+
+
+def datetime_path(items, validator=SensorDataValidator()):
+    points, _ = validator.validate_points(items)
+    return [
+        Point("sensor_data")
+        .tag("machine_id", str(point["machine_id"]))
+        .tag("sensor_type", point["sensor_type"])
+        .tag("unit", point["unit"])
+        .field("value", point["value"])
+        .time(point["timestamp"])
+        .to_line_protocol()
+        for point in points
+    ]
+
+
+def epoch_ns_path(items, validator=SensorDataValidator(epoch_ns=True)):
+    points, _ = validator.validate_points(items)
+    return [
+        format_sensor_line(
+            point["machine_id"],
+            point["sensor_type"],
+            point["unit"],
+            point["value"],
+            to_epoch_ns(point["timestamp"]),
+        )
+        for point in points
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    items = build_points(count)
+
+    assert datetime_path(items) == epoch_ns_path(items)
+
+    print(f"Points: {count}, {repeat} iterations each")
+    print(f"{'path':<12}{'time (ms)':>12}{'points/s':>14}")
+    for name, path in (("datetime", datetime_path), ("epoch-ns", epoch_ns_path)):
+        seconds = timeit.timeit(lambda: path(items), number=repeat) / repeat
+        print(f"{name:<12}{seconds * 1000:>12.1f}{count / seconds:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark appending to and replaying the on-disk write spool
+
+Appends line protocol batches the way the InfluxDB writer spools failed
+batches, then replays them unpaced to measure raw spool throughput.
+
+Usage:
+    python benchmarks/bench_write_spool.py [point_count] [batch_size]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.write_spool import WriteSpool
+from app.utils.line_protocol import format_sensor_line
+
+
+def build_batch(batch_size):
+    start_ns = 1733738400000000000
+    return "\n".join(
+        format_sensor_line(
+            index % 50 + 1,
+            "temperature",
+            "celsius",
+            65.0 + index % 200 / 10,
+            start_ns + index * 1_000_000,
+        )
+        for index in range(batch_size)
+    ).encode("utf-8")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    batch = build_batch(batch_size)
+    batches = count // batch_size
+
+    with tempfile.TemporaryDirectory() as directory:
+        spool = WriteSpool(
+            directory,
+            segment_bytes=16 * 1024 * 1024,
+            max_bytes=1 << 40,
+            replay_rate=float("inf"),
+        )
+
+        started = time.perf_counter()
+        for _ in range(batches):
+            spool.append(batch, batch_size)
+        append_seconds = time.perf_counter() - started
+        size = spool.disk_usage()
+        segments = spool.pending_segments()
+
+        replayed = []
+        started = time.perf_counter()
+        points = spool.replay(
+            lambda data, lines, precision: replayed.append(lines), lambda: True
+        )
+        replay_seconds = time.perf_counter() - started
+
+    assert points == batches * batch_size
+    print(
+        f"Spool: {points} points in {batches} batches, "
+        f"{size / 1024 / 1024:.1f} MiB over {segments} segments"
+    )
+    print(f"{'phase':<8}{'time (ms)':>12}{'points/s':>14}{'MiB/s':>10}")
+    for name, seconds in (("append", append_seconds), ("replay", replay_seconds)):
+        print(
+            f"{name:<8}{seconds * 1000:>12.1f}{points / seconds:>14,.0f}"
+            f"{size / 1024 / 1024 / seconds:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Gunicorn server hooks
+
+Gunicorn loads ./gunicorn.conf.py automatically; command line options from
+the Dockerfile still apply on top of the settings here.
+"""
+
+import os
+
+# Live telemetry streams (SSE) keep their request open for minutes. Threaded
+# workers serve them alongside regular requests; TELEMETRY_MAX_SUBSCRIBERS
+# must stay below the thread count so streams cannot starve the API.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 32))
+
+
+def post_fork(server, worker):
+    """Warm per-worker resources once the worker process exists"""
+    from app.database import get_postgres_pool
+
+    try:
+        get_postgres_pool().warm()
+    except Exception as e:
+        server.log.warning(
+            f"Failed to warm PostgreSQL pool in worker {worker.pid}: {e}"
+        )
+
+
+def worker_exit(server, worker):
+    """Flush buffered InfluxDB points before the worker goes away"""
+    from app.services.influx_writer_service import influx_writer
+
+    influx_writer.close()
@@ -0,0 +1,102 @@
+"""
+Ingestion worker - runs only the MQTT consumer and the InfluxDB writer
+
+The HTTP app (run.py / gunicorn) never subscribes to MQTT. Run one or more
+of these processes instead; with MQTT_SHARED_GROUP set they join the same
+shared subscription and split the telemetry load between them.
+
+With INGEST_SPOOL_ROOT set, each worker locks its own slot directory
+under it for WRITE_SPOOL_DIR and MQTT_SPILL_DIR, so replicas can share one
+volume.
+
+Usage:
+    python ingest.py
+"""
+
+import fcntl
+import os
+import signal
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def claim_spool_slot(root):
+    """
+    Lock the first free ``slot-<n>`` directory under ``root``
+
+    Replicas do not share a PID namespace, so they must not share spool
+    directories; a replacement worker takes over (and replays) the slot of
+    one that stopped. The lock is held until the process exits.
+
+    Returns:
+        (slot directory, open lock file)
+    """
+    slot = 0
+    while True:
+        directory = os.path.join(root, f"slot-{slot}")
+        os.makedirs(directory, exist_ok=True)
+        lock_file = open(os.path.join(directory, ".lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            slot += 1
+            continue
+        return directory, lock_file
+
+
+# Before app.config reads the spool directories
+if os.getenv("INGEST_SPOOL_ROOT"):
+    SPOOL_SLOT, _slot_lock = claim_spool_slot(os.environ["INGEST_SPOOL_ROOT"])
+    os.environ["WRITE_SPOOL_DIR"] = os.path.join(SPOOL_SLOT, "write-spool")
+    os.environ["MQTT_SPILL_DIR"] = os.path.join(SPOOL_SLOT, "mqtt-spill")
+
+from app.config import config
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+from app.services.mqtt_service import mqtt_service
+from app.services.influx_writer_service import influx_writer
+
+
+def main():
+    """Run the MQTT ingestion loop until SIGINT/SIGTERM"""
+    stop_event = threading.Event()
+
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, stopping ingestion worker")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    logger.info(
+        "Starting ingestion worker",
+        extra={
+            "extra_data": {
+                "topic": mqtt_service.topic,
+                "protocol": config.MQTT_PROTOCOL,
+                "pid": os.getpid(),
+                "spool_dir": config.WRITE_SPOOL_DIR,
+            }
+        },
+    )
+    # Starts replaying points spooled by a previous run right away
+    influx_writer.start()
+    mqtt_service.connect()
+
+    try:
+        while not stop_event.wait(config.INGEST_METRICS_LOG_INTERVAL):
+            logger.info(
+                "Ingestion worker metrics",
+                extra={"extra_data": {"metrics": metrics.snapshot()}},
+            )
+    finally:
+        mqtt_service.disconnect()
+        influx_writer.close()
+        logger.info("Ingestion worker stopped")
+
+
+if __name__ == "__main__":
+    main()
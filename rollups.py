@@ -0,0 +1,44 @@
+"""
+Rollup tier management - creates the downsampling buckets and InfluxDB
+tasks, and backfills tiers for data written before the tasks existed
+
+Usage:
+    python rollups.py setup
+    python rollups.py backfill --start -30d [--stop now()]
+
+After setup and backfill, set ROLLUP_ENABLED=true (and ROLLUP_START to the
+backfill start if older raw data has no rollups) so queries use the tiers.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.rollup_service import rollup_service
+from app.utils.logger import logger
+from app.utils.time_utils import parse_time, utcnow
+
+
+def main():
+    """Run a rollup management command"""
+    parser = argparse.ArgumentParser(description="Manage sensor data rollup tiers")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("setup", help="Create or update tier buckets and tasks")
+    backfill = commands.add_parser("backfill", help="Compute tiers for past data")
+    backfill.add_argument("--start", required=True, help='RFC3339 time or "-30d"')
+    backfill.add_argument("--stop", default="now()", help='RFC3339 time or "now()"')
+    args = parser.parse_args()
+
+    if args.command == "setup":
+        rollup_service.ensure_tiers()
+    else:
+        now = utcnow()
+        rollup_service.backfill(parse_time(args.start, now), parse_time(args.stop, now))
+
+    logger.info(f"Rollup {args.command} finished")
+
+
+if __name__ == "__main__":
+    main()
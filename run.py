@@ -6,7 +6,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from app import create_app
 from app.database import init_postgres_schema
 from app.utils.logger import logger
-from app.services.mqtt_service import mqtt_service
+from app.services.influx_writer_service import influx_writer
 
 app = create_app()
 
@@ -17,9 +17,6 @@ def init_app():
             init_postgres_schema()
             logger.info("Application initialized successfully")
 
-            mqtt_service.connect()
-            logger.info("MQTT service started")
-
     except Exception as e:
         logger.error(f"Failed to initialize application: {e}")
         raise
@@ -32,5 +29,5 @@ if __name__ == '__main__':
         app.run(host='0.0.0.0', port=5000, debug=True)
     except KeyboardInterrupt:
         logger.info("Shutting down application...")
-        mqtt_service.disconnect()
+        influx_writer.close()
         logger.info("Application stopped")
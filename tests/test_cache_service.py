@@ -1,6 +1,16 @@
+import json
+import time
 import pytest
 from unittest.mock import Mock, patch
-from app.services.cache_service import CacheService, cache_aside
+from app.services.cache_service import (
+    ENTRY_MARKER,
+    CacheService,
+    cache_aside,
+    cache_codec,
+    invalidation_listener,
+    local_cache,
+)
+from app.utils.local_cache import LocalCache
 
 
 class TestCacheService:
@@ -82,3 +92,282 @@ class TestCacheService:
         assert result1 == {"result": "value1"}
         assert call_count == 1
         mock_client.setex.assert_called_once()
+
+
+@pytest.fixture(autouse=True)
+def clear_local_cache():
+    """Start every test with an empty process-wide L1 cache"""
+    local_cache.clear()
+    yield
+    local_cache.clear()
+
+
+class TestLocalCache:
+    """Test cases for the in-process L1 cache"""
+
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted first"""
+        cache = LocalCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """Test expired entries are not returned"""
+        cache = LocalCache(max_entries=10, ttl=60)
+        cache.set("a", 1, ttl=0)
+
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_delete_matching(self):
+        """Test glob-style invalidation"""
+        cache = LocalCache()
+        cache.set("machine:1", 1)
+        cache.set("machines:all", [])
+
+        cache.delete_matching("machine:*")
+
+        assert cache.get("machine:1") is None
+        assert cache.get("machines:all") == []
+
+
+class TestTwoTierCache:
+    """Test cases for L1 in front of Redis"""
+
+    @patch('app.services.cache_service.get_redis_client')
+    def test_second_get_served_from_l1(self, mock_redis):
+        """Test a Redis hit populates L1 and skips Redis next time"""
+        mock_client = Mock()
+        mock_client.get.return_value = '{"id": 1, "name": "Machine A"}'
+        mock_redis.return_value = mock_client
+
+        cache = CacheService(use_local_cache=True)
+        first = cache.get("machine:1")
+        second = cache.get("machine:1")
+
+        assert first == second == {"id": 1, "name": "Machine A"}
+        mock_client.get.assert_called_once_with("machine:1")
+
+    @patch('app.services.cache_service.get_redis_client')
+    def test_delete_broadcasts_invalidation(self, mock_redis):
+        """Test deletes drop the L1 copy and publish to other workers"""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+
+        cache = CacheService(use_local_cache=True)
+        cache.set("machine:1", {"id": 1})
+        cache.delete("machine:1")
+
+        assert local_cache.get("machine:1") is None
+        channel, message = mock_client.publish.call_args[0]
+        assert json.loads(message)["keys"] == ["machine:1"]
+
+    @patch('app.services.cache_service.get_redis_client')
+    def test_incr_invalidates_cached_counter(self, mock_redis):
+        """Test counters are served from L1 until incr() broadcasts a change"""
+        mock_client = Mock()
+        mock_client.get.return_value = b"4"
+        mock_client.incr.return_value = 5
+        mock_redis.return_value = mock_client
+
+        cache = CacheService(use_local_cache=True)
+        assert cache.get_counter("sensorq:generation") == 4
+        assert cache.get_counter("sensorq:generation") == 4
+        mock_client.get.assert_called_once_with("sensorq:generation")
+
+        assert cache.incr("sensorq:generation") == 5
+        assert local_cache.get("sensorq:generation") is None
+        channel, message = mock_client.publish.call_args[0]
+        assert json.loads(message)["keys"] == ["sensorq:generation"]
+
+    def test_listener_drops_invalidated_keys(self):
+        """Test invalidations from other workers evict L1 entries"""
+        local_cache.set("machine:1", {"id": 1})
+        local_cache.set("machine:2", {"id": 2})
+
+        invalidation_listener._on_message(
+            {"data": json.dumps({"keys": ["machine:1"], "pattern": None})}
+        )
+
+        assert local_cache.get("machine:1") is None
+        assert local_cache.get("machine:2") == {"id": 2}
+
+
+class TestTagInvalidation:
+    """Test cases for tag-indexed invalidation"""
+
+    @patch('app.services.cache_service.get_redis_client')
+    def test_set_with_tags_indexes_key(self, mock_redis):
+        """Test tagged keys are added to each tag set"""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        pipe = mock_client.pipeline.return_value
+
+        cache = CacheService(use_local_cache=False)
+        cache.set("machine:1", {"id": 1}, ttl=300, tags=["machines", "machine:1"])
+
+        pipe.setex.assert_called_once()
+        pipe.sadd.assert_any_call("tag:machines", "machine:1")
+        pipe.sadd.assert_any_call("tag:machine:1", "machine:1")
+        pipe.execute.assert_called_once()
+
+    @patch('app.services.cache_service.get_redis_client')
+    def test_invalidate_tags_deletes_members_without_keys(self, mock_redis):
+        """Test tag invalidation deletes members and never scans with KEYS"""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        pipe = mock_client.pipeline.return_value
+        pipe.execute.return_value = [{"machine:1", "machines:all"}, 1]
+
+        cache = CacheService(use_local_cache=False)
+        cache.invalidate_tags("machines")
+
+        mock_client.delete.assert_called_once_with("machine:1", "machines:all")
+        mock_client.keys.assert_not_called()
+
+    @patch('app.services.cache_service.get_redis_client')
+    def test_invalidate_machine_cache_with_id_zero(self, mock_redis):
+        """Test machine id 0 is treated as a specific machine"""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        mock_client.pipeline.return_value.execute.return_value = [set(), 0]
+
+        cache = CacheService(use_local_cache=False)
+        cache.invalidate_machine_cache(0)
+
+        mock_client.delete.assert_called_once_with("machine:0", "machines:all")
+        mock_client.keys.assert_not_called()
+
+
+class TestStampedeProtection:
+    """Test cases for single-flight recomputation and early refresh"""
+
+    @patch('app.services.cache_service.get_redis_client')
+    def test_lock_holder_computes_and_releases(self, mock_redis):
+        """Test the caller holding the lock computes, caches and releases"""
+        mock_client = Mock()
+        mock_client.get.return_value = None
+        mock_client.set.return_value = True
+        mock_redis.return_value = mock_client
+        compute = Mock(return_value={"id": 1})
+
+        cache = CacheService(use_local_cache=False)
+        result = cache.get_or_compute("machine:1", compute, ttl=60)
+
+        assert result == {"id": 1}
+        compute.assert_called_once()
+        mock_client.setex.assert_called_once()
+        mock_client.eval.assert_called_once()
+
+    @patch('app.services.cache_service.time.sleep')
+    @patch('app.services.cache_service.get_redis_client')
+    def test_waiter_uses_value_computed_elsewhere(self, mock_redis, mock_sleep):
+        """Test callers without the lock wait for the holder's value"""
+        entry = {ENTRY_MARKER: 1, "value": {"id": 1}, "delta": 0.1, "expires_at": 1e12}
+        mock_client = Mock()
+        mock_client.get.side_effect = [None, None, cache_codec.encode(entry)]
+        mock_client.set.return_value = None
+        mock_client.exists.return_value = 1
+        mock_redis.return_value = mock_client
+        compute = Mock()
+
+        cache = CacheService(use_local_cache=False)
+        result = cache.get_or_compute("machine:1", compute, ttl=60)
+
+        assert result == {"id": 1}
+        compute.assert_not_called()
+
+    def test_early_refresh_probability(self):
+        """Test XFetch refreshes expired entries and leaves fresh ones alone"""
+        expired = {"delta": 0.1, "expires_at": time.time() - 1}
+        fresh = {"delta": 0.1, "expires_at": time.time() + 3600}
+
+        assert CacheService._should_refresh_early(expired, beta=1.0)
+        assert not CacheService._should_refresh_early(fresh, beta=1.0)
+        assert not CacheService._should_refresh_early(expired, beta=0)
+
+
+class TestCacheAsideV2:
+    """Test cases for cache_aside keys, negative caching, bypass and metrics"""
+
+    @pytest.fixture
+    def shared_cache(self):
+        mock_client = Mock()
+        mock_client.get.return_value = None
+        mock_client.set.return_value = True
+        cache = CacheService(use_local_cache=False)
+        cache.redis_client = mock_client
+        with patch('app.services.cache_service.cache_service', cache):
+            yield cache
+
+    def test_kwargs_and_defaults_share_a_key(self):
+        """Test equivalent calls map to the same stable key"""
+
+        @cache_aside(key_prefix="report")
+        def report(machine_id, interval="1h"):
+            return {}
+
+        assert report.cache_key(1) == "report:1:1h"
+        assert report.cache_key(machine_id=1) == report.cache_key(1, "1h")
+        assert report.cache_key(1, interval="5m") != report.cache_key(1)
+        assert report.cache_key({"ids": [1, 2]}).startswith("report:h:")
+
+    def test_uses_shared_client(self, shared_cache):
+        """Test the decorator reuses the shared client instead of reconnecting"""
+
+        @cache_aside(key_prefix="test", ttl=60)
+        def lookup(arg):
+            return {"result": arg}
+
+        lookup("a")
+        lookup("b")
+
+        assert shared_cache.redis_client.setex.call_count == 2
+
+    def test_none_results_are_cached_with_negative_ttl(self, shared_cache):
+        """Test missing lookups are cached for the negative TTL"""
+
+        @cache_aside(key_prefix="machine", ttl=300, negative_ttl=15)
+        def lookup(machine_id):
+            return None
+
+        assert lookup(404) is None
+
+        key, ttl, _ = shared_cache.redis_client.setex.call_args[0]
+        assert key == "machine:404"
+        assert ttl == 15
+
+    def test_bypass_skips_cache(self, shared_cache):
+        """Test conditional bypass calls the function directly"""
+
+        @cache_aside(key_prefix="test", bypass=lambda arg, fresh=False: fresh)
+        def lookup(arg, fresh=False):
+            return {"result": arg}
+
+        assert lookup("a", fresh=True) == {"result": "a"}
+        shared_cache.redis_client.get.assert_not_called()
+
+    def test_hit_and_miss_metrics(self, shared_cache):
+        """Test per-function hit/miss counters"""
+        from app.utils.metrics import metrics
+
+        @cache_aside(key_prefix="test")
+        def counted(arg):
+            return {"result": arg}
+
+        entry = {ENTRY_MARKER: 1, "value": {"result": "a"}, "delta": 0, "expires_at": 1e12}
+        shared_cache.redis_client.get.side_effect = [None, cache_codec.encode(entry)]
+
+        counted("a")
+        counted("a")
+
+        counters = metrics.snapshot()["counters"]
+        name = f"cache_aside.{counted.__qualname__}"
+        assert counters[f"{name}.misses"] == 1
+        assert counters[f"{name}.hits"] == 1